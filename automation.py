@@ -11,20 +11,50 @@ Version: 2.0.0
 
 from __future__ import annotations
 
+import atexit
+import base64
+import cProfile
+import csv
+import gzip
+import hashlib
+import io
 import json
+import marshal
 import os
+import queue
+import re
 import secrets
+import shutil
+import sqlite3
+import sys
+import tempfile
 import threading
 import time
 import webbrowser
+import zipfile
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Optional
+from datetime import date, datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Iterable, Iterator, Optional
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape as xml_escape
 
+import numpy as np
 import pandas as pd
-from flask import Flask, Response, jsonify, render_template, request, send_file
-from flask_socketio import SocketIO, emit
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    render_template_string,
+    request,
+    send_file,
+    stream_with_context,
+)
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from selenium import webdriver
 from selenium.common.exceptions import (
     NoSuchElementException,
@@ -37,9 +67,19 @@ from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from werkzeug.utils import secure_filename
 
+from automation_config import (
+    ALLOWED_EXTENSIONS,
+    DEFAULT_MAX_RETRIES,
+    MIN_LEASE_SECONDS,
+    SERVER_BACKEND_ENV,
+    SERVER_BACKENDS,
+    SUPPORTED_BROWSERS,
+    AutomationConfig,
+    ValidationRule
+)
+
 # =============================================================================
 # Constants
 # =============================================================================
@@ -47,25 +87,179 @@ from werkzeug.utils import secure_filename
 # File handling constants
 MAX_FILE_SIZE_MB: int = 16
 MAX_FILE_SIZE_BYTES: int = MAX_FILE_SIZE_MB * 1024 * 1024
-ALLOWED_EXTENSIONS: frozenset[str] = frozenset({'.xlsx', '.xls'})
 UPLOAD_FOLDER: str = 'uploads'
 CONFIG_FILE: str = 'config.json'
+SUBMISSION_INDEX_FILE: str = 'submissions.db'
+RUN_HISTORY_FILE: str = 'run_history.db'
 
 # Automation constants
-DEFAULT_URL: str = 'https://www.google.com'
-DEFAULT_DELAY: float = 2.0
-DEFAULT_BROWSER: str = 'chrome'
-DEFAULT_MAX_RETRIES: int = 3
 ELEMENT_WAIT_TIMEOUT: int = 10
+ELEMENT_POLL_SECONDS: float = 0.25
+SELECTION_POLL_SECONDS: float = 0.5
+PAUSE_ACK_SECONDS: float = 1.0
 MAX_LOG_ENTRIES: int = 1000
+EVENT_JOURNAL_SIZE: int = 500
+COALESCED_EVENTS: frozenset[str] = frozenset({'progress', 'ingest_progress'})
 FILE_CLEANUP_AGE_SECONDS: int = 3600  # 1 hour
+UPLOAD_QUOTA_BYTES: int = 512 * 1024 * 1024
+JANITOR_INTERVAL_SECONDS: int = 60
+UPLOAD_HASH_CHUNK_BYTES: int = 1024 * 1024
+
+# Upload ingest constants
+INGEST_CHUNK_ROWS: int = 5000
+INGEST_WORKERS_ENV: str = 'AUTOMATION_INGEST_WORKERS'
+DEFAULT_INGEST_WORKERS: int = 2
+INGEST_JOB_HISTORY: int = 20
+INGEST_PROGRESS_SECONDS: float = 0.5
+INGEST_QUEUED: str = 'queued'
+INGEST_PARSING: str = 'parsing'
+INGEST_READY: str = 'ready'
+INGEST_FAILED: str = 'failed'
 
 # Preview limits
 PREVIEW_ROW_COUNT: int = 5
 VALUE_TRUNCATE_LENGTH: int = 50
 
-# Supported browsers
-SUPPORTED_BROWSERS: frozenset[str] = frozenset({'chrome', 'firefox', 'edge'})
+# Dataset memory constants
+DATASET_CACHE_FOLDER: str = '.datasets'
+DATASET_IDLE_SECONDS: int = 300
+CATEGORY_MAX_DISTINCT_RATIO: float = 0.5
+
+# Data browser constants
+DATA_PAGE_DEFAULT_LIMIT: int = 50
+DATA_PAGE_MAX_LIMIT: int = 500
+DATA_QUERY_CACHE_SIZE: int = 8
+
+# Result export constants
+EXPORT_FORMATS: frozenset[str] = frozenset({'csv', 'xlsx', 'parquet'})
+EXPORT_CHUNK_ROWS: int = 1000
+EXPORT_QUEUE_CHUNKS: int = 16
+ROW_STATUS_PENDING: str = 'pending'
+ROW_STATUS_SUCCESS: str = 'success'
+ROW_STATUS_FAILED: str = 'failed'
+ROW_STATUS_SKIPPED: str = 'skipped'
+ROW_STATUS_REJECTED: str = 'rejected'
+
+# Pre-run validation constants
+VALIDATION_SAMPLE_ROWS: int = 20
+
+# Idempotency index constants
+SUBMISSION_FLUSH_ROWS: int = 100
+
+# Run history constants
+HISTORY_BATCH_ROWS: int = 200
+HISTORY_BULK_ROWS: int = 10_000
+HISTORY_QUEUE_SIZE: int = 256
+HISTORY_HANDOVER_SECONDS: float = 5.0
+HISTORY_MAX_PENDING_ROWS: int = 100_000
+HISTORY_RUNS_MAX_LIMIT: int = 500
+HISTORY_SLOWEST_MAX_LIMIT: int = 200
+HISTORY_TREND_MAX_DAYS: int = 366
+
+# Rate limiter constants
+AIMD_INCREASE_PER_SECOND: float = 0.05
+AIMD_DECREASE_FACTOR: float = 0.5
+AIMD_MIN_RATE: float = 0.05
+AIMD_DECREASE_COOLDOWN_SECONDS: float = 5.0
+AIMD_SLOW_LATENCY_FACTOR: float = 2.0
+AIMD_INCREASE_MAX_GAP_SECONDS: float = 10.0
+RATE_HISTORY_LENGTH: int = 60
+
+# Workbook write-back constants
+WRITE_BACK_HEADERS: tuple[str, str, str] = ('Automation Status', 'Automation Error', 'Automation Timestamp')
+WRITE_BACK_SUFFIX: str = '_results'
+
+# Throughput profile constants
+THROUGHPUT_WINDOW_SIZE: tuple[int, int] = (1024, 768)
+THROUGHPUT_PROFILE_ROOT: str = '/dev/shm' if Path('/dev/shm').is_dir() else tempfile.gettempdir()
+THROUGHPUT_BLOCKED_URLS: tuple[str, ...] = (
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.ogg', '*.mp3', '*.wav', '*.m4a'
+)
+RSS_SAMPLE_EVERY_ROWS: int = 25
+
+# Driver health constants
+MAX_DRIVER_RECOVERIES: int = 3
+PAGE_SETTLE_SECONDS: float = 2.0
+
+# Benchmark stand-in page constants
+BENCHMARK_ASSET_COUNT: int = 12
+BENCHMARK_ASSET_BYTES: int = 256 * 1024
+BENCHMARK_HISTORY_LENGTH: int = 20
+
+# Capacity planning constants
+FORECAST_HISTORY_ROWS: int = 20000
+FORECAST_DEFAULT_SAMPLE_ROWS: int = 20
+FORECAST_TRIALS: int = 400
+FORECAST_MAX_WORKERS: int = 32
+FORECAST_BOOTSTRAP_MAX_ROWS: int = 30
+FORECAST_EXCLUDED_PHASES: frozenset[str] = frozenset({'throttle'})
+
+# Profiling constants
+PROFILE_FOLDER: str = 'profiles'
+PROFILE_MODES: frozenset[str] = frozenset({'deterministic', 'sampling'})
+PROFILE_FILE_KINDS: frozenset[str] = frozenset({'pstats', 'collapsed', 'json'})
+PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+PROFILE_STOP_TIMEOUT_SECONDS: float = 10.0
+PROFILE_MAX_STACK_DEPTH: int = 128
+
+# Log archive constants
+LOG_FOLDER: str = 'logs'
+LOG_FILE_NAME: str = 'automation.jsonl'
+LOG_QUEUE_SIZE: int = 10_000
+LOG_WRITE_BUFFER_BYTES: int = 64 * 1024
+LOG_FLUSH_SECONDS: float = 1.0
+LOG_ROTATE_BYTES: int = 16 * 1024 * 1024
+LOG_ROTATE_SECONDS: int = 24 * 3600
+LOG_KEEP_FILES: int = 30
+
+# Failure artifact constants
+ARTIFACT_FOLDER: str = 'artifacts'
+ARTIFACT_KINDS: dict[str, tuple[str, str]] = {
+    'screenshot': ('png', 'image/png'),
+    'dom': ('html.gz', 'text/html')
+}
+ARTIFACT_QUEUE_SIZE: int = 16
+ARTIFACT_QUOTA_BYTES: int = 256 * 1024 * 1024
+ARTIFACT_DOM_MAX_CHARS: int = 500_000
+
+# Session snapshot constants
+SESSION_FOLDER: str = 'sessions'
+SESSION_KEY_FILE: str = '.session_key'
+SESSION_KEY_ENV: str = 'AUTOMATION_SESSION_KEY'
+LOGIN_URL_PATTERN: re.Pattern[str] = re.compile(
+    r'[/?#=._-](login|log-in|signin|sign-in|logon|sso|oauth2?|saml|auth)(?![a-z])',
+    re.IGNORECASE
+)
+
+# Tab multiplexing constants
+TAB_PAGE_LOAD_STRATEGY: str = 'none'
+TAB_SAME_PAGE_GRACE_MS: int = 1000
+
+# Post-submit navigation constants
+POST_SUBMIT_LEARN_ROWS: int = 3
+POST_SUBMIT_DETECT_SECONDS: float = 2.0
+POST_SUBMIT_RENDER_GRACE_SECONDS: float = 2.0
+POST_SUBMIT_POLL_SECONDS: float = 0.1
+RESTORE_STRATEGIES: tuple[str, ...] = ('wait', 'back', 'navigate')
+
+# Distributed execution constants
+WORKER_TOKEN_ENV: str = 'AUTOMATION_WORKER_TOKEN'
+WORKER_POLL_SECONDS: float = 2.0
+WORKER_TOKEN_WAIT_SECONDS: float = 5.0
+
+# Server backend; set through serve.py, which must patch the standard
+# library for eventlet before this module is imported
+SERVER_BACKEND: str = os.environ.get(SERVER_BACKEND_ENV, SERVER_BACKENDS[0])
+if SERVER_BACKEND not in SERVER_BACKENDS:
+    print(
+        f"⚠️ Ignoring {SERVER_BACKEND_ENV}={SERVER_BACKEND!r} (not one of: {', '.join(SERVER_BACKENDS)}); "
+        f'using {SERVER_BACKENDS[0]}',
+        file=sys.stderr
+    )
+    SERVER_BACKEND = SERVER_BACKENDS[0]
+INGEST_YIELD_ROWS: int = 500
 
 # =============================================================================
 # Flask App Configuration
@@ -76,12 +270,33 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(16))
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE_BYTES
 app.config['CONFIG_FILE'] = CONFIG_FILE
+app.config['SUBMISSION_INDEX_FILE'] = SUBMISSION_INDEX_FILE
+app.config['RUN_HISTORY_FILE'] = RUN_HISTORY_FILE
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SERVER_BACKEND)
 
 # Ensure upload folder exists
 Path(app.config['UPLOAD_FOLDER']).mkdir(parents=True, exist_ok=True)
 
+
+def cooperative_yield() -> None:
+    """Let other green threads run during a long CPU-bound loop (eventlet backend)."""
+    socketio.sleep(0)
+
+
+def offload(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a CPU-bound call without stalling the server.
+    
+    With the eventlet backend the call runs in a native thread of
+    eventlet's pool, so the hub keeps serving requests and events; the
+    call must not emit events itself. Otherwise it simply runs inline.
+    """
+    if SERVER_BACKEND == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
+
 # Thread lock for state access
 state_lock = threading.Lock()
 
@@ -90,76 +305,14 @@ state_lock = threading.Lock()
 # Data Classes
 # =============================================================================
 
-@dataclass
-class AutomationConfig:
-    """Configuration settings for automation."""
-    
-    url: str = DEFAULT_URL
-    delay: float = DEFAULT_DELAY
-    browser: str = DEFAULT_BROWSER
-    start_row: int = 0
-    end_row: int = -1
-    headless: bool = False
-    retry_failed: bool = True
-    max_retries: int = DEFAULT_MAX_RETRIES
-    
-    def to_dict(self) -> dict[str, Any]:
-        """Convert config to dictionary."""
-        return {
-            'url': self.url,
-            'delay': self.delay,
-            'browser': self.browser,
-            'start_row': self.start_row,
-            'end_row': self.end_row,
-            'headless': self.headless,
-            'retry_failed': self.retry_failed,
-            'max_retries': self.max_retries
-        }
-    
-    @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> AutomationConfig:
-        """Create config from dictionary."""
-        return cls(
-            url=data.get('url', DEFAULT_URL),
-            delay=float(data.get('delay', DEFAULT_DELAY)),
-            browser=data.get('browser', DEFAULT_BROWSER),
-            start_row=int(data.get('start_row', 0)),
-            end_row=int(data.get('end_row', -1)),
-            headless=bool(data.get('headless', False)),
-            retry_failed=bool(data.get('retry_failed', True)),
-            max_retries=int(data.get('max_retries', DEFAULT_MAX_RETRIES))
-        )
-    
-    def validate(self) -> list[str]:
-        """Validate configuration and return list of errors."""
-        errors: list[str] = []
-        
-        if not self.url:
-            errors.append("URL is required")
-        elif not (self.url.startswith('http://') or self.url.startswith('https://')):
-            errors.append("URL must start with http:// or https://")
-        
-        if self.delay < 0:
-            errors.append("Delay must be non-negative")
-        
-        if self.browser not in SUPPORTED_BROWSERS:
-            errors.append(f"Browser must be one of: {', '.join(SUPPORTED_BROWSERS)}")
-        
-        if self.start_row < 0:
-            errors.append("Start row must be non-negative")
-        
-        if self.max_retries < 0:
-            errors.append("Max retries must be non-negative")
-        
-        return errors
-
-
 @dataclass
 class AutomationStats:
     """Statistics for automation run."""
     
     success: int = 0
     failed: int = 0
+    skipped: int = 0
+    rejected: int = 0
     total: int = 0
     current: int = 0
     start_time: Optional[float] = None
@@ -168,6 +321,8 @@ class AutomationStats:
         """Reset all statistics."""
         self.success = 0
         self.failed = 0
+        self.skipped = 0
+        self.rejected = 0
         self.total = 0
         self.current = 0
         self.start_time = time.time()
@@ -177,12 +332,31 @@ class AutomationStats:
         return {
             'success': self.success,
             'failed': self.failed,
+            'skipped': self.skipped,
+            'rejected': self.rejected,
             'total': self.total,
             'current': self.current,
             'start_time': self.start_time
         }
 
 
+@dataclass
+class SheetInfo:
+    """Dimensions of a worksheet, read from workbook metadata."""
+    
+    name: str
+    rows: Optional[int] = None
+    columns: Optional[int] = None
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert sheet info to dictionary."""
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'columns': self.columns
+        }
+
+
 @dataclass
 class FileInfo:
     """Information about uploaded file."""
@@ -192,6 +366,8 @@ class FileInfo:
     columns: list[str]
     size: int
     preview: list[dict[str, Any]]
+    sheet: Optional[str] = None
+    sheets: list[SheetInfo] = field(default_factory=list)
     
     def to_dict(self) -> dict[str, Any]:
         """Convert file info to dictionary."""
@@ -200,7 +376,9 @@ class FileInfo:
             'rows': self.rows,
             'columns': self.columns,
             'size': self.size,
-            'preview': self.preview
+            'preview': self.preview,
+            'sheet': self.sheet,
+            'sheets': [sheet.to_dict() for sheet in self.sheets]
         }
 
 
@@ -211,16 +389,53 @@ class FailedRow:
     index: int
     value: str
     error: str
+    sheet: Optional[str] = None
+    artifact_id: Optional[str] = None
     
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
         return {
             'index': self.index,
             'value': self.value,
-            'error': self.error
+            'error': self.error,
+            'sheet': self.sheet,
+            'artifacts': artifact_writer.links(self.artifact_id) if self.artifact_id else None
         }
 
 
+@dataclass
+class RowOutcome:
+    """Outcome of processing a single data row."""
+    
+    index: int
+    status: str
+    error: Optional[str] = None
+    attempts: int = 0
+    latency: float = 0.0
+    finished_at: float = field(default_factory=time.time)
+    phases: dict[str, float] = field(default_factory=dict)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'index': self.index,
+            'status': self.status,
+            'error': self.error,
+            'attempts': self.attempts,
+            'latency_ms': round(self.latency * 1000, 1),
+            'finished_at': self.finished_at,
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+        }
+
+
+@dataclass
+class SheetRun:
+    """Row range and outcomes of one sheet processed by a run."""
+    
+    run_range: tuple[int, int]
+    outcomes: dict[int, RowOutcome] = field(default_factory=dict)
+
+
 @dataclass
 class LogEntry:
     """A single log entry."""
@@ -228,56 +443,236 @@ class LogEntry:
     timestamp: str
     message: str
     level: str
+    seq: int = 0
+    run_id: Optional[str] = None
     
-    def to_dict(self) -> dict[str, str]:
+    def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
         return {
             'timestamp': self.timestamp,
             'message': self.message,
-            'level': self.level
+            'level': self.level,
+            'seq': self.seq,
+            'run_id': self.run_id
         }
 
 
+class RunControl:
+    """
+    Pause, stop and element-selection signals of a run.
+    
+    All signals share one condition variable, so a waiting thread wakes
+    as soon as any of them changes instead of polling a flag. Waits that
+    would otherwise be plain sleeps (row delay, retry backoff, element
+    waits, rate limiting) go through sleep(), which a stop cuts short.
+    """
+    
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._paused = False
+        self._stopped = False
+        self._parked = False
+        self._selected: set[str] = set()
+    
+    @property
+    def paused(self) -> bool:
+        """True if a pause has been requested."""
+        return self._paused
+    
+    @property
+    def stopped(self) -> bool:
+        """True if a stop has been requested."""
+        return self._stopped
+    
+    @property
+    def parked(self) -> bool:
+        """True while the run thread is waiting in wait_while_paused()."""
+        return self._parked
+    
+    def reset(self) -> None:
+        """Clear all signals for a new run."""
+        with self._cond:
+            self._paused = self._stopped = False
+            self._selected.clear()
+            self._cond.notify_all()
+    
+    def stop(self) -> None:
+        """Request a stop; every wait returns immediately."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+    
+    def set_paused(self, paused: bool) -> None:
+        """Request a pause or a resume."""
+        with self._cond:
+            self._paused = paused
+            self._cond.notify_all()
+    
+    def select(self, kind: str) -> None:
+        """Record that an element ('input' or 'submit') has been selected."""
+        with self._cond:
+            self._selected.add(kind)
+            self._cond.notify_all()
+    
+    def is_selected(self, kind: str) -> bool:
+        """Whether an element ('input' or 'submit') has been selected."""
+        return kind in self._selected
+    
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleep unless a stop is requested.
+        
+        Returns:
+            True if the full time passed, False if the run was stopped.
+        """
+        with self._cond:
+            return not self._cond.wait_for(lambda: self._stopped, timeout=max(0.0, seconds))
+    
+    def wait(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """
+        Wait until `predicate` holds, a stop is requested or `timeout` passes.
+        
+        The predicate is checked again whenever a signal changes or
+        notify() is called, so it can watch state outside the run control.
+        
+        Returns:
+            True if the predicate holds.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._stopped or predicate(), timeout=max(0.0, timeout))
+            return predicate()
+    
+    def notify(self) -> None:
+        """Wake threads in wait() to check their predicate again."""
+        with self._cond:
+            self._cond.notify_all()
+    
+    def wait_for_selection(self, kind: str, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for an element to be selected.
+        
+        Returns:
+            True if the element is selected.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: kind in self._selected or self._stopped, timeout=timeout)
+            return kind in self._selected
+    
+    def wait_while_paused(self, idle: Optional[Callable[[], None]] = None, interval: float = 1.0) -> bool:
+        """
+        Block while the run is paused.
+        
+        Args:
+            idle: Called every `interval` seconds while paused (e.g. to let
+                the profiler act on the run thread).
+            interval: Seconds between `idle` calls.
+        
+        Returns:
+            False if the run was stopped, True otherwise.
+        """
+        with self._cond:
+            if not self._paused or self._stopped:
+                return not self._stopped
+            self._parked = True
+            self._cond.notify_all()
+        try:
+            while True:
+                with self._cond:
+                    if self._cond.wait_for(lambda: not self._paused or self._stopped,
+                                           timeout=interval if idle else None):
+                        break
+                idle()
+        finally:
+            with self._cond:
+                self._parked = False
+                self._cond.notify_all()
+        return not self._stopped
+    
+    def wait_parked(self, parked: bool, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for the run thread to park or unpark.
+        
+        Returns:
+            True if the run thread reached the requested state.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._parked == parked or self._stopped, timeout=timeout) \
+                and self._parked == parked
+
+
 @dataclass
 class AutomationState:
     """Complete state of the automation system."""
     
     is_running: bool = False
-    is_paused: bool = False
-    should_stop: bool = False
-    input_selected: bool = False
-    submit_selected: bool = False
+    run_id: Optional[str] = None
+    run_thread: Optional[int] = None
+    control: RunControl = field(default_factory=RunControl)
     driver: Optional[WebDriver] = None
+    driver_slot: int = 0
     data: Optional[pd.DataFrame] = None
     file_info: Optional[FileInfo] = None
     file_path: Optional[str] = None
+    workbook: Optional[WorkbookSheets] = None
+    sheet_name: Optional[str] = None
+    data_index: Optional[DataIndex] = None
     config: AutomationConfig = field(default_factory=AutomationConfig)
     stats: AutomationStats = field(default_factory=AutomationStats)
     failed_rows: list[FailedRow] = field(default_factory=list)
+    row_outcomes: dict[int, RowOutcome] = field(default_factory=dict)
+    run_range: Optional[tuple[int, int]] = None
+    sheet_runs: dict[str, SheetRun] = field(default_factory=dict)
+    results_path: Optional[str] = None
+    forecast: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
     logs: list[LogEntry] = field(default_factory=list)
     element_xpath: Optional[str] = None
     submit_xpath: Optional[str] = None
+    navigator: Optional[PostSubmitNavigator] = None
+    
+    @property
+    def is_paused(self) -> bool:
+        """Whether a pause has been requested."""
+        return self.control.paused
+    
+    @property
+    def should_stop(self) -> bool:
+        """Whether a stop has been requested."""
+        return self.control.stopped
+    
+    @property
+    def input_selected(self) -> bool:
+        """Whether the input element has been selected."""
+        return self.control.is_selected('input')
+    
+    @property
+    def submit_selected(self) -> bool:
+        """Whether the submit element has been selected."""
+        return self.control.is_selected('submit')
     
     def reset_for_new_run(self) -> None:
         """Reset state for a new automation run."""
         self.is_running = True
-        self.is_paused = False
-        self.should_stop = False
-        self.input_selected = False
-        self.submit_selected = False
+        self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        self.run_thread = None
+        self.control.reset()
         self.element_xpath = None
         self.submit_xpath = None
         self.failed_rows = []
+        self.row_outcomes = {}
+        self.run_range = None
+        self.sheet_runs = {}
+        self.results_path = None
+        self.forecast = None
+        self.navigator = None
+        self.error = None
         self.logs = []
         self.stats.reset()
     
     def cleanup_after_run(self) -> None:
         """Clean up state after automation run."""
         self.is_running = False
-        self.is_paused = False
-        self.should_stop = False
-        self.input_selected = False
-        self.submit_selected = False
+        self.control.reset()
 
 
 # Global state instance
@@ -393,6 +788,20 @@ class ElementNotFoundError(AutomationError):
     pass
 
 
+class DriverCrashedError(AutomationError):
+    """
+    Raised when the browser session is no longer usable.
+    
+    Attributes:
+        attempts: Attempts made on the row in the lost session, including
+            the one that found it dead.
+    """
+    
+    def __init__(self, message: str, attempts: int = 1) -> None:
+        super().__init__(message)
+        self.attempts = attempts
+
+
 class FileValidationError(AutomationError):
     """Raised when file validation fails."""
     pass
@@ -403,6 +812,26 @@ class ConfigValidationError(AutomationError):
     pass
 
 
+class ProfilingError(AutomationError):
+    """Raised when a profiling request cannot be honoured."""
+    pass
+
+
+class LeaseError(AutomationError):
+    """Raised when a worker report does not match an active lease."""
+    pass
+
+
+class SessionSnapshotError(AutomationError):
+    """Raised when a session snapshot cannot be stored or read."""
+    pass
+
+
+class RunStoppedError(AutomationError):
+    """Raised when a stop request interrupts a wait inside a row."""
+    pass
+
+
 # =============================================================================
 # Configuration Management
 # =============================================================================
@@ -448,19 +877,371 @@ def save_config() -> None:
 # Logging and Progress
 # =============================================================================
 
+class EventJournal:
+    """
+    Sequence numbers and a bounded history of published events.
+    
+    Every log entry and event gets a sequence number from one counter, so
+    a client that remembers the last number it saw can catch up with a
+    single request for everything after it. Events of kinds in
+    COALESCED_EVENTS (progress) only keep their latest instance per run,
+    or per ingest job for ingest progress, since older ones are
+    superseded. An ingest job's final (ready or failed) event is kept
+    like any other event. Log entries are kept in the state's log buffer
+    rather than here.
+    """
+    
+    def __init__(self, size: int) -> None:
+        self._seq = 0
+        self._events: deque[dict[str, Any]] = deque(maxlen=size)
+        self._latest: dict[tuple[Optional[str], str], dict[str, Any]] = {}
+        self._dropped_seq = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def seq(self) -> int:
+        """Sequence number of the most recent event."""
+        return self._seq
+    
+    def next_seq(self) -> int:
+        """Allocate the next sequence number."""
+        with self._lock:
+            self._seq += 1
+            return self._seq
+    
+    def record(self, event: str, payload: dict[str, Any], broadcast: bool = False) -> None:
+        """Remember a published (non-log) event for catch-up."""
+        entry = {'event': event, 'data': payload, 'broadcast': broadcast}
+        with self._lock:
+            if event in COALESCED_EVENTS:
+                # Ingest events carry no run_id; their job_id tells jobs apart
+                key = (payload.get('job_id', payload.get('run_id')), event)
+                if event != 'ingest_progress' or payload.get('status') not in (INGEST_READY, INGEST_FAILED):
+                    self._latest[key] = entry
+                    return
+                self._latest.pop(key, None)
+            if len(self._events) == self._events.maxlen:
+                self._dropped_seq = self._events[0]['data']['seq']
+            self._events.append(entry)
+    
+    def since(self, after: int, run_id: Optional[str] = None) -> tuple[list[dict[str, Any]], bool]:
+        """
+        Events after a sequence number, oldest first.
+        
+        Args:
+            after: Last sequence number the client has seen.
+            run_id: If given, only events of this run and global events.
+        
+        Returns:
+            Tuple of (events, truncated); truncated is True if events
+            after `after` were already dropped from the journal.
+        """
+        with self._lock:
+            entries = [*self._events, *self._latest.values()]
+            truncated = after < self._dropped_seq
+        selected = [
+            {'event': entry['event'], 'data': entry['data']}
+            for entry in entries
+            if entry['data']['seq'] > after
+            and (run_id is None or entry['broadcast'] or entry['data']['run_id'] in (None, run_id))
+        ]
+        selected.sort(key=lambda entry: entry['data']['seq'])
+        return selected, truncated
+
+
+event_journal = EventJournal(EVENT_JOURNAL_SIZE)
+
+
+class LogArchive:
+    """
+    Persistent JSON-lines log of every entry, written on a background thread.
+    
+    log_message() only hands entries over through a bounded queue, so a
+    slow disk never stalls the run loop; when the queue is full the entry
+    is dropped and counted instead. The writer batches entries into a
+    buffered file and flushes it at least every LOG_FLUSH_SECONDS. The
+    file is rotated once it exceeds its size limit or its time window
+    ends; rotated files are gzip-compressed and named after the time of
+    their first entry, and only the newest `keep_files` are kept.
+    """
+    
+    def __init__(self, folder: Path, queue_size: int, rotate_bytes: int, rotate_seconds: int, keep_files: int) -> None:
+        self.folder = folder
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.keep_files = keep_files
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self.last_error: Optional[str] = None
+        self._queue: queue.Queue[tuple[float, LogEntry] | threading.Event] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._file: Optional[Any] = None
+        self._size = 0
+        self._started: Optional[float] = None
+    
+    @property
+    def path(self) -> Path:
+        """The file currently written to."""
+        return self.folder / LOG_FILE_NAME
+    
+    def submit(self, entry: LogEntry) -> None:
+        """Queue an entry for writing without blocking."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='log-writer')
+                self._thread.start()
+        try:
+            self._queue.put_nowait((time.time(), entry))
+        except queue.Full:
+            self.dropped += 1
+    
+    def _run(self) -> None:
+        """Writer loop."""
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=LOG_FLUSH_SECONDS)
+            except queue.Empty:
+                item = None
+            
+            batch: list[tuple[float, LogEntry]] = []
+            flush_requests: list[threading.Event] = []
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    flush_requests.append(item)
+                else:
+                    batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            
+            try:
+                if batch:
+                    self._write(batch)
+                if self._file and (flush_requests or time.monotonic() - last_flush >= LOG_FLUSH_SECONDS):
+                    self._file.flush()
+                    last_flush = time.monotonic()
+            except (OSError, ValueError) as e:
+                # Not logged through log_message, which would feed this writer
+                self.last_error = str(e)
+                self._close()
+            for request in flush_requests:
+                request.set()
+    
+    def _write(self, batch: list[tuple[float, LogEntry]]) -> None:
+        """Append a batch of entries, rotating the file where needed."""
+        for created, entry in batch:
+            if self._file is None:
+                self._open(created)
+            elif self._size >= self.rotate_bytes or self._window(created) != self._window(self._started):
+                self._rotate()
+                self._open(created)
+            line = json.dumps({
+                'ts': round(created, 3),
+                'time': datetime.fromtimestamp(created).isoformat(timespec='milliseconds'),
+                **entry.to_dict()
+            }, ensure_ascii=False) + '\n'
+            self._file.write(line)
+            self._size += len(line.encode('utf-8'))
+            self.written += 1
+    
+    def _window(self, created: Optional[float]) -> int:
+        """Rotation time window of a timestamp."""
+        return int((created or 0) // self.rotate_seconds)
+    
+    def _open(self, created: float) -> None:
+        """Open the current file for appending, continuing an existing one."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._started = created
+        if self.path.exists():
+            with self.path.open('r', encoding='utf-8') as existing:
+                try:
+                    self._started = float(json.loads(existing.readline())['ts'])
+                except (ValueError, KeyError, TypeError):
+                    pass  # Empty or foreign first line; treat the file as new
+        self._file = self.path.open('a', encoding='utf-8', buffering=LOG_WRITE_BUFFER_BYTES)
+        self._size = self.path.stat().st_size
+    
+    def _close(self) -> None:
+        """Close the current file, if open."""
+        if self._file:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+    
+    def _rotate(self) -> None:
+        """Compress the current file into the archive and prune old archives."""
+        self._close()
+        stamp = datetime.fromtimestamp(self._started or time.time()).strftime('%Y%m%d-%H%M%S')
+        target = self.folder / f'automation-{stamp}.jsonl.gz'
+        suffix = 1
+        while target.exists():
+            target = self.folder / f'automation-{stamp}-{suffix}.jsonl.gz'
+            suffix += 1
+        with self.path.open('rb') as source, gzip.open(target, 'wb', compresslevel=6) as archive:
+            shutil.copyfileobj(source, archive)
+        self.path.unlink()
+        self.rotations += 1
+        for old in self.archives()[:-self.keep_files or None]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    
+    def archives(self) -> list[Path]:
+        """Rotated files, oldest first."""
+        if not self.folder.is_dir():
+            return []
+        # Names can collide within a second (then get a suffix), so order by age
+        return sorted(self.folder.glob('automation-*.jsonl.gz'), key=lambda path: (path.stat().st_mtime, path.name))
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything queued so far is on disk.
+        
+        Returns:
+            True if the writer confirmed the flush within `timeout` seconds.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def iter_records(self, run_id: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """
+        Read archived entries back, oldest first.
+        
+        Args:
+            run_id: If given, only entries of this run. Run IDs start with
+                the run's start time, so files that ended before the run
+                began are not opened.
+        
+        Yields:
+            Decoded log records.
+        """
+        self.flush()
+        archives = self.archives()
+        if run_id and re.match(r'\d{8}-\d{6}', run_id):
+            # An archive ends where the next one starts
+            starts = [path.name[len('automation-'):][:15] for path in archives]
+            archives = [path for path, next_start in zip(archives, starts[1:]) if next_start >= run_id[:15]] + archives[-1:]
+        needle = f'"run_id": {json.dumps(run_id)}'
+        
+        for path in [*archives, self.path]:
+            try:
+                handle = gzip.open(path, 'rt', encoding='utf-8') if path.suffix == '.gz' else path.open('r', encoding='utf-8')
+            except FileNotFoundError:
+                continue  # Rotated or pruned while reading
+            with handle:
+                try:
+                    for line in handle:
+                        if run_id and needle not in line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Line cut short by a crash
+                except (OSError, EOFError):
+                    continue  # Truncated archive
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Writer counters and files for status reporting."""
+        archives = self.archives()
+        return {
+            'path': str(self.path),
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'rotations': self.rotations,
+            'current_bytes': self._size,
+            'archives': [{'name': path.name, 'bytes': path.stat().st_size} for path in archives],
+            'last_error': self.last_error
+        }
+
+
+log_archive = LogArchive(Path(LOG_FOLDER), LOG_QUEUE_SIZE, LOG_ROTATE_BYTES, LOG_ROTATE_SECONDS, LOG_KEEP_FILES)
+# Write out the buffered tail when the process exits (e.g. after a CLI run)
+atexit.register(log_archive.flush, 2.0)
+
+
+def run_room(run_id: str) -> str:
+    """SocketIO room of clients viewing a run."""
+    return f'run:{run_id}'
+
+
+def publish_event(
+    event: str,
+    data: Optional[dict[str, Any]] = None,
+    run_id: Optional[str] = None,
+    seq: Optional[int] = None,
+    broadcast: bool = False
+) -> int:
+    """
+    Emit an event with a sequence number and the server time ('ts').
+    
+    Run events go only to clients in the run's room; events without a
+    run, or with broadcast set, go to everyone.
+    
+    Args:
+        event: Event name.
+        data: Event payload.
+        run_id: Run the event belongs to, if any.
+        seq: Pre-allocated sequence number (allocated if omitted).
+        broadcast: Send a run event to all clients.
+    
+    Returns:
+        The event's sequence number.
+    """
+    payload = {**(data or {}), 'seq': seq or event_journal.next_seq(), 'run_id': run_id, 'ts': round(time.time(), 3)}
+    if event != 'log':
+        event_journal.record(event, payload, broadcast)
+    if run_id and not broadcast:
+        socketio.emit(event, payload, to=run_room(run_id))
+    else:
+        socketio.emit(event, payload)
+    return payload['seq']
+
+
+def current_run_id() -> Optional[str]:
+    """ID of the run in progress, or None when idle."""
+    return automation_state.run_id if automation_state.is_running else None
+
+
+# Additional receivers of log entries (e.g. the command-line runner)
+log_sinks: list[Callable[[LogEntry], None]] = []
+
+
 def log_message(message: str, level: str = 'info') -> None:
     """
     Send log message to frontend via WebSocket.
     
-    Creates a timestamped log entry and broadcasts it to all connected clients.
-    Maintains a rolling buffer of the most recent log entries.
+    Creates a timestamped, sequenced log entry and publishes it to clients
+    viewing the current run (or to everyone when no run is in progress)
+    and to registered log sinks. Maintains a rolling buffer of the most recent
+    log entries; the full history goes to the on-disk log archive.
     
     Args:
         message: The log message content.
         level: Log level - 'info', 'warning', 'error', or 'success'.
     """
     timestamp = datetime.now().strftime('%H:%M:%S')
-    log_entry = LogEntry(timestamp=timestamp, message=message, level=level)
+    log_entry = LogEntry(
+        timestamp=timestamp,
+        message=message,
+        level=level,
+        seq=event_journal.next_seq(),
+        run_id=current_run_id()
+    )
     
     with state_lock:
         automation_state.logs.append(log_entry)
@@ -468,10 +1249,19 @@ def log_message(message: str, level: str = 'info') -> None:
         if len(automation_state.logs) > MAX_LOG_ENTRIES:
             automation_state.logs = automation_state.logs[-MAX_LOG_ENTRIES:]
     
-    socketio.emit('log', log_entry.to_dict())
+    publish_event('log', log_entry.to_dict(), log_entry.run_id, log_entry.seq)
+    log_archive.submit(log_entry)
+    for sink in log_sinks:
+        sink(log_entry)
 
 
-def update_progress(current: int, total: int, success: int, failed: int) -> None:
+def update_progress(
+    current: int,
+    total: int,
+    success: int,
+    failed: int,
+    extra: Optional[dict[str, Any]] = None
+) -> None:
     """
     Send progress update to frontend via WebSocket.
     
@@ -483,6 +1273,7 @@ def update_progress(current: int, total: int, success: int, failed: int) -> None
         total: Total number of rows to process.
         success: Count of successfully processed rows.
         failed: Count of failed rows.
+        extra: Additional fields merged into the progress event.
     """
     elapsed: float = 0.0
     speed: float = 0.0
@@ -499,7 +1290,7 @@ def update_progress(current: int, total: int, success: int, failed: int) -> None
     
     percent = int((current / total) * 100) if total > 0 else 0
     
-    socketio.emit('progress', {
+    publish_event('progress', {
         'current': current,
         'total': total,
         'percent': percent,
@@ -507,24 +1298,91 @@ def update_progress(current: int, total: int, success: int, failed: int) -> None
         'failed': failed,
         'elapsed': int(elapsed),
         'speed': round(speed, 1),
-        'eta': eta
-    })
+        'eta': eta,
+        **(extra or {})
+    }, current_run_id())
 
 
 # =============================================================================
 # Browser Management
 # =============================================================================
 
-def get_driver(browser: str = 'chrome', headless: bool = False) -> WebDriver:
+def throughput_profile_dir(browser: str, slot: int = 0) -> Path:
+    """
+    Return the reusable user-data directory for a throughput-profile driver.
+    
+    Directories live on tmpfs (/dev/shm) when available so profile I/O
+    never touches disk, and are reused across launches so caches and
+    first-run setup are paid once. Each concurrent driver needs its own
+    slot because browsers lock their profile directory.
+    
+    Args:
+        browser: Browser type.
+        slot: Index of the concurrent driver using the profile.
+    
+    Returns:
+        Path of the (created) profile directory.
+    """
+    path = Path(THROUGHPUT_PROFILE_ROOT) / f'automation-profile-{browser}-{slot}'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _chromium_options(options: ChromeOptions | EdgeOptions, browser: str, headless: bool, throughput: bool, slot: int) -> None:
+    """Apply shared Chrome/Edge options, including the throughput profile."""
+    if throughput:
+        width, height = THROUGHPUT_WINDOW_SIZE
+        options.page_load_strategy = 'eager'
+        options.add_argument(f'--window-size={width},{height}')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument('--autoplay-policy=user-gesture-required')
+        options.add_argument('--mute-audio')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-first-run')
+        options.add_argument(f'--user-data-dir={throughput_profile_dir(browser, slot)}')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.media_stream': 2
+        })
+    else:
+        options.add_argument('--start-maximized')
+    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    if headless:
+        options.add_argument('--headless=new')
+
+
+def _block_heavy_resources(driver: WebDriver) -> None:
+    """Block image, font and media requests via the DevTools protocol."""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(THROUGHPUT_BLOCKED_URLS)})
+    except (AttributeError, WebDriverException):
+        pass  # Older drivers without CDP still get the option-level blocking
+
+
+def get_driver(
+    browser: str = 'chrome',
+    headless: bool = False,
+    throughput: bool = False,
+    slot: int = 0,
+    page_load_strategy: Optional[str] = None
+) -> WebDriver:
     """
     Initialize and return a WebDriver instance.
     
     Creates a configured WebDriver for the specified browser with
-    optional headless mode support.
+    optional headless mode support. The throughput profile uses the
+    'eager' page-load strategy, blocks images, fonts and media, disables
+    extensions, uses a small fixed window and a reusable tmpfs profile.
     
     Args:
         browser: Browser type - 'chrome', 'firefox', or 'edge'.
         headless: If True, run browser in headless mode.
+        throughput: If True, apply the lean throughput profile.
+        slot: Index of the concurrent driver (selects its profile directory).
+        page_load_strategy: Overrides the page-load strategy ('normal',
+            'eager' or 'none').
     
     Returns:
         Configured WebDriver instance.
@@ -539,23 +1397,49 @@ def get_driver(browser: str = 'chrome', headless: bool = False) -> WebDriver:
     try:
         if browser == 'chrome':
             options = ChromeOptions()
-            options.add_argument('--start-maximized')
-            options.add_experimental_option('excludeSwitches', ['enable-logging'])
-            if headless:
-                options.add_argument('--headless=new')
-            return webdriver.Chrome(options=options)
+            _chromium_options(options, browser, headless, throughput, slot)
+            if page_load_strategy:
+                options.page_load_strategy = page_load_strategy
+            driver = webdriver.Chrome(options=options)
+            if throughput:
+                _block_heavy_resources(driver)
+            return driver
         
         elif browser == 'firefox':
             options = FirefoxOptions()
+            if throughput:
+                width, height = THROUGHPUT_WINDOW_SIZE
+                options.page_load_strategy = 'eager'
+                options.add_argument(f'--width={width}')
+                options.add_argument(f'--height={height}')
+                options.add_argument('-profile')
+                options.add_argument(str(throughput_profile_dir(browser, slot)))
+                options.set_preference('permissions.default.image', 2)
+                options.set_preference('browser.display.use_document_fonts', 0)
+                options.set_preference('gfx.downloadable_fonts.enabled', False)
+                options.set_preference('media.autoplay.default', 5)
+                options.set_preference('media.preload.default', 0)
+                options.set_preference('media.preload.auto', 0)
+                options.set_preference('extensions.enabledScopes', 0)
+                options.set_preference('extensions.autoDisableScopes', 15)
             if headless:
                 options.add_argument('--headless')
+            if page_load_strategy:
+                options.page_load_strategy = page_load_strategy
             return webdriver.Firefox(options=options)
         
         elif browser == 'edge':
             options = EdgeOptions()
-            if headless:
+            if throughput:
+                _chromium_options(options, browser, headless, throughput, slot)
+            elif headless:
                 options.add_argument('--headless')
-            return webdriver.Edge(options=options)
+            if page_load_strategy:
+                options.page_load_strategy = page_load_strategy
+            driver = webdriver.Edge(options=options)
+            if throughput:
+                _block_heavy_resources(driver)
+            return driver
         
         # Fallback (should not reach here due to validation above)
         return webdriver.Chrome()
@@ -566,324 +1450,5604 @@ def get_driver(browser: str = 'chrome', headless: bool = False) -> WebDriver:
             f"Ensure the browser and its driver are installed. Error: {e}"
         ) from e
 
-def inject_element_selector(driver: WebDriver, element_type: str = 'INPUT FIELD') -> None:
+
+def browser_rss_bytes(driver: WebDriver) -> Optional[int]:
     """
-    Inject JavaScript for interactive element selection.
+    Measure the resident memory of a driver's browser process tree.
     
-    Injects a JavaScript overlay into the page that allows the user
-    to visually select elements by clicking on them.
+    Sums RSS over the driver service process and all of its descendants
+    (browser, renderer, GPU processes). Requires the optional psutil
+    package.
     
-    Args:
-        driver: WebDriver instance with an active page.
-        element_type: Description of the element type being selected.
+    Returns:
+        Total RSS in bytes, or None if psutil is unavailable or the
+        process cannot be inspected.
     """
-    js = ELEMENT_SELECTOR_JS.replace('%ELEMENT_TYPE%', element_type)
-    driver.execute_script(js)
-
+    try:
+        import psutil
+    except ImportError:
+        return None
+    
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root, *root.children(recursive=True)]
+    except (AttributeError, psutil.Error):
+        return None
+    
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
 
-def get_selected_element(driver: WebDriver) -> Optional[dict[str, str]]:
+class DriverHealthMonitor:
     """
-    Get the selected element info from browser.
+    Tracks the health of a run's browser session.
     
-    Retrieves information about the element selected by the user
-    via the injected JavaScript selector.
+    Records rows processed since the last launch, browser RSS and the
+    round-trip latency of a trivial driver command. Decides when the
+    session should be recycled proactively, either after a number of rows
+    or when memory crosses a threshold.
+    """
     
-    Args:
-        driver: WebDriver instance.
+    def __init__(self, recycle_after_rows: int = 0, recycle_rss_mb: int = 0) -> None:
+        self.recycle_after_rows = recycle_after_rows
+        self.recycle_rss_bytes = recycle_rss_mb * 1024 * 1024
+        self.rows_since_launch = 0
+        self.recycles = 0
+        self.recoveries = 0
+        self.last_rss: Optional[int] = None
+        self.ping_ms: Optional[float] = None
+        self.rss_samples: list[int] = []
     
-    Returns:
-        Dictionary with 'xpath', 'tag', 'id', and 'className' keys,
-        or None if no element has been selected.
-    """
-    try:
-        result = driver.execute_script("return window.__selectedElementInfo;")
-        return result
-    except WebDriverException:
+    def launched(self) -> None:
+        """Reset per-session counters after a (re)launch."""
+        self.rows_since_launch = 0
+        self.last_rss = None
+    
+    def row_done(self) -> None:
+        self.rows_since_launch += 1
+    
+    def sample(self, driver: WebDriver) -> None:
+        """Measure browser RSS and command latency."""
+        started = time.perf_counter()
+        if is_session_alive(driver):
+            self.ping_ms = round((time.perf_counter() - started) * 1000, 1)
+        rss = browser_rss_bytes(driver)
+        if rss is not None:
+            self.last_rss = rss
+            self.rss_samples.append(rss)
+    
+    def recycle_reason(self) -> Optional[str]:
+        """Return why the session should be recycled now, if it should."""
+        if self.recycle_after_rows and self.rows_since_launch >= self.recycle_after_rows:
+            return f'{self.rows_since_launch} rows processed'
+        if self.recycle_rss_bytes and self.last_rss and self.last_rss >= self.recycle_rss_bytes:
+            return f'browser memory at {self.last_rss // (1024 * 1024)} MB'
         return None
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Health snapshot for progress events."""
+        return {
+            'rows_since_launch': self.rows_since_launch,
+            'rss_mb': round(self.last_rss / (1024 * 1024), 1) if self.last_rss else None,
+            'ping_ms': self.ping_ms,
+            'recycles': self.recycles,
+            'recoveries': self.recoveries
+        }
 
 
-# =============================================================================
+def is_session_alive(driver: Optional[WebDriver]) -> bool:
+    """
+    Check whether a driver session still responds.
+    
+    Returns:
+        True if a trivial command succeeds, False if the session or the
+        browser process is gone.
+    """
+    if driver is None:
+        return False
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+
+def launch_driver(config: AutomationConfig, slot: int = 0) -> WebDriver:
+    """
+    Start a driver for the run's config and open the target URL.
+    
+    With reuse_session, a saved session for the target is restored so
+    the browser starts logged in. With several tabs the driver does not
+    wait for page loads, so a submit in one tab returns while its page
+    is still loading.
+    
+    Raises:
+        BrowserInitError: If the browser cannot be started.
+    """
+    page_load_strategy = TAB_PAGE_LOAD_STRATEGY if config.tabs > 1 else None
+    driver = get_driver(config.browser, config.headless, config.throughput_profile, slot, page_load_strategy)
+    driver.get(config.url)
+    time.sleep(PAGE_SETTLE_SECONDS)
+    if config.reuse_session:
+        apply_session_snapshot(driver, config)
+    return driver
+
+
+def relaunch_driver(state: AutomationState, config: AutomationConfig, reason: str) -> None:
+    """
+    Replace the run's driver with a fresh session on config.url.
+    
+    The old session is quit (errors ignored, it may already be dead). The
+    saved element selectors stay in state, so processing resumes at the
+    current row without repeating element selection. The new driver
+    keeps the state's profile slot.
+    
+    Raises:
+        BrowserInitError: If the new browser cannot be started.
+    """
+    log_message(f'♻️ Restarting browser: {reason}', 'warning')
+    old_driver = state.driver
+    state.driver = None
+    if old_driver:
+        try:
+            old_driver.quit()
+        except Exception:
+            pass  # Session may already be gone
+    state.driver = launch_driver(config, state.driver_slot)
+
+
+def process_row_with_recovery(
+    state: AutomationState,
+    config: AutomationConfig,
+    health: DriverHealthMonitor,
+    value: str,
+    max_retries: int,
+    timings: Optional[dict[str, float]] = None
+) -> tuple[bool, Optional[str], int]:
+    """
+    Process a row, relaunching the browser if the session dies.
+    
+    A dead session is relaunched and the same row is tried again, so rows
+    are not counted as failed because of a browser crash. After
+    MAX_DRIVER_RECOVERIES consecutive crashes on one row the row fails.
+    With a post-submit navigator on the state, the form is restored after
+    a successful submit so the next row finds its input straight away.
+    
+    Returns:
+        Tuple of (success, error_message, attempts) as from process_row().
+    """
+    attempts = 0
+    navigator = state.navigator
+    for recovery in range(MAX_DRIVER_RECOVERIES + 1):
+        try:
+            if navigator:
+                navigator.before_submit(state.driver, state.element_xpath)
+            success, error, row_attempts = process_row(
+                state.driver,
+                value,
+                state.element_xpath,
+                state.submit_xpath,
+                max_retries=max_retries,
+                timings=timings,
+                control=state.control
+            )
+            if success and navigator:
+                navigator.after_submit(state.driver, state.element_xpath, state.control, timings)
+            return success, error, attempts + row_attempts
+        except DriverCrashedError as e:
+            attempts += e.attempts
+            if recovery == MAX_DRIVER_RECOVERIES:
+                return False, f'Browser crashed: {e}', attempts
+            health.recoveries += 1
+            relaunch_driver(state, config, 'browser session lost')
+            health.launched()
+    return False, 'Browser crashed', attempts
+
+
+def inject_element_selector(driver: WebDriver, element_type: str = 'INPUT FIELD') -> None:
+    """
+    Inject JavaScript for interactive element selection.
+    
+    Injects a JavaScript overlay into the page that allows the user
+    to visually select elements by clicking on them.
+    
+    Args:
+        driver: WebDriver instance with an active page.
+        element_type: Description of the element type being selected.
+    """
+    js = ELEMENT_SELECTOR_JS.replace('%ELEMENT_TYPE%', element_type)
+    driver.execute_script(js)
+
+
+def get_selected_element(driver: WebDriver) -> Optional[dict[str, str]]:
+    """
+    Get the selected element info from browser.
+    
+    Retrieves information about the element selected by the user
+    via the injected JavaScript selector.
+    
+    Args:
+        driver: WebDriver instance.
+    
+    Returns:
+        Dictionary with 'xpath', 'tag', 'id', and 'className' keys,
+        or None if no element has been selected.
+    """
+    try:
+        result = driver.execute_script("return window.__selectedElementInfo;")
+        return result
+    except WebDriverException:
+        return None
+
+
+# =============================================================================
+# Session Snapshots
+# =============================================================================
+
+# Reads localStorage and sessionStorage of the current page
+READ_STORAGE_SCRIPT: str = """
+function dump(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+}
+return {origin: location.origin, url: location.href,
+        local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+# Writes arguments[0] into localStorage and arguments[1] into sessionStorage
+WRITE_STORAGE_SCRIPT: str = """
+var local = arguments[0], session = arguments[1];
+Object.keys(local).forEach(function (key) { localStorage.setItem(key, local[key]); });
+Object.keys(session).forEach(function (key) { sessionStorage.setItem(key, session[key]); });
+"""
+
+
+def origin_of(url: str) -> str:
+    """Scheme and host of a URL, e.g. 'https://example.com'."""
+    parts = urlparse(url)
+    return f'{parts.scheme}://{parts.netloc}'.lower()
+
+
+def looks_like_login(url: str, target_url: str) -> bool:
+    """
+    Check whether a page is a login page the target redirected to.
+    
+    Args:
+        url: Address the browser ended up on.
+        target_url: Address the run asked for.
+    
+    Returns:
+        True if `url` looks like a sign-in page and the target does not.
+    """
+    return bool(LOGIN_URL_PATTERN.search(url)) and not LOGIN_URL_PATTERN.search(target_url)
+
+
+class SessionStore:
+    """
+    Encrypted snapshots of authenticated browser sessions, one per origin.
+    
+    A snapshot holds the cookies, localStorage and sessionStorage of a
+    logged-in page. Snapshots are encrypted with Fernet (requires the
+    optional cryptography package); the key comes from the
+    AUTOMATION_SESSION_KEY environment variable or a key file created on
+    first use and readable only by its owner.
+    """
+    
+    def __init__(self, folder: Path, key_file: Path) -> None:
+        self.folder = folder
+        self.key_file = key_file
+        self._lock = threading.Lock()
+    
+    def _cipher(self) -> Any:
+        """
+        Fernet cipher for the snapshot key.
+        
+        Raises:
+            SessionSnapshotError: If cryptography is not installed.
+        """
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError as e:
+            raise SessionSnapshotError('Session snapshots require the cryptography package') from e
+        
+        key = os.environ.get(SESSION_KEY_ENV)
+        if not key:
+            with self._lock:
+                if not self.key_file.exists():
+                    descriptor = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(descriptor, 'wb') as f:
+                        f.write(Fernet.generate_key())
+                key = self.key_file.read_text(encoding='ascii').strip()
+        return Fernet(key.encode('ascii') if isinstance(key, str) else key)
+    
+    def path(self, origin: str) -> Path:
+        """Snapshot file of an origin."""
+        return self.folder / f'{hashlib.sha256(origin.encode("utf-8")).hexdigest()[:16]}.session'
+    
+    def save(self, snapshot: dict[str, Any]) -> None:
+        """
+        Encrypt and store a snapshot, replacing the origin's previous one.
+        
+        Raises:
+            SessionSnapshotError: If cryptography is not installed.
+        """
+        token = self._cipher().encrypt(json.dumps(snapshot).encode('utf-8'))
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.path(snapshot['origin'])
+        temp_path = path.with_suffix('.part')
+        temp_path.write_bytes(token)
+        os.replace(temp_path, path)
+    
+    def load(self, origin: str) -> Optional[dict[str, Any]]:
+        """
+        Decrypt the snapshot of an origin.
+        
+        A snapshot that cannot be decrypted (e.g. the key changed) is
+        discarded.
+        
+        Returns:
+            The snapshot, or None if there is none.
+        
+        Raises:
+            SessionSnapshotError: If cryptography is not installed.
+        """
+        path = self.path(origin)
+        if not path.is_file():
+            return None
+        cipher = self._cipher()
+        from cryptography.fernet import InvalidToken
+        try:
+            return json.loads(cipher.decrypt(path.read_bytes()))
+        except (InvalidToken, ValueError):
+            self.discard(origin)
+            return None
+    
+    def discard(self, origin: str) -> bool:
+        """
+        Delete the snapshot of an origin.
+        
+        Returns:
+            True if a snapshot was deleted.
+        """
+        try:
+            self.path(origin).unlink()
+            return True
+        except OSError:
+            return False
+    
+    def info(self, origin: str) -> dict[str, Any]:
+        """Snapshot metadata of an origin (never the cookie values)."""
+        path = self.path(origin)
+        if not path.is_file():
+            return {'origin': origin, 'exists': False}
+        return {
+            'origin': origin,
+            'exists': True,
+            'saved_at': datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds')
+        }
+
+
+session_store = SessionStore(Path(SESSION_FOLDER), Path(SESSION_KEY_FILE))
+
+
+def capture_session(driver: WebDriver) -> dict[str, Any]:
+    """
+    Read cookies and web storage from the page the driver is on.
+    
+    Returns:
+        Snapshot dict for SessionStore.save().
+    """
+    storage = driver.execute_script(READ_STORAGE_SCRIPT) or {}
+    return {
+        'origin': str(storage.get('origin') or origin_of(driver.current_url)).lower(),
+        'url': storage.get('url') or driver.current_url,
+        'captured_at': datetime.now().isoformat(timespec='seconds'),
+        'cookies': driver.get_cookies(),
+        'local_storage': storage.get('local') or {},
+        'session_storage': storage.get('session') or {}
+    }
+
+
+def restore_session(driver: WebDriver, snapshot: dict[str, Any]) -> int:
+    """
+    Load a snapshot into a driver that is on the snapshot's origin.
+    
+    Chromium drivers get every cookie through DevTools, including those
+    of other domains (e.g. a single sign-on host). Other browsers can
+    only set cookies for the current host.
+    
+    Returns:
+        Number of cookies set.
+    """
+    cookies = snapshot.get('cookies') or []
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': [
+            {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'domain': cookie.get('domain'),
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+                **({'sameSite': cookie['sameSite']} if cookie.get('sameSite') else {}),
+                **({'expires': cookie['expiry']} if cookie.get('expiry') else {})
+            }
+            for cookie in cookies
+        ]})
+        restored = len(cookies)
+    except (AttributeError, WebDriverException):
+        host = urlparse(driver.current_url).hostname or ''
+        restored = 0
+        for cookie in cookies:
+            domain = str(cookie.get('domain') or host).lstrip('.')
+            if host != domain and not host.endswith('.' + domain):
+                continue
+            try:
+                driver.add_cookie(cookie)
+                restored += 1
+            except WebDriverException:
+                continue
+    
+    driver.execute_script(
+        WRITE_STORAGE_SCRIPT,
+        snapshot.get('local_storage') or {},
+        snapshot.get('session_storage') or {}
+    )
+    return restored
+
+
+def apply_session_snapshot(driver: WebDriver, config: AutomationConfig) -> None:
+    """
+    Log a freshly launched driver in with the saved session, if any.
+    
+    The driver must already be on config.url. After restoring, the page
+    is reloaded; if the target sends the browser to a login page the
+    snapshot has expired and is discarded.
+    """
+    origin = origin_of(config.url)
+    try:
+        snapshot = session_store.load(origin)
+    except SessionSnapshotError as e:
+        log_message(f'⚠️ {e}', 'warning')
+        return
+    if snapshot is None:
+        return
+    
+    try:
+        restored = restore_session(driver, snapshot)
+        driver.get(config.url)
+        time.sleep(PAGE_SETTLE_SECONDS)
+        landed_on = driver.current_url
+    except WebDriverException as e:
+        log_message(f'⚠️ Could not restore the saved session: {e}', 'warning')
+        return
+    
+    if looks_like_login(landed_on, config.url):
+        session_store.discard(origin)
+        log_message('🔒 Saved session has expired (redirected to a login page); snapshot discarded', 'warning')
+    else:
+        log_message(f'🔑 Restored saved session ({restored} cookies)', 'info')
+
+
+def save_session_snapshot(driver: WebDriver, config: AutomationConfig) -> bool:
+    """
+    Snapshot the driver's session unless it is sitting on a login page.
+    
+    Returns:
+        True if a snapshot was saved.
+    """
+    try:
+        if looks_like_login(driver.current_url, config.url):
+            return False
+        snapshot = capture_session(driver)
+        session_store.save(snapshot)
+    except (SessionSnapshotError, WebDriverException, OSError) as e:
+        log_message(f'⚠️ Could not save the session: {e}', 'warning')
+        return False
+    log_message(f"🔑 Session saved for {snapshot['origin']} ({len(snapshot['cookies'])} cookies)", 'info')
+    return True
+
+
+def check_session_redirect(driver: Optional[WebDriver], config: AutomationConfig) -> bool:
+    """
+    Discard the saved session if the target has redirected to a login page.
+    
+    Returns:
+        True if the browser is on a login page.
+    """
+    try:
+        on_login = driver is not None and looks_like_login(driver.current_url, config.url)
+    except WebDriverException:
+        return False
+    if on_login and session_store.discard(origin_of(config.url)):
+        log_message('🔒 Target redirected to a login page; saved session discarded', 'warning')
+    return on_login
+
+
+# =============================================================================
+# Submission Index
+# =============================================================================
+
+class SubmissionIndex:
+    """
+    Persistent index of values that were submitted successfully.
+    
+    Entries are keyed by a scope (target URL plus selector profile) and a
+    64-bit hash of the value, stored in SQLite. Lookups for a whole column
+    are done in one vectorized pass: the scope's hashes are loaded once and
+    matched with numpy. New entries are inserted in batched transactions.
+    """
+    
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS submissions ('
+                'scope TEXT NOT NULL, value_hash INTEGER NOT NULL, submitted_at REAL NOT NULL, '
+                'PRIMARY KEY (scope, value_hash)) WITHOUT ROWID'
+            )
+        return self._conn
+    
+    @staticmethod
+    def scope(url: str, input_xpath: Optional[str], submit_xpath: Optional[str]) -> str:
+        """Build the scope key for a target URL and selector profile."""
+        profile = f"{url}\n{input_xpath or ''}\n{submit_xpath or ''}"
+        return hashlib.sha256(profile.encode('utf-8')).hexdigest()[:32]
+    
+    @staticmethod
+    def hash_values(values: pd.Series) -> pd.Series:
+        """Vectorized 64-bit hashes of values in their submitted string form."""
+        hashes = pd.util.hash_pandas_object(values.astype(str), index=False)
+        return pd.Series(hashes.to_numpy().view(np.int64), index=values.index)
+    
+    def known(self, scope: str, hashes: pd.Series) -> pd.Series:
+        """Return a boolean Series marking hashes already submitted in scope."""
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT value_hash FROM submissions WHERE scope = ?', (scope,)
+            ).fetchall()
+        submitted = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        return pd.Series(np.isin(hashes.to_numpy(), submitted), index=hashes.index)
+    
+    def record(self, scope: str, hashes: list[int]) -> None:
+        """Insert successful submissions in a single transaction."""
+        if not hashes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO submissions (scope, value_hash, submitted_at) VALUES (?, ?, ?)',
+                    [(scope, int(value_hash), now) for value_hash in hashes]
+                )
+
+
+submission_index = SubmissionIndex(Path(app.config['SUBMISSION_INDEX_FILE']))
+
+
+def select_rows_to_submit(
+    data_subset: pd.DataFrame,
+    column_name: str,
+    scope: str,
+    seen: Optional[set[int]] = None
+) -> tuple[pd.DataFrame, pd.Series, dict[int, str]]:
+    """
+    Drop rows whose value was already submitted or repeats within the file.
+    
+    Args:
+        data_subset: Rows selected for the run.
+        column_name: Column holding the submitted values.
+        scope: Submission index scope for the current target.
+        seen: Hashes of values selected from earlier sheets of the run,
+            which are not in the submission index yet. The hashes kept
+            here are added to it.
+    
+    Returns:
+        Tuple of (rows to process, value hashes of those rows,
+        skip reason keyed by DataFrame index for skipped rows).
+    """
+    hashes = SubmissionIndex.hash_values(data_subset[column_name])
+    already = submission_index.known(scope, hashes)
+    duplicate = hashes.duplicated(keep='first') & ~already
+    if seen:
+        duplicate |= hashes.isin(seen) & ~already
+    
+    skipped: dict[int, str] = {}
+    skipped.update(dict.fromkeys(hashes.index[already], 'Already submitted in a previous run'))
+    skipped.update(dict.fromkeys(hashes.index[duplicate], 'Duplicate value in this file'))
+    
+    keep = ~(already | duplicate)
+    if seen is not None:
+        seen.update(hashes[keep].tolist())
+    return data_subset[keep], hashes[keep], skipped
+
+
+# =============================================================================
+# Run History
+# =============================================================================
+
+_HISTORY_SCHEMA: tuple[str, ...] = (
+    'CREATE TABLE IF NOT EXISTS runs ('
+    'run_id TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL, status TEXT NOT NULL, '
+    'file_name TEXT, dataset_hash TEXT, sheets TEXT, column_name TEXT, url TEXT, '
+    'input_xpath TEXT, submit_xpath TEXT, config TEXT, dry_run INTEGER NOT NULL DEFAULT 0, '
+    'success INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, '
+    'skipped INTEGER NOT NULL DEFAULT 0, rejected INTEGER NOT NULL DEFAULT 0, '
+    'total INTEGER NOT NULL DEFAULT 0, processed INTEGER NOT NULL DEFAULT 0, '
+    'busy_seconds REAL, rows_per_minute REAL, mean_latency REAL, p95_latency REAL, error TEXT)',
+    'CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at)',
+    'CREATE TABLE IF NOT EXISTS rows ('
+    'run_id TEXT NOT NULL, sheet TEXT NOT NULL, row_index INTEGER NOT NULL, status TEXT NOT NULL, '
+    'error TEXT, attempts INTEGER NOT NULL DEFAULT 0, latency REAL NOT NULL DEFAULT 0, '
+    'phases TEXT, finished_at REAL NOT NULL, source TEXT, '
+    'PRIMARY KEY (run_id, sheet, row_index)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS rows_latency ON rows (run_id, latency)'
+)
+
+# Run columns returned by the list and detail queries (everything but the config)
+_HISTORY_RUN_COLUMNS: str = (
+    'run_id, started_at, finished_at, status, file_name, dataset_hash, sheets, column_name, url, '
+    'input_xpath, submit_xpath, dry_run, success, failed, skipped, rejected, total, processed, '
+    'ROUND(busy_seconds, 1) AS busy_seconds, ROUND(rows_per_minute, 2) AS rows_per_minute, '
+    'ROUND(mean_latency * 1000, 1) AS mean_latency_ms, ROUND(p95_latency * 1000, 1) AS p95_latency_ms, error'
+)
+
+_PROCESSED_STATUSES: tuple[str, str] = (ROW_STATUS_SUCCESS, ROW_STATUS_FAILED)
+
+
+def dataset_hash(path: Optional[str]) -> Optional[str]:
+    """
+    SHA-256 of a data file, identifying the dataset of a run.
+    
+    Uploads are already stored under the hash of their contents, so it
+    is only computed for other files (e.g. those given to the CLI).
+    """
+    if not path:
+        return None
+    file = Path(path)
+    if re.fullmatch(r'[0-9a-f]{64}', file.stem):
+        return file.stem
+    digest = hashlib.sha256()
+    try:
+        with file.open('rb') as f:
+            while chunk := f.read(UPLOAD_HASH_CHUNK_BYTES):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class RunHistory:
+    """
+    Persistent record of every run and the outcome of each of its rows.
+    
+    Runs and rows are stored in SQLite. The run loop only appends rows
+    to an in-memory batch; full (or HISTORY_HANDOVER_SECONDS old)
+    batches and run start/finish records are handed to a writer thread
+    through a bounded queue, so the database never stalls row processing.
+    The writer commits the row batches of a wake-up together and each run
+    start/finish record in a transaction of its own, so a failed row
+    batch cannot lose them. If the queue is full, a row batch stays
+    pending and goes with the next hand-over; rows are only dropped (and
+    counted) beyond HISTORY_MAX_PENDING_ROWS. Throughput and latency
+    aggregates of a run are computed in SQL when it finishes, so none of
+    the queries load raw rows into memory.
+    """
+    
+    def __init__(self, path: Path, batch_rows: int, queue_size: int) -> None:
+        self.path = path
+        self.batch_rows = batch_rows
+        self.dropped = 0
+        self.written = 0
+        self.last_error: Optional[str] = None
+        self._error_reported = True
+        self._queue: queue.Queue[tuple[str, Any] | threading.Event] = queue.Queue(maxsize=queue_size)
+        self._pending: list[tuple[Any, ...]] = []
+        self._pending_since = 0.0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                for statement in _HISTORY_SCHEMA:
+                    conn.execute(statement)
+            self._conn = conn
+        return self._conn
+    
+    def _ensure_writer(self) -> None:
+        """Start the writer thread if it is not running. Caller holds self._lock."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name='history-writer')
+            self._thread.start()
+    
+    @staticmethod
+    def _row(run_id: str, sheet: Optional[str], outcome: RowOutcome, source: Optional[str] = None) -> tuple[Any, ...]:
+        """Row record in the column order of the rows table."""
+        return (
+            run_id, sheet or '', int(outcome.index), outcome.status, outcome.error,
+            outcome.attempts, outcome.latency, outcome.phases, outcome.finished_at, source
+        )
+    
+    def _hand_over(self) -> None:
+        """
+        Queue the pending rows as one batch. Caller holds self._lock.
+        
+        If the queue is full the rows stay pending for the next hand-over.
+        """
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(('rows', self._pending))
+        except queue.Full:
+            excess = len(self._pending) - HISTORY_MAX_PENDING_ROWS
+            if excess > 0:
+                del self._pending[:excess]
+                self.dropped += excess
+            return
+        self._pending = []
+    
+    def _take_pending(self) -> list[tuple[Any, ...]]:
+        """Take the pending rows for a blocking hand-over outside the row loop."""
+        with self._lock:
+            self._ensure_writer()
+            batch, self._pending = self._pending, []
+            return batch
+    
+    def start_run(self, state: AutomationState, column_name: str, sheets: list[Optional[str]], dry_run: bool) -> None:
+        """Record the start of a run with its configuration and dataset."""
+        if state.run_id is None:
+            return
+        with self._lock:
+            self._ensure_writer()
+        self._queue.put(('start', {
+            'run_id': state.run_id,
+            'started_at': state.stats.start_time or time.time(),
+            'status': 'running',
+            'file_name': state.file_info.name if state.file_info else Path(state.file_path or '').name or None,
+            'dataset_hash': dataset_hash(state.file_path),
+            'sheets': json.dumps([sheet or '' for sheet in sheets]),
+            'column_name': column_name,
+            'url': state.config.url,
+            'input_xpath': state.element_xpath,
+            'submit_xpath': state.submit_xpath,
+            'config': json.dumps(state.config.to_dict()),
+            'dry_run': int(dry_run)
+        }))
+    
+    def record_row(self, run_id: Optional[str], sheet: Optional[str], outcome: RowOutcome, source: Optional[str] = None) -> None:
+        """Add a row outcome to the pending batch; cheap enough for the run loop."""
+        if run_id is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self._pending:
+                self._pending_since = now
+            self._pending.append(self._row(run_id, sheet, outcome, source))
+            if len(self._pending) >= self.batch_rows or now - self._pending_since >= HISTORY_HANDOVER_SECONDS:
+                self._hand_over()
+    
+    def record_outcomes(self, run_id: Optional[str], sheet: Optional[str], outcomes: Iterable[RowOutcome]) -> None:
+        """
+        Record outcomes decided in bulk (skipped and rejected rows).
+        
+        Called outside the row loop, so it waits for queue space instead
+        of dropping rows.
+        """
+        if run_id is None:
+            return
+        rows = [self._row(run_id, sheet, outcome) for outcome in outcomes]
+        with self._lock:
+            self._ensure_writer()
+        for start in range(0, len(rows), HISTORY_BULK_ROWS):
+            self._queue.put(('rows', rows[start:start + HISTORY_BULK_ROWS]))
+    
+    def finish_run(self, state: AutomationState, status: str) -> None:
+        """
+        Record the end of a run and compute its aggregates.
+        
+        Args:
+            state: Run state, read for stats, selectors and the error.
+            status: 'completed', 'stopped' or 'error'.
+        """
+        if state.run_id is None:
+            return
+        batch = self._take_pending()
+        if batch:
+            self._queue.put(('rows', batch))
+        self._queue.put(('finish', {
+            'run_id': state.run_id,
+            'finished_at': time.time(),
+            'status': status,
+            'input_xpath': state.element_xpath,
+            'submit_xpath': state.submit_xpath,
+            'success': state.stats.success,
+            'failed': state.stats.failed,
+            'skipped': state.stats.skipped,
+            'rejected': state.stats.rejected,
+            'total': state.stats.total,
+            'error': state.error
+        }))
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything recorded so far is in the database.
+        
+        Returns:
+            True if the writer confirmed the flush within `timeout` seconds.
+        """
+        with self._lock:
+            if not self._pending and (self._thread is None or not self._thread.is_alive()):
+                return True
+        batch = self._take_pending()
+        done = threading.Event()
+        try:
+            if batch:
+                self._queue.put(('rows', batch), timeout=timeout)
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def take_error(self) -> Optional[str]:
+        """
+        The last write error, if it has not been reported yet.
+        
+        The writer cannot log through log_message(), which may be on the
+        run thread's hot path, so the run reports it once it has finished.
+        """
+        with self._lock:
+            if self._error_reported:
+                return None
+            self._error_reported = True
+            return self.last_error
+    
+    def _run(self) -> None:
+        """Writer loop."""
+        while True:
+            item: Optional[tuple[str, Any] | threading.Event] = self._queue.get()
+            operations: list[tuple[str, Any]] = []
+            flush_requests: list[threading.Event] = []
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    flush_requests.append(item)
+                else:
+                    operations.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            
+            # Consecutive row batches share a transaction; run records get their own
+            start = 0
+            while start < len(operations):
+                end = start + 1
+                if operations[start][0] == 'rows':
+                    while end < len(operations) and operations[end][0] == 'rows':
+                        end += 1
+                self._write(operations[start:end])
+                start = end
+            for request in flush_requests:
+                request.set()
+    
+    def _write(self, operations: list[tuple[str, Any]]) -> None:
+        """Apply operations in one transaction, recording a failure for take_error()."""
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    for kind, payload in operations:
+                        self._apply(conn, kind, payload)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.last_error = str(e)
+                self._error_reported = False
+    
+    def _apply(self, conn: sqlite3.Connection, kind: str, payload: Any) -> None:
+        """Apply one queued operation inside the writer's transaction."""
+        if kind == 'start':
+            columns = ', '.join(payload)
+            conn.execute(
+                f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({', '.join('?' * len(payload))})",
+                tuple(payload.values())
+            )
+        elif kind == 'rows':
+            conn.executemany(
+                'INSERT OR REPLACE INTO rows (run_id, sheet, row_index, status, error, attempts, '
+                'latency, phases, finished_at, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (*row[:7], json.dumps({name: round(seconds, 6) for name, seconds in row[7].items()}) if row[7] else None, *row[8:])
+                    for row in payload
+                ]
+            )
+            self.written += len(payload)
+        elif kind == 'finish':
+            conn.execute(
+                'UPDATE runs SET finished_at = :finished_at, status = :status, input_xpath = :input_xpath, '
+                'submit_xpath = :submit_xpath, success = :success, failed = :failed, skipped = :skipped, '
+                'rejected = :rejected, total = :total, error = :error WHERE run_id = :run_id',
+                payload
+            )
+            self._aggregate(conn, payload['run_id'])
+    
+    @staticmethod
+    def _aggregate(conn: sqlite3.Connection, run_id: str) -> None:
+        """Store throughput and latency aggregates of a finished run."""
+        processed, mean_latency, first_started, last_finished = conn.execute(
+            'SELECT COUNT(*), AVG(latency), MIN(finished_at - latency), MAX(finished_at) '
+            'FROM rows WHERE run_id = ? AND status IN (?, ?)',
+            (run_id, *_PROCESSED_STATUSES)
+        ).fetchone()
+        p95_latency = None
+        if processed:
+            # Nearest-rank percentile, read off the (run_id, latency) index
+            p95_latency = conn.execute(
+                'SELECT latency FROM rows WHERE run_id = ? AND status IN (?, ?) '
+                'ORDER BY latency DESC LIMIT 1 OFFSET ?',
+                (run_id, *_PROCESSED_STATUSES, int(processed * 0.05))
+            ).fetchone()[0]
+        busy = last_finished - first_started if processed else None
+        conn.execute(
+            'UPDATE runs SET processed = ?, busy_seconds = ?, rows_per_minute = ?, mean_latency = ?, '
+            'p95_latency = ? WHERE run_id = ?',
+            (processed, busy, processed / busy * 60 if busy else None, mean_latency, p95_latency, run_id)
+        )
+    
+    def _query(self, sql: str, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        """Run a read query and return its rows as dictionaries."""
+        with self._db_lock:
+            return [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+    
+    @staticmethod
+    def _run_dict(row: dict[str, Any]) -> dict[str, Any]:
+        """Decode the JSON columns of a run row."""
+        row['sheets'] = json.loads(row['sheets'] or '[]')
+        row['dry_run'] = bool(row['dry_run'])
+        if 'config' in row:
+            row['config'] = json.loads(row['config'] or '{}')
+        return row
+    
+    def list_runs(self, limit: int, before: Optional[float] = None, url: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        List runs, newest first.
+        
+        Args:
+            limit: Maximum number of runs.
+            before: Only runs started before this timestamp (for paging).
+            url: Only runs against this target URL.
+        """
+        return [self._run_dict(row) for row in self._query(
+            f'SELECT {_HISTORY_RUN_COLUMNS} FROM runs '
+            'WHERE started_at < ? AND (? IS NULL OR url = ?) ORDER BY started_at DESC LIMIT ?',
+            (before if before is not None else float('inf'), url, url, limit)
+        )]
+    
+    def get_run(self, run_id: str) -> Optional[dict[str, Any]]:
+        """
+        Get a run with its config, row counts by status and phase breakdown.
+        
+        Returns:
+            The run, or None if it is not in the history.
+        """
+        runs = self._query(f'SELECT {_HISTORY_RUN_COLUMNS}, config FROM runs WHERE run_id = ?', (run_id,))
+        if not runs:
+            return None
+        run = self._run_dict(runs[0])
+        run['statuses'] = {
+            row['status']: row['rows']
+            for row in self._query('SELECT status, COUNT(*) AS rows FROM rows WHERE run_id = ? GROUP BY status', (run_id,))
+        }
+        run['phases'] = self._query(
+            'SELECT phase.key AS phase, COUNT(*) AS rows, ROUND(AVG(phase.value) * 1000, 1) AS mean_ms, '
+            'ROUND(MAX(phase.value) * 1000, 1) AS max_ms, ROUND(SUM(phase.value), 1) AS total_seconds '
+            'FROM rows, json_each(rows.phases) AS phase '
+            'WHERE rows.run_id = ? AND rows.phases IS NOT NULL GROUP BY phase.key ORDER BY SUM(phase.value) DESC',
+            (run_id,)
+        )
+        return run
+    
+    def slowest_rows(self, run_id: str, limit: int) -> list[dict[str, Any]]:
+        """The slowest processed rows of a run, slowest first."""
+        rows = self._query(
+            'SELECT sheet, row_index, status, error, attempts, ROUND(latency * 1000, 1) AS latency_ms, '
+            'phases, finished_at, source FROM rows WHERE run_id = ? AND status IN (?, ?) '
+            'ORDER BY latency DESC LIMIT ?',
+            (run_id, *_PROCESSED_STATUSES, limit)
+        )
+        for row in rows:
+            row['phases_ms'] = {
+                name: round(seconds * 1000, 1) for name, seconds in json.loads(row.pop('phases') or '{}').items()
+            }
+        return rows
+    
+    def recent_phases(self, limit: int, url: Optional[str] = None) -> list[dict[str, float]]:
+        """
+        Phase timings of the most recently processed rows, newest run first.
+        
+        Args:
+            limit: Maximum number of rows.
+            url: Only runs against this target URL.
+        """
+        return [json.loads(row['phases']) for row in self._query(
+            'SELECT rows.phases FROM runs JOIN rows ON rows.run_id = runs.run_id '
+            'WHERE (? IS NULL OR runs.url = ?) AND rows.status IN (?, ?) AND rows.phases IS NOT NULL '
+            'ORDER BY runs.started_at DESC, rows.finished_at DESC LIMIT ?',
+            (url, url, *_PROCESSED_STATUSES, limit)
+        )]
+    
+    def trend(self, days: int, url: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        Daily throughput of finished runs (dry runs excluded), oldest first.
+        
+        Args:
+            days: How many days back to include.
+            url: Only runs against this target URL.
+        """
+        return self._query(
+            "SELECT DATE(started_at, 'unixepoch', 'localtime') AS day, COUNT(*) AS runs, "
+            'SUM(processed) AS processed, SUM(success) AS success, SUM(failed) AS failed, '
+            'ROUND(SUM(busy_seconds), 1) AS busy_seconds, '
+            'ROUND(SUM(processed) * 60.0 / SUM(busy_seconds), 2) AS rows_per_minute, '
+            'ROUND(SUM(mean_latency * processed) * 1000 / SUM(processed), 1) AS mean_latency_ms, '
+            'ROUND(MAX(p95_latency) * 1000, 1) AS max_p95_latency_ms '
+            'FROM runs WHERE finished_at IS NOT NULL AND dry_run = 0 AND processed > 0 '
+            'AND started_at >= ? AND (? IS NULL OR url = ?) GROUP BY day ORDER BY day',
+            (time.time() - days * 86400, url, url)
+        )
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert writer state to dictionary."""
+        return {
+            'path': str(self.path),
+            'rows_written': self.written,
+            'rows_dropped': self.dropped,
+            'queued_batches': self._queue.qsize(),
+            'last_error': self.last_error
+        }
+
+
+run_history = RunHistory(Path(app.config['RUN_HISTORY_FILE']), HISTORY_BATCH_ROWS, HISTORY_QUEUE_SIZE)
+
+# Write out the last batch when the process exits (e.g. after a CLI run)
+atexit.register(run_history.flush, 2.0)
+
+
+# =============================================================================
+# Row Validation
+# =============================================================================
+
+@dataclass
+class ValidationReport:
+    """Summary of the pre-run validation pass."""
+    
+    checked: int = 0
+    rejected: int = 0
+    reasons: Counter[str] = field(default_factory=Counter)
+    samples: list[dict[str, Any]] = field(default_factory=list)
+    missing_columns: list[str] = field(default_factory=list)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'checked': self.checked,
+            'rejected': self.rejected,
+            'accepted': self.checked - self.rejected,
+            'reasons': dict(self.reasons.most_common()),
+            'samples': self.samples,
+            'missing_columns': self.missing_columns
+        }
+
+
+def rule_violations(data: pd.DataFrame, rule: ValidationRule) -> Iterator[tuple[pd.Series, str]]:
+    """
+    Yield a boolean mask and a reason for each check of a rule.
+    
+    Values are checked as the text that would be typed into the page
+    (str() of the cell), so a rule sees what the browser would get.
+    """
+    values = data[rule.column]
+    # Python-backed strings keep 're' semantics for user patterns
+    text = values.astype(pd.StringDtype('python'))
+    filled = (values.notna() & text.str.strip().ne('')).fillna(False).astype(bool)
+    
+    def failing(mask: pd.Series) -> pd.Series:
+        return filled & ~mask.fillna(False).astype(bool)
+    
+    if rule.required:
+        yield ~filled, f'{rule.column} is empty'
+    if rule.pattern:
+        yield failing(text.str.fullmatch(rule.pattern)), f'{rule.column} does not match {rule.pattern}'
+    if rule.min_length is not None or rule.max_length is not None:
+        lengths = text.str.len()
+        if rule.min_length is not None:
+            yield failing(lengths.ge(rule.min_length)), f'{rule.column} is shorter than {rule.min_length} characters'
+        if rule.max_length is not None:
+            yield failing(lengths.le(rule.max_length)), f'{rule.column} is longer than {rule.max_length} characters'
+    if rule.min_value is not None or rule.max_value is not None:
+        numbers = pd.to_numeric(values, errors='coerce')
+        yield failing(numbers.notna()), f'{rule.column} is not a number'
+        if rule.min_value is not None:
+            yield failing(numbers.ge(rule.min_value) | numbers.isna()), f'{rule.column} is below {rule.min_value:g}'
+        if rule.max_value is not None:
+            yield failing(numbers.le(rule.max_value) | numbers.isna()), f'{rule.column} is above {rule.max_value:g}'
+    if rule.allowed:
+        yield failing(text.isin(rule.allowed)), f'{rule.column} is not one of the allowed values'
+
+
+def validate_rows(data: pd.DataFrame, rules: list[ValidationRule]) -> pd.Series:
+    """
+    Check rows against validation rules, one vectorized pass per check.
+    
+    Rules for columns the data does not have are ignored.
+    
+    Args:
+        data: Rows selected for the run (all columns).
+        rules: Validation rules of the run configuration.
+    
+    Returns:
+        Rejection reason keyed by DataFrame index, for rejected rows only.
+        A row failing several checks reports the first one.
+    """
+    reasons = pd.Series(None, index=data.index, dtype=object)
+    for rule in rules:
+        if rule.column not in data.columns:
+            continue
+        for violation, reason in rule_violations(data, rule):
+            reasons = reasons.mask(violation & reasons.isna(), reason)
+    return reasons.dropna()
+
+
+def prevalidate_run(
+    state: AutomationState,
+    column_name: str,
+    sheets: Optional[list[str]] = None
+) -> tuple[Optional[dict[str, pd.Series]], Optional[ValidationReport]]:
+    """
+    Validate the rows a run would process, before it starts.
+    
+    Args:
+        state: Automation state holding the data and configuration.
+        column_name: Column whose values are submitted.
+        sheets: Workbook sheets of the run; defaults to the current sheet.
+    
+    Returns:
+        Tuple of (rejection reasons keyed by sheet name, report), or
+        (None, None) if the configuration has no validation rules.
+    
+    Raises:
+        FileValidationError: If a sheet cannot be loaded.
+    """
+    rules = state.config.validation_rules
+    if not rules:
+        return None, None
+    
+    report = ValidationReport()
+    rejections: dict[str, pd.Series] = {}
+    present: set[str] = set()
+    for sheet_name in sheets or [state.sheet_name]:
+        if sheet_name is None or sheet_name == state.sheet_name or state.workbook is None:
+            data = current_dataset()[0]
+        else:
+            data = state.workbook.load(sheet_name)
+        if data is None or column_name not in data.columns:
+            continue
+        
+        start = state.config.start_row
+        end = state.config.end_row if state.config.end_row != -1 else len(data)
+        rows = data.iloc[start:end]
+        present.update(rule.column for rule in rules if rule.column in data.columns)
+        reasons = validate_rows(rows, rules)
+        rejections[sheet_name or ''] = reasons
+        
+        report.checked += len(rows)
+        report.rejected += len(reasons)
+        report.reasons.update(reasons.value_counts().to_dict())
+        for index, reason in reasons.head(VALIDATION_SAMPLE_ROWS - len(report.samples)).items():
+            value = rows.at[index, column_name]
+            report.samples.append({
+                'sheet': sheet_name,
+                'index': int(index),
+                'value': None if _is_missing(value) else _json_value(value),
+                'reason': reason
+            })
+    
+    report.missing_columns = sorted({rule.column for rule in rules} - present)
+    return rejections, report
+
+
+# =============================================================================
+# Rate Limiting
+# =============================================================================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    
+    Tokens refill continuously at `rate` per second up to `burst`. Every
+    row submission takes one token, so all rows sharing a bucket are held
+    to the same rate.
+    """
+    
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate, keeping tokens earned so far."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+    
+    def acquire(self, control: Optional[RunControl] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a token is available.
+        
+        Args:
+            control: Run control whose stop aborts the wait.
+            timeout: Seconds to wait at most (None waits until a token).
+        
+        Returns:
+            True if a token was taken, False if the wait was aborted or
+            timed out.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else 0.5
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                wait = min(wait, deadline - now)
+            if control is None:
+                time.sleep(min(wait, 0.5))
+            elif not control.sleep(min(wait, 0.5)):
+                return False
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease tuner for a token bucket.
+    
+    While rows succeed quickly the rate grows by AIMD_INCREASE_PER_SECOND
+    for every second since the last adjustment, however many rows that
+    second held. It is multiplied by AIMD_DECREASE_FACTOR on a failure or
+    a success slower than AIMD_SLOW_LATENCY_FACTOR times the recent
+    average. Decreases are limited to one per cooldown window so a burst
+    of errors from a single slowdown does not collapse the rate.
+    """
+    
+    def __init__(self, bucket: TokenBucket, max_rate: float) -> None:
+        self.bucket = bucket
+        self.max_rate = max_rate
+        self._avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._last_adjusted = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, success: bool, latency: float) -> None:
+        """Adjust the bucket rate after a row outcome."""
+        with self._lock:
+            slow = self._avg_latency is not None and latency > self._avg_latency * AIMD_SLOW_LATENCY_FACTOR
+            if success:
+                self._avg_latency = latency if self._avg_latency is None else 0.8 * self._avg_latency + 0.2 * latency
+            
+            rate = self.bucket.rate
+            now = time.monotonic()
+            if success and not slow:
+                # Capped so a pause between rows does not turn into a jump
+                elapsed = min(now - self._last_adjusted, AIMD_INCREASE_MAX_GAP_SECONDS)
+                rate = min(self.max_rate, rate + AIMD_INCREASE_PER_SECOND * elapsed)
+            else:
+                if now - self._last_decrease < AIMD_DECREASE_COOLDOWN_SECONDS:
+                    return
+                self._last_decrease = now
+                rate = max(AIMD_MIN_RATE, rate * AIMD_DECREASE_FACTOR)
+            self._last_adjusted = now
+            self.bucket.set_rate(rate)
+
+
+class RateLimiter:
+    """
+    Per-host rate limiter shared by every row of a run.
+    
+    Wraps a TokenBucket with an optional AIMDController and keeps a short
+    history of the effective rate for progress reporting. Local rows and
+    tabs take tokens directly; in distributed runs worker agents take
+    them from the coordinator's limiter through /api/workers/token, and
+    their reported outcomes feed the controller.
+    """
+    
+    def __init__(self, rate: float, burst: int, adaptive: bool) -> None:
+        self.settings = (rate, burst, adaptive)
+        self.bucket = TokenBucket(rate, burst)
+        self.controller = AIMDController(self.bucket, max_rate=rate * 4) if adaptive else None
+        self.history: deque[tuple[int, float]] = deque(maxlen=RATE_HISTORY_LENGTH)
+    
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+    
+    def acquire(self, control: Optional[RunControl] = None, timeout: Optional[float] = None) -> bool:
+        """Take one token; see TokenBucket.acquire()."""
+        return self.bucket.acquire(control, timeout)
+    
+    def record(self, success: bool, latency: float) -> None:
+        """Feed a row outcome to the controller and sample the rate."""
+        if self.controller:
+            self.controller.record(success, latency)
+        self.history.append((int(time.time()), round(self.bucket.rate, 3)))
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Current rate and recent history for progress events."""
+        return {
+            'rate': round(self.bucket.rate, 3),
+            'burst': self.bucket.burst,
+            'adaptive': self.controller is not None,
+            'history': list(self.history)
+        }
+
+
+_rate_limiters: dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: AutomationConfig) -> Optional[RateLimiter]:
+    """
+    Return the shared rate limiter for the config's target host.
+    
+    A limiter is created on first use per host and replaced when the
+    configured rate, burst or adaptive setting changes.
+    
+    Returns:
+        RateLimiter, or None when rate limiting is disabled.
+    """
+    if config.rate_limit <= 0:
+        return None
+    host = urlparse(config.url).netloc.lower()
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(host)
+        settings = (config.rate_limit, config.rate_burst, config.adaptive_rate)
+        if limiter is None or limiter.settings != settings:
+            limiter = RateLimiter(*settings)
+            _rate_limiters[host] = limiter
+        return limiter
+
+
+# =============================================================================
+# Capacity Planning
+# =============================================================================
+
+# Per-row phase timings of recent rows, used to replay past runs in a forecast
+row_timings: deque[dict[str, float]] = deque(maxlen=FORECAST_HISTORY_ROWS)
+
+
+@dataclass
+class DryRunPlan:
+    """Options of a dry-run forecast requested through /api/start."""
+    
+    source: str = 'sample'
+    sample_rows: int = FORECAST_DEFAULT_SAMPLE_ROWS
+    deadline_seconds: Optional[float] = None
+    
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'DryRunPlan':
+        """Create a plan from the 'dry_run' object of a start request."""
+        deadline = data.get('deadline_seconds')
+        return cls(
+            source=str(data.get('source', 'sample')),
+            sample_rows=int(data.get('sample_rows', FORECAST_DEFAULT_SAMPLE_ROWS)),
+            deadline_seconds=float(deadline) if deadline is not None else None
+        )
+    
+    def validate(self) -> list[str]:
+        """
+        Validate the plan.
+        
+        Returns:
+            List of validation error messages (empty if valid).
+        """
+        errors = []
+        if self.source not in ('sample', 'history'):
+            errors.append("Dry-run source must be 'sample' or 'history'")
+        if self.sample_rows < 1:
+            errors.append('Dry-run sample size must be at least 1 row')
+        if self.deadline_seconds is not None and self.deadline_seconds <= 0:
+            errors.append('Dry-run deadline must be positive')
+        return errors
+
+
+def planned_row_count(state: AutomationState, sheets: Optional[list[str]] = None) -> int:
+    """
+    Count the rows a run over the given sheets would process.
+    
+    Row counts of sheets that have not been parsed yet come from workbook
+    metadata where it has them. Sheets without a row count in their
+    metadata (.xls files, sheets with no dimension record) are parsed.
+    """
+    config = state.config
+    counts: list[int] = []
+    if sheets and state.workbook is not None:
+        workbook = state.workbook
+        rows_by_sheet = {sheet.name: sheet.rows for sheet in workbook.sheets}
+        for name in sheets:
+            rows = rows_by_sheet.get(name, 0)
+            counts.append(rows if rows is not None else len(workbook.load(name)))
+    elif state.file_info is not None:
+        counts = [state.file_info.rows]
+    
+    total = 0
+    for rows in counts:
+        end = config.end_row if config.end_row != -1 else rows
+        total += max(0, min(end, rows) - config.start_row)
+    return total
+
+
+def _completion_times(
+    costs: np.ndarray,
+    rows: int,
+    workers: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Simulate run completion times for rows split across parallel workers.
+    
+    Each worker processes its share of rows back to back and the run ends
+    when the slowest worker does. Small shares are bootstrapped from the
+    observed per-row costs so heavy tails survive; for larger shares the
+    sum of per-row costs is close to normal and is drawn from that instead.
+    
+    Returns:
+        Array of FORECAST_TRIALS simulated completion times in seconds.
+    """
+    share = -(-rows // workers)
+    if share <= FORECAST_BOOTSTRAP_MAX_ROWS:
+        draws = rng.choice(costs, size=(FORECAST_TRIALS, workers, share))
+        worker_times = draws.sum(axis=2)
+    else:
+        mean = share * costs.mean()
+        spread = np.sqrt(share) * costs.std()
+        worker_times = rng.normal(mean, spread, size=(FORECAST_TRIALS, workers))
+    return worker_times.max(axis=1)
+
+
+def forecast_run(
+    samples: list[dict[str, float]],
+    rows: int,
+    delay: float,
+    deadline: Optional[float] = None,
+    rate_limit: float = 0.0,
+    seed: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Project run duration from a distribution of per-row phase timings.
+    
+    Unlike the running-average ETA of the progress bar, the projection
+    keeps the shape of the latency distribution: p95 completion reflects
+    slow rows and retries, not only their mean. Rate-limiter waits are
+    left out of the samples because they depend on the limit, which is
+    applied separately as a floor on the duration.
+    
+    Args:
+        samples: Phase timings in seconds of processed rows.
+        rows: Number of rows the full run would process.
+        delay: Delay between rows in seconds.
+        deadline: Optional deadline in seconds to size the run for.
+        rate_limit: Per-host rate limit in rows/s (0 for none).
+        seed: Optional random seed for reproducible forecasts.
+    
+    Returns:
+        Dictionary with the phase breakdown, projected duration and p95
+        for one browser, and recommended worker count and delay when a
+        deadline is given.
+    
+    Raises:
+        ValueError: If there are no samples to forecast from.
+    """
+    timings = [
+        {name: seconds for name, seconds in phases.items() if name not in FORECAST_EXCLUDED_PHASES}
+        for phases in samples
+    ]
+    timings = [phases for phases in timings if phases]
+    if not timings:
+        raise ValueError('No row timings to forecast from')
+    
+    rng = np.random.default_rng(seed)
+    service = np.array([sum(phases.values()) for phases in timings])
+    costs = service + delay
+    rate_floor = rows / rate_limit if rate_limit > 0 else 0.0
+    
+    def percentiles(values: np.ndarray) -> dict[str, float]:
+        return {
+            'mean': round(float(values.mean()), 3),
+            'p50': round(float(np.percentile(values, 50)), 3),
+            'p95': round(float(np.percentile(values, 95)), 3)
+        }
+    
+    total_service = float(service.sum())
+    phase_stats = {}
+    for name in sorted({name for phases in timings for name in phases}):
+        values = np.array([phases.get(name, 0.0) for phases in timings])
+        share = float(values.sum()) / total_service if total_service else 0.0
+        phase_stats[name] = {**percentiles(values), 'share': round(share, 3)}
+    
+    def completion(workers: int, row_costs: np.ndarray) -> np.ndarray:
+        if rows == 0:
+            return np.zeros(FORECAST_TRIALS)
+        return np.maximum(_completion_times(row_costs, rows, workers, rng), rate_floor)
+    
+    single = completion(1, costs)
+    result: dict[str, Any] = {
+        'rows': rows,
+        'samples': len(timings),
+        'delay': delay,
+        'rate_limit': rate_limit,
+        'per_row_seconds': percentiles(service),
+        'phases': phase_stats,
+        'naive_seconds': round(float(costs.mean() * rows), 1),
+        'projected_seconds': round(float(np.percentile(single, 50)), 1),
+        'p95_seconds': round(float(np.percentile(single, 95)), 1),
+        'deadline_seconds': deadline,
+        'recommended_workers': None,
+        'recommended_delay': None,
+        'meets_deadline': None
+    }
+    
+    if deadline is not None:
+        workers = FORECAST_MAX_WORKERS
+        p95 = 0.0
+        for candidate in range(1, FORECAST_MAX_WORKERS + 1):
+            p95 = float(np.percentile(completion(candidate, costs), 95))
+            if p95 <= deadline:
+                workers = candidate
+                break
+        # Delay adds the same amount to every row of a worker's share
+        share = max(1, -(-rows // workers))
+        undelayed_p95 = float(np.percentile(completion(workers, service), 95))
+        result.update({
+            'recommended_workers': workers,
+            'recommended_delay': round(max(0.0, (deadline - undelayed_p95) / share), 3),
+            'meets_deadline': p95 <= deadline,
+            'recommended_p95_seconds': round(p95, 1)
+        })
+    
+    return result
+
+
+def publish_forecast(
+    state: AutomationState,
+    samples: list[dict[str, float]],
+    rows: int,
+    plan: DryRunPlan
+) -> dict[str, Any]:
+    """
+    Compute a forecast, store it on the state and broadcast it.
+    
+    Raises:
+        ValueError: If there are no samples to forecast from.
+    """
+    config = state.config
+    forecast = forecast_run(samples, rows, config.delay, plan.deadline_seconds, config.rate_limit)
+    forecast['source'] = plan.source
+    with state_lock:
+        state.forecast = forecast
+    
+    log_message(
+        f"📐 Forecast for {rows} rows: ~{forecast['projected_seconds']:.0f}s, "
+        f"p95 {forecast['p95_seconds']:.0f}s (from {forecast['samples']} rows)",
+        'info'
+    )
+    if plan.deadline_seconds is not None:
+        log_message(
+            f"📐 For a {plan.deadline_seconds:.0f}s deadline: {forecast['recommended_workers']} worker(s), "
+            f"delay ≤ {forecast['recommended_delay']}s",
+            'info' if forecast['meets_deadline'] else 'warning'
+        )
+    publish_event('forecast', forecast, current_run_id())
+    return forecast
+
+
+# =============================================================================
+# Profiling
+# =============================================================================
+
+ProfileKey = tuple[str, int, str]
+
+
+def _profile_label(key: ProfileKey) -> str:
+    """Format a (filename, line, function) key as a collapsed-stack frame."""
+    filename, line, name = key
+    if filename == '~':
+        return name  # Built-in function
+    return f'{name} ({Path(filename).name}:{line})'
+
+
+def collapse_pstats(stats: dict[ProfileKey, tuple]) -> Counter[str]:
+    """
+    Convert deterministic profile stats into collapsed stacks.
+    
+    cProfile only keeps caller/callee edges, so full stacks are rebuilt by
+    walking the call graph from its roots and splitting each function's
+    time among its callers in proportion to the time spent through each
+    edge.
+    
+    Returns:
+        Counter of 'frame;frame;...' stacks to self time in microseconds.
+    """
+    children: dict[ProfileKey, list[tuple[ProfileKey, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    
+    stacks: Counter[str] = Counter()
+    
+    def walk(func: ProfileKey, weight: float, path: list[ProfileKey]) -> None:
+        _, _, own_time, total_time, _ = stats[func]
+        if total_time <= 0 or weight * 1e6 < 1 or len(path) >= PROFILE_MAX_STACK_DEPTH:
+            return
+        path = path + [func]
+        scale = weight / total_time
+        stacks[';'.join(_profile_label(key) for key in path)] += round(own_time * scale * 1e6)
+        for child, edge_time in children.get(func, []):
+            if child in stats and child not in path:
+                walk(child, edge_time * scale, path)
+    
+    for func, (_, _, _, total_time, callers) in stats.items():
+        if not callers:
+            walk(func, total_time, [])
+    return +stacks
+
+
+class RunProfiler:
+    """
+    On-demand profiler for the run_automation thread.
+    
+    Sampling mode reads the run thread's stack from a background thread at
+    a fixed interval, so it starts and stops immediately and costs the run
+    next to nothing. Deterministic mode uses cProfile, which can only
+    profile the thread that enables it, so the run thread switches it on
+    and off itself at its next checkpoint (between rows).
+    
+    Each profile is saved as a pstats file, a collapsed-stack file for
+    flamegraph tools and a JSON metadata file tagged with the run ID and
+    config.
+    """
+    
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._meta: Optional[dict[str, Any]] = None
+        self._thread_id: Optional[int] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._pending: Optional[str] = None
+        self._samples: Counter[tuple[ProfileKey, ...]] = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self._saved = threading.Event()
+    
+    @property
+    def active(self) -> Optional[dict[str, Any]]:
+        """Metadata of the profile being recorded, if any."""
+        with self._lock:
+            return dict(self._meta) if self._meta else None
+    
+    def start(
+        self,
+        mode: str,
+        run_id: str,
+        thread_id: int,
+        config: AutomationConfig,
+        interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS
+    ) -> dict[str, Any]:
+        """
+        Start profiling the run thread.
+        
+        Raises:
+            ProfilingError: If a profile is already being recorded or the
+                mode is unknown or unsupported by the server backend.
+        """
+        if mode not in PROFILE_MODES:
+            raise ProfilingError(f"Profile mode must be one of: {', '.join(sorted(PROFILE_MODES))}")
+        if mode == 'sampling' and SERVER_BACKEND != 'threading':
+            # Green threads share one OS thread, so stack samples cannot tell them apart
+            raise ProfilingError('Sampling profiles need the threading server backend; use deterministic mode')
+        with self._lock:
+            if self._meta is not None:
+                raise ProfilingError('A profile is already being recorded')
+            self._meta = {
+                'id': f"{run_id}-{datetime.now().strftime('%H%M%S')}-{mode}",
+                'run_id': run_id,
+                'mode': mode,
+                'interval_ms': interval_ms if mode == 'sampling' else None,
+                'config': config.to_dict(),
+                'started_at': time.time(),
+                'stopped_at': None
+            }
+            self._thread_id = thread_id
+            self._saved.clear()
+            if mode == 'sampling':
+                self._samples = Counter()
+                self._sampler_stop.clear()
+                self._sampler = threading.Thread(target=self._sample_loop, args=(interval_ms / 1000,), daemon=True)
+                self._sampler.start()
+            else:
+                self._pending = 'enable'
+            return dict(self._meta)
+    
+    def stop(self, timeout: float = PROFILE_STOP_TIMEOUT_SECONDS) -> Optional[dict[str, Any]]:
+        """
+        Stop profiling and save the profile.
+        
+        A deterministic profile is saved by the run thread at its next
+        checkpoint; this waits up to timeout seconds for that.
+        
+        Returns:
+            Metadata of the saved profile, or None if it is not saved yet.
+        
+        Raises:
+            ProfilingError: If no profile is being recorded.
+        """
+        with self._lock:
+            if self._meta is None:
+                raise ProfilingError('No profile is being recorded')
+            meta = self._meta
+            sampler = self._sampler
+            if sampler is None:
+                self._pending = 'disable'
+        
+        if sampler is not None:
+            self._sampler_stop.set()
+            sampler.join()
+            self._save(self._sampled_stats(meta['interval_ms'] / 1000), self._collapse_samples())
+        elif not self._saved.wait(timeout):
+            return None
+        return meta
+    
+    def checkpoint(self) -> None:
+        """Apply pending deterministic start/stop requests; called by the run thread."""
+        if self._pending is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending == 'enable':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif pending == 'disable':
+            if self._profile is None:
+                # Stopped before the run thread ever enabled it
+                self._save({}, Counter())
+                return
+            self._profile.disable()
+            self._profile.create_stats()
+            stats = self._profile.stats
+            self._profile = None
+            self._save(stats, collapse_pstats(stats))
+    
+    def finish(self) -> None:
+        """Stop and save any profile when the run thread ends."""
+        with self._lock:
+            meta = self._meta
+            sampler = self._sampler
+        if meta is None:
+            return
+        if sampler is not None:
+            self.stop()
+        elif self._profile is not None:
+            with self._lock:
+                self._pending = 'disable'
+            self.checkpoint()
+        else:
+            # Deterministic profile requested but the run ended before a checkpoint
+            self._save({}, Counter())
+    
+    def _sample_loop(self, interval: float) -> None:
+        """Record the run thread's stack every interval seconds."""
+        while not self._sampler_stop.wait(interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack: list[ProfileKey] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            self._samples[tuple(reversed(stack))] += 1
+    
+    def _collapse_samples(self) -> Counter[str]:
+        """Format recorded samples as collapsed stacks."""
+        stacks: Counter[str] = Counter()
+        for stack, count in self._samples.items():
+            stacks[';'.join(_profile_label(key) for key in stack)] += count
+        return stacks
+    
+    def _sampled_stats(self, interval: float) -> dict[ProfileKey, tuple]:
+        """
+        Build pstats-compatible stats from samples.
+        
+        Own time counts samples with the function on top of the stack,
+        cumulative time samples with it anywhere on the stack; call counts
+        are sample counts.
+        """
+        own: Counter[ProfileKey] = Counter()
+        total: Counter[ProfileKey] = Counter()
+        edges: dict[ProfileKey, Counter[ProfileKey]] = {}
+        for stack, count in self._samples.items():
+            own[stack[-1]] += count
+            for func in set(stack):
+                total[func] += count
+            for caller, callee in set(zip(stack, stack[1:])):
+                edges.setdefault(callee, Counter())[caller] += count
+        
+        stats: dict[ProfileKey, tuple] = {}
+        for func, count in total.items():
+            callers = {
+                caller: (n, n, 0.0, n * interval)
+                for caller, n in edges.get(func, Counter()).items()
+            }
+            stats[func] = (count, count, own[func] * interval, count * interval, callers)
+        return stats
+    
+    def _save(self, stats: dict[ProfileKey, tuple], stacks: Counter[str]) -> None:
+        """Write the profile files and clear the recording state."""
+        with self._lock:
+            meta = self._meta
+            self._meta = None
+            self._sampler = None
+            self._pending = None
+        if meta is None:
+            return
+        meta['stopped_at'] = time.time()
+        meta['functions'] = len(stats)
+        
+        self.folder.mkdir(parents=True, exist_ok=True)
+        base = self.folder / meta['id']
+        try:
+            with open(f'{base}.pstats', 'wb') as f:
+                marshal.dump(stats, f)
+            with open(f'{base}.collapsed', 'w', encoding='utf-8') as f:
+                for stack, weight in sorted(stacks.items()):
+                    f.write(f'{stack} {weight}\n')
+            with open(f'{base}.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        except OSError as e:
+            log_message(f'Failed to save profile: {e}', 'warning')
+        else:
+            log_message(f"🔬 Saved {meta['mode']} profile {meta['id']}", 'info')
+            publish_event('profile_saved', meta, meta['run_id'])
+        finally:
+            self._saved.set()
+    
+    def list_profiles(self) -> list[dict[str, Any]]:
+        """Metadata of saved profiles, newest first."""
+        profiles = []
+        for path in self.folder.glob('*.json'):
+            try:
+                profiles.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return sorted(profiles, key=lambda meta: meta.get('started_at', 0), reverse=True)
+    
+    def profile_path(self, profile_id: str, kind: str) -> Optional[Path]:
+        """Path of a saved profile file, or None if it does not exist."""
+        if kind not in PROFILE_FILE_KINDS or Path(profile_id).name != profile_id:
+            return None
+        path = self.folder / f'{profile_id}.{kind}'
+        return path if path.is_file() else None
+
+
+run_profiler = RunProfiler(Path(PROFILE_FOLDER))
+
+
+def start_profiling(options: dict[str, Any]) -> dict[str, Any]:
+    """
+    Start profiling the current run.
+    
+    Args:
+        options: Request options: 'mode' ('sampling' or 'deterministic')
+            and, for sampling, 'interval_ms'.
+    
+    Returns:
+        Metadata of the profile being recorded.
+    
+    Raises:
+        ProfilingError: If no run is active or the options are invalid.
+    """
+    state = automation_state
+    if not state.is_running or state.run_thread is None or state.run_id is None:
+        raise ProfilingError('No automation running')
+    try:
+        interval_ms = float(options.get('interval_ms', PROFILE_SAMPLE_INTERVAL_MS))
+    except (TypeError, ValueError):
+        raise ProfilingError('Sampling interval must be a number')
+    if interval_ms <= 0:
+        raise ProfilingError('Sampling interval must be positive')
+    return run_profiler.start(
+        str(options.get('mode', 'sampling')),
+        state.run_id,
+        state.run_thread,
+        state.config,
+        interval_ms
+    )
+
+
+# =============================================================================
+# Failure Artifacts
+# =============================================================================
+
+# Returns the outer HTML of the form around the input element (or the whole
+# body when the input cannot be found), truncated to arguments[1] characters.
+FAILURE_DOM_SCRIPT: str = """
+var node = null;
+try {
+    node = document.evaluate(arguments[0], document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+} catch (e) {}
+var region = node ? (node.closest('form') || node.parentElement || node) : document.body;
+var html = (region || document.documentElement).outerHTML;
+return {url: location.href, found: !!node, html: html.slice(0, arguments[1])};
+"""
+
+
+def capture_failure(driver: WebDriver, input_xpath: Optional[str]) -> Optional[dict[str, Any]]:
+    """
+    Grab a screenshot and the DOM around the input field of a failed row.
+    
+    Only the raw driver round trips happen here; decoding, compression and
+    disk writes are left to the ArtifactWriter thread.
+    
+    Args:
+        driver: WebDriver instance.
+        input_xpath: XPath of the input element, used to locate the region.
+    
+    Returns:
+        Dict with 'screenshot' (base64 PNG), 'html', 'url' and 'found', or
+        None if the browser could not be captured.
+    """
+    try:
+        capture = driver.execute_script(FAILURE_DOM_SCRIPT, input_xpath or '', ARTIFACT_DOM_MAX_CHARS) or {}
+        capture['screenshot'] = driver.get_screenshot_as_base64()
+        return capture
+    except WebDriverException:
+        return None
+
+
+class ArtifactWriter:
+    """
+    Writes failure artifacts on a background thread.
+    
+    Captures are handed over through a bounded queue so a slow disk never
+    stalls the run loop; when the queue is full the capture is dropped and
+    counted instead. Screenshots are stored as PNG and DOM snapshots as
+    gzip-compressed HTML. Once the folder exceeds its quota, the oldest
+    artifacts are evicted.
+    """
+    
+    def __init__(self, folder: Path, queue_size: int, quota_bytes: int) -> None:
+        self.folder = folder
+        self.quota_bytes = quota_bytes
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue[tuple[str, dict[str, Any]]] = queue.Queue(maxsize=queue_size)
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._files: Optional[deque[tuple[Path, int]]] = None
+        self._used = 0
+    
+    def submit(self, run_id: Optional[str], index: int, capture: Optional[dict[str, Any]]) -> Optional[str]:
+        """
+        Queue a capture for writing without blocking.
+        
+        Args:
+            run_id: Run the failed row belongs to.
+            index: Data row index.
+            capture: Result of capture_failure().
+        
+        Returns:
+            Artifact ID, or None if there was nothing to write or the queue
+            was full.
+        """
+        if not capture:
+            return None
+        artifact_id = f'{run_id or "run"}-row{index + 1}-{secrets.token_hex(3)}'
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='artifact-writer')
+                self._thread.start()
+            try:
+                self._queue.put_nowait((artifact_id, capture))
+            except queue.Full:
+                self.dropped += 1
+                return None
+            self._pending.add(artifact_id)
+        return artifact_id
+    
+    def _run(self) -> None:
+        """Writer loop."""
+        while True:
+            artifact_id, capture = self._queue.get()
+            try:
+                self._write(artifact_id, capture)
+            except (OSError, ValueError) as e:
+                log_message(f'Failed to save failure artifacts: {e}', 'warning')
+            finally:
+                with self._lock:
+                    self._pending.discard(artifact_id)
+                    if not self._pending:
+                        self._drained.notify_all()
+                self._queue.task_done()
+    
+    def _write(self, artifact_id: str, capture: dict[str, Any]) -> None:
+        """Decode, compress and store one capture, then enforce the quota."""
+        header = f'<!-- {capture.get("url", "")} -->\n'
+        payloads = {
+            'screenshot': base64.b64decode(capture.get('screenshot') or ''),
+            'dom': gzip.compress((header + str(capture.get('html') or '')).encode('utf-8'), compresslevel=6)
+        }
+        self.folder.mkdir(parents=True, exist_ok=True)
+        if self._files is None:
+            self._files = self._scan()
+        
+        for kind, data in payloads.items():
+            if not data:
+                continue
+            path = self.folder / f'{artifact_id}.{ARTIFACT_KINDS[kind][0]}'
+            path.write_bytes(data)
+            self._files.append((path, len(data)))
+            self._used += len(data)
+        self.written += 1
+        
+        while self._used > self.quota_bytes and self._files:
+            path, size = self._files.popleft()
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self._used -= size
+    
+    def _scan(self) -> deque[tuple[Path, int]]:
+        """Existing artifact files, oldest first."""
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.is_file(follow_symlinks=False):
+                info = entry.stat()
+                entries.append((info.st_mtime, Path(entry.path), info.st_size))
+        entries.sort()
+        self._used = sum(size for _, _, size in entries)
+        return deque((path, size) for _, path, size in entries)
+    
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait up to `timeout` seconds for queued captures to be written."""
+        with self._drained:
+            self._drained.wait_for(lambda: not self._pending, timeout)
+    
+    def artifact_path(self, artifact_id: str, kind: str) -> Optional[Path]:
+        """Path of a stored artifact file, or None if it does not exist."""
+        if kind not in ARTIFACT_KINDS or Path(artifact_id).name != artifact_id:
+            return None
+        path = self.folder / f'{artifact_id}.{ARTIFACT_KINDS[kind][0]}'
+        return path if path.is_file() else None
+    
+    def links(self, artifact_id: str) -> dict[str, Any]:
+        """
+        Download links of an artifact.
+        
+        Returns:
+            Dict with 'pending' and a URL (or None once evicted) per kind.
+        """
+        pending = artifact_id in self._pending
+        result: dict[str, Any] = {'id': artifact_id, 'pending': pending}
+        for kind in ARTIFACT_KINDS:
+            available = pending or self.artifact_path(artifact_id, kind) is not None
+            result[kind] = f'/api/artifacts/{artifact_id}/{kind}' if available else None
+        return result
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Writer counters for status reporting."""
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'used_bytes': self._used,
+            'quota_bytes': self.quota_bytes
+        }
+
+
+artifact_writer = ArtifactWriter(Path(ARTIFACT_FOLDER), ARTIFACT_QUEUE_SIZE, ARTIFACT_QUOTA_BYTES)
+
+
+# =============================================================================
 # Row Processing
 # =============================================================================
 
-def process_row(
-    driver: WebDriver,
-    value: str,
-    input_xpath: str,
-    submit_xpath: str,
-    retry_count: int = 0,
-    max_retries: int = DEFAULT_MAX_RETRIES
-) -> tuple[bool, Optional[str]]:
+def wait_until(
+    driver: WebDriver,
+    condition: Callable[[WebDriver], Any],
+    control: Optional[RunControl] = None,
+    timeout: float = ELEMENT_WAIT_TIMEOUT,
+    poll: float = ELEMENT_POLL_SECONDS
+) -> Any:
+    """
+    Like WebDriverWait.until(), but a stop request ends the wait at once.
+    
+    Args:
+        driver: WebDriver instance.
+        condition: Expected condition; missing elements count as not yet.
+        control: Run control whose stop interrupts the wait.
+        timeout: Seconds to wait before giving up.
+        poll: Seconds between checks of the condition.
+    
+    Returns:
+        The condition's first truthy result.
+    
+    Raises:
+        TimeoutException: If the condition is not met in time.
+        RunStoppedError: If the run is stopped while waiting.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = condition(driver)
+            if result:
+                return result
+        except NoSuchElementException:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f'Condition not met within {timeout} seconds')
+        if control is None:
+            time.sleep(min(poll, remaining))
+        elif not control.sleep(min(poll, remaining)):
+            raise RunStoppedError('Automation stopped by user')
+
+
+def process_row(
+    driver: WebDriver,
+    value: str,
+    input_xpath: str,
+    submit_xpath: str,
+    retry_count: int = 0,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    timings: Optional[dict[str, float]] = None,
+    control: Optional[RunControl] = None
+) -> tuple[bool, Optional[str], int]:
+    """
+    Process a single data row with retry logic.
+    
+    Enters the value into the input field and clicks the submit button.
+    Automatically retries on failure up to the specified limit, unless
+    the browser session itself has died.
+    
+    Args:
+        driver: WebDriver instance.
+        value: Value to enter into the input field.
+        input_xpath: XPath selector for the input element.
+        submit_xpath: XPath selector for the submit button.
+        retry_count: Current retry attempt (used internally).
+        max_retries: Maximum number of retry attempts.
+        timings: If given, seconds spent per phase ('find_input', 'fill',
+            'find_submit', 'submit', 'error', 'retry_wait') are added to it.
+        control: Run control; a stop request interrupts element waits and
+            the retry backoff.
+    
+    Returns:
+        Tuple of (success: bool, error_message: Optional[str], attempts: int).
+    
+    Raises:
+        DriverCrashedError: If the session stops responding; retrying on
+            the same driver would be pointless.
+        RunStoppedError: If the run is stopped while the row waits.
+    """
+    timings = timings if timings is not None else {}
+    phase_started = time.perf_counter()
+    
+    def _phase(name: str) -> None:
+        nonlocal phase_started
+        now = time.perf_counter()
+        timings[name] = timings.get(name, 0.0) + now - phase_started
+        phase_started = now
+    
+    try:
+        # Find and populate input element
+        input_elem = wait_until(driver, EC.presence_of_element_located((By.XPATH, input_xpath)), control)
+        _phase('find_input')
+        input_elem.clear()
+        input_elem.send_keys(str(value))
+        
+        time.sleep(0.3)  # Brief pause for input registration
+        _phase('fill')
+        
+        # Find and click submit button
+        submit_elem = wait_until(driver, EC.element_to_be_clickable((By.XPATH, submit_xpath)), control)
+        _phase('find_submit')
+        submit_elem.click()
+        _phase('submit')
+        
+        return True, None, retry_count + 1
+        
+    except RunStoppedError:
+        raise
+    except TimeoutException as e:
+        error_msg = f"Timeout waiting for element: {e}"
+    except NoSuchElementException as e:
+        error_msg = f"Element not found: {e}"
+    except WebDriverException as e:
+        error_msg = f"Browser error: {e}"
+    except Exception as e:
+        error_msg = f"Unexpected error: {e}"
+    
+    _phase('error')
+    
+    if not is_session_alive(driver):
+        raise DriverCrashedError(error_msg, retry_count + 1)
+    
+    # Retry logic
+    if retry_count < max_retries:
+        # Wait before retry
+        if control is None:
+            time.sleep(1)
+        elif not control.sleep(1):
+            raise RunStoppedError('Automation stopped by user')
+        _phase('retry_wait')
+        return process_row(
+            driver, value, input_xpath, submit_xpath,
+            retry_count + 1, max_retries, timings, control
+        )
+    
+    return False, error_msg, retry_count + 1
+
+
+def record_row_result(
+    state: AutomationState,
+    sheet_name: Optional[str],
+    index: int,
+    value: str,
+    success: bool,
+    error: Optional[str],
+    attempts: int,
+    latency: float,
+    phases: dict[str, float],
+    artifact_id: Optional[str] = None,
+    source: Optional[str] = None
+) -> None:
+    """
+    Apply a processed row to the run stats, outcomes and log.
+    
+    Args:
+        state: Run state.
+        sheet_name: Sheet the row belongs to.
+        index: Data row index.
+        value: Submitted value.
+        success: Whether the row was submitted.
+        error: Error message of a failed row.
+        attempts: Attempts used.
+        latency: Seconds spent on the row.
+        phases: Per-phase timings of the row.
+        artifact_id: Failure artifact of the row, if one was captured.
+        source: Where the row was processed (worker agent or tab), if
+            not simply the run's browser.
+    """
+    # Truncate value for logging
+    display_value = value[:VALUE_TRUNCATE_LENGTH]
+    if len(value) > VALUE_TRUNCATE_LENGTH:
+        display_value += "..."
+    origin = f' [{source}]' if source else ''
+    
+    if success:
+        outcome = RowOutcome(
+            index=index,
+            status=ROW_STATUS_SUCCESS,
+            attempts=attempts,
+            latency=latency,
+            phases=phases
+        )
+        with state_lock:
+            state.stats.success += 1
+            state.row_outcomes[index] = outcome
+        log_message(f'Row {index + 1}: {display_value}{origin}', 'success')
+    else:
+        outcome = RowOutcome(
+            index=index,
+            status=ROW_STATUS_FAILED,
+            error=error or 'Unknown error',
+            attempts=attempts,
+            latency=latency,
+            phases=phases
+        )
+        with state_lock:
+            state.stats.failed += 1
+            state.failed_rows.append(FailedRow(
+                index=index,
+                value=value,
+                error=error or 'Unknown error',
+                sheet=sheet_name,
+                artifact_id=artifact_id
+            ))
+            state.row_outcomes[index] = outcome
+        log_message(f'Row {index + 1} failed: {error}{origin}', 'error')
+    run_history.record_row(state.run_id, sheet_name, outcome, source)
+
+
+def pause_point(state: AutomationState) -> bool:
+    """
+    Hold the run thread here while the run is paused.
+    
+    Publishes 'run_control' events when the pause takes effect and when
+    the run resumes, so clients see the state actually reached.
+    
+    Returns:
+        False if the run has been stopped, True to carry on.
+    """
+    control = state.control
+    if control.paused and not control.stopped:
+        publish_event('run_control', {'state': 'paused'}, run_id=state.run_id)
+        if not control.wait_while_paused(run_profiler.checkpoint):
+            return False
+        publish_event('run_control', {'state': 'running'}, run_id=state.run_id)
+    return not control.stopped
+
+
+# =============================================================================
+# Post-Submit Navigation
+# =============================================================================
+
+# Marks the document and the input element a row is submitted from
+NAV_MARK_SCRIPT: str = """
+window.__automationSubmittedAt = Date.now();
+try {
+    var input = document.evaluate(arguments[0], document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (input) input.__automationInput = true;
+} catch (e) {}
+"""
+
+# What the submit did so far: 'navigate' (a new document), 'rerender' (the
+# marked input was replaced or removed) or 'same' (nothing visible yet)
+NAV_CHANGE_SCRIPT: str = """
+if (window.__automationSubmittedAt === undefined) return 'navigate';
+var input = null;
+try {
+    input = document.evaluate(arguments[0], document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+} catch (e) {}
+return input && input.__automationInput ? 'same' : 'rerender';
+"""
+
+# 'ready' once the page has loaded with the input, 'missing' if it has
+# loaded without it, 'loading' otherwise
+NAV_FORM_SCRIPT: str = """
+if (document.readyState !== 'complete') return 'loading';
+try {
+    return document.evaluate(arguments[0], document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue ? 'ready' : 'missing';
+} catch (e) {
+    return 'missing';
+}
+"""
+
+NAV_BEHAVIOUR_LABELS: dict[str, str] = {
+    'same': 'stays on the same page',
+    'navigate': 'loads a new page',
+    'rerender': 're-renders the form'
+}
+
+
+def run_page_script(driver: WebDriver, script: str, *args: Any) -> Any:
+    """Run a script, returning None while the page is between documents."""
+    try:
+        return driver.execute_script(script, *args)
+    except WebDriverException:
+        return None
+
+
+class PostSubmitNavigator:
+    """
+    Brings the form back after each submit, the cheapest way that works.
+    
+    For the first POST_SUBMIT_LEARN_ROWS rows it watches what a submit
+    does: nothing (same page), a new document (navigation) or a replaced
+    input (SPA re-render). Same-page targets then cost nothing per row.
+    Otherwise the form is restored after every submit by trying the
+    strategies in RESTORE_STRATEGIES order: 'wait' for the new page or
+    re-render to show the input, history 'back', and 'navigate' to the
+    configured URL again. The strategy that works is tried first for the
+    next rows, so the next row never waits out ELEMENT_WAIT_TIMEOUT for
+    an input that is not coming back.
+    """
+    
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.behaviour: Optional[str] = None
+        self.observed: Counter[str] = Counter()
+        self.strategy = RESTORE_STRATEGIES[0]
+        self.restores: Counter[str] = Counter()
+        self.restore_seconds: dict[str, float] = {}
+        self.slowest_change = 0.0
+    
+    def before_submit(self, driver: WebDriver, input_xpath: str) -> None:
+        """Mark the page so after_submit() can tell what the submit did."""
+        if self.behaviour != 'same':
+            run_page_script(driver, NAV_MARK_SCRIPT, input_xpath)
+    
+    def after_submit(
+        self,
+        driver: WebDriver,
+        input_xpath: str,
+        control: Optional[RunControl] = None,
+        timings: Optional[dict[str, float]] = None
+    ) -> None:
+        """
+        Wait for the submit to take effect and restore the form if it left.
+        
+        Args:
+            driver: WebDriver instance the row was submitted in.
+            input_xpath: XPath selector for the input element.
+            control: Run control whose stop interrupts the waits.
+            timings: If given, seconds spent are added to its 'settle'
+                (waiting for the submit's effect) and 'restore' phases.
+        
+        Raises:
+            RunStoppedError: If the run is stopped while waiting.
+        """
+        if self.behaviour == 'same':
+            self.restores['none'] += 1
+            return
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+        change = self._detect_change(driver, input_xpath, control)
+        settled = time.perf_counter()
+        timings['settle'] = timings.get('settle', 0.0) + settled - started
+        
+        if change == 'same':
+            self.restores['none'] += 1
+        else:
+            self.slowest_change = max(self.slowest_change, settled - started)
+            self.restore(driver, input_xpath, control, timings)
+        
+        if self.behaviour is None:
+            self.observed[change] += 1
+            if sum(self.observed.values()) >= POST_SUBMIT_LEARN_ROWS:
+                self.behaviour = self.observed.most_common(1)[0][0]
+                message = f'🧭 Submit {NAV_BEHAVIOUR_LABELS[self.behaviour]}'
+                if self.behaviour != 'same':
+                    message += f"; restoring the form with '{self.strategy}'"
+                log_message(message, 'info')
+    
+    def restore(
+        self,
+        driver: WebDriver,
+        input_xpath: str,
+        control: Optional[RunControl] = None,
+        timings: Optional[dict[str, float]] = None
+    ) -> bool:
+        """
+        Bring the form back after a submit that took it away.
+        
+        Args:
+            driver: WebDriver instance showing the page after the submit.
+            input_xpath: XPath selector for the input element.
+            control: Run control whose stop interrupts the waits.
+            timings: If given, seconds spent are added to its 'restore' phase.
+        
+        Returns:
+            True if the input is usable again.
+        
+        Raises:
+            RunStoppedError: If the run is stopped while waiting.
+        """
+        started = time.perf_counter()
+        strategy = self._restore(driver, input_xpath, control) or 'failed'
+        spent = time.perf_counter() - started
+        if timings is not None:
+            timings['restore'] = timings.get('restore', 0.0) + spent
+        self.restores[strategy] += 1
+        self.restore_seconds[strategy] = self.restore_seconds.get(strategy, 0.0) + spent
+        return strategy != 'failed'
+    
+    def _detect_change(self, driver: WebDriver, input_xpath: str, control: Optional[RunControl]) -> str:
+        """Poll until the submit changes the page; 'same' if it never does."""
+        if self.behaviour is None:
+            window = POST_SUBMIT_DETECT_SECONDS
+        else:
+            window = min(ELEMENT_WAIT_TIMEOUT, max(POST_SUBMIT_DETECT_SECONDS, 3 * self.slowest_change))
+        
+        def changed(d: WebDriver) -> Optional[str]:
+            change = run_page_script(d, NAV_CHANGE_SCRIPT, input_xpath)
+            return change if change in ('navigate', 'rerender') else None
+        
+        try:
+            return wait_until(driver, changed, control, window, POST_SUBMIT_POLL_SECONDS)
+        except TimeoutException:
+            return 'same'
+    
+    def _restore(self, driver: WebDriver, input_xpath: str, control: Optional[RunControl]) -> Optional[str]:
+        """Try strategies from the preferred one on; returns the one that worked."""
+        for strategy in RESTORE_STRATEGIES[RESTORE_STRATEGIES.index(self.strategy):]:
+            try:
+                if strategy == 'back':
+                    driver.back()
+                elif strategy == 'navigate':
+                    driver.get(self.url)
+            except WebDriverException as e:
+                log_message(f"Form restore with '{strategy}' failed: {e}", 'warning')
+                continue
+            if self._form_ready(driver, input_xpath, control):
+                if strategy != self.strategy and self.behaviour is not None:
+                    log_message(f"🧭 Restoring the form with '{strategy}' from now on", 'info')
+                self.strategy = strategy
+                return strategy
+        log_message('🧭 Could not bring the form back after submit', 'warning')
+        return None
+    
+    def _form_ready(self, driver: WebDriver, input_xpath: str, control: Optional[RunControl]) -> bool:
+        """
+        Wait for the input to be usable again.
+        
+        Gives up early once the page has loaded without the input for
+        POST_SUBMIT_RENDER_GRACE_SECONDS, so a strategy that cannot work
+        costs seconds rather than the full element timeout.
+        """
+        missing_since: Optional[float] = None
+        
+        def ready(d: WebDriver) -> bool:
+            nonlocal missing_since
+            form = run_page_script(d, NAV_FORM_SCRIPT, input_xpath)
+            if form == 'ready':
+                return True
+            if form != 'missing':
+                missing_since = None
+            elif missing_since is None:
+                missing_since = time.monotonic()
+            elif time.monotonic() - missing_since >= POST_SUBMIT_RENDER_GRACE_SECONDS:
+                raise TimeoutException('Page loaded without the input')
+            return False
+        
+        try:
+            return wait_until(driver, ready, control, ELEMENT_WAIT_TIMEOUT, POST_SUBMIT_POLL_SECONDS)
+        except TimeoutException:
+            return False
+    
+    def summary(self) -> str:
+        """One-line description of the restores so far, e.g. for the run log."""
+        return ', '.join(
+            f"{name} ×{count}" + (
+                f' (avg {self.restore_seconds[name] / count * 1000:.0f} ms)' if name in self.restore_seconds else ''
+            )
+            for name, count in self.restores.most_common()
+        )
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the learned behaviour and restore counts to a dictionary."""
+        return {
+            'behaviour': self.behaviour,
+            'observed': dict(self.observed),
+            'strategy': self.strategy if self.behaviour != 'same' else None,
+            'restores': dict(self.restores),
+            'restore_ms': {
+                name: round(seconds / self.restores[name] * 1000, 1)
+                for name, seconds in self.restore_seconds.items()
+            }
+        }
+
+
+# =============================================================================
+# Tab Multiplexing
+# =============================================================================
+
+# Marks the document a row is about to be submitted from, so a new
+# document after the submit can be told apart from it
+TAB_FORM_SCRIPT: str = "window.__automationForm = true;"
+
+# Records when a row was submitted
+TAB_SUBMITTED_SCRIPT: str = "window.__automationSubmittedAt = Date.now();"
+
+# Whether the tab's submit has settled: 'ready' once the page has loaded
+# with the input (after the grace period if the submit did not navigate),
+# 'navigated' once a new document has loaded without it, false otherwise
+TAB_READY_SCRIPT: str = """
+if (document.readyState !== 'complete') return false;
+var submittedAt = window.__automationSubmittedAt;
+if (submittedAt && Date.now() - submittedAt < arguments[1]) return false;
+var input = null;
+try {
+    input = document.evaluate(arguments[0], document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+} catch (e) {}
+if (input) return 'ready';
+return window.__automationForm ? false : 'navigated';
+"""
+
+
+@dataclass
+class InFlightRow:
+    """A row submitted in a tab whose page has not settled yet."""
+    
+    index: int
+    value: str
+    attempts: int
+    phases: dict[str, float]
+    started: float
+
+
+@dataclass
+class BrowserTab:
+    """One tab of a multiplexed driver and its throughput counters."""
+    
+    number: int
+    handle: str
+    rows: int = 0
+    success: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    in_flight: Optional[InFlightRow] = None
+    
+    def to_dict(self, elapsed: float) -> dict[str, Any]:
+        """Per-tab throughput snapshot."""
+        return {
+            'tab': self.number,
+            'rows': self.rows,
+            'success': self.success,
+            'failed': self.failed,
+            'rows_per_minute': round(self.rows / (elapsed / 60), 1) if elapsed > 0 else 0.0,
+            'busy_share': round(self.busy_seconds / elapsed, 3) if elapsed > 0 else 0.0
+        }
+
+
+class TabPool:
+    """
+    Rotates rows across several tabs of one driver.
+    
+    A row is filled and submitted in one tab, then the next tab takes the
+    next row while the first tab's page loads. When the rotation comes
+    back to a tab, its previous row is finished by waiting for the page
+    to settle, and only then is the outcome recorded for that row. If the
+    submit loaded a page without the form, the navigator brings the form
+    back before the tab takes its next row. Counters per tab number
+    survive browser relaunches.
+    """
+    
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.tabs: list[BrowserTab] = []
+        self.driver: Optional[WebDriver] = None
+        self.navigator: Optional[PostSubmitNavigator] = None
+        self.started = time.time()
+        self._next = 0
+    
+    def attach(self, driver: WebDriver, url: str) -> None:
+        """
+        Open the tabs on a driver, unless they are open already.
+        
+        The driver's current window becomes tab 1; the others are opened
+        on `url`.
+        """
+        if driver is self.driver:
+            return
+        if self.navigator is None:
+            self.navigator = PostSubmitNavigator(url)
+        handles = [driver.current_window_handle]
+        for _ in range(self.count - 1):
+            driver.switch_to.new_window('tab')
+            driver.get(url)
+            handles.append(driver.current_window_handle)
+        driver.switch_to.window(handles[0])
+        
+        for number, handle in enumerate(handles, start=1):
+            if number <= len(self.tabs):
+                self.tabs[number - 1].handle = handle
+                self.tabs[number - 1].in_flight = None
+            else:
+                self.tabs.append(BrowserTab(number, handle))
+        self.driver = driver
+        self._next = 0
+    
+    def next_tab(self) -> BrowserTab:
+        """Switch to the next tab in the rotation."""
+        tab = self.tabs[self._next]
+        self._next = (self._next + 1) % len(self.tabs)
+        if self.driver is not None and self.driver.current_window_handle != tab.handle:
+            self.driver.switch_to.window(tab.handle)
+        return tab
+    
+    def in_flight(self) -> list[BrowserTab]:
+        """Tabs with a submitted row that has not settled."""
+        return [tab for tab in self.tabs if tab.in_flight is not None]
+    
+    def to_dict(self) -> list[dict[str, Any]]:
+        """Throughput of every tab."""
+        elapsed = time.time() - self.started
+        return [tab.to_dict(elapsed) for tab in self.tabs]
+
+
+def run_tabbed_rows(
+    state: AutomationState,
+    config: AutomationConfig,
+    health: DriverHealthMonitor,
+    tab_pool: TabPool,
+    sheet_name: Optional[str],
+    values: pd.Series,
+    rows_before: int,
+    on_success: Callable[[int], None],
+    rate_limiter: Optional[RateLimiter]
+) -> None:
+    """
+    Process a sheet's rows rotating across the tabs of the run's driver.
+    
+    Args:
+        state: Run state.
+        config: Run configuration.
+        health: Health monitor of the run's driver.
+        tab_pool: Tabs of the run's driver.
+        sheet_name: Sheet the rows come from.
+        values: Values to submit, indexed by data row.
+        rows_before: Rows processed in earlier sheets of the run.
+        on_success: Called with the row index of each successful row.
+        rate_limiter: Limiter applied before every submit, if any.
+    """
+    max_retries = config.max_retries if config.retry_failed else 0
+    done = 0
+    submitted = 0
+    checkpointed = 0
+    tab_pool.attach(state.driver, config.url)
+    
+    def finish(tab: BrowserTab, row: InFlightRow, success: bool, error: Optional[str]) -> None:
+        nonlocal done
+        done += 1
+        latency = time.perf_counter() - row.started
+        tab.rows += 1
+        if success:
+            tab.success += 1
+        else:
+            tab.failed += 1
+        row_timings.append(row.phases)
+        if rate_limiter:
+            rate_limiter.record(success, latency)
+        
+        artifact_id = None
+        if not success and config.failure_artifacts and state.driver:
+            artifact_id = artifact_writer.submit(
+                state.run_id, row.index, capture_failure(state.driver, state.element_xpath)
+            )
+        if not success and config.reuse_session:
+            check_session_redirect(state.driver, config)
+        record_row_result(
+            state, sheet_name, row.index, row.value,
+            success, error, row.attempts, latency, row.phases, artifact_id,
+            source=f'tab {tab.number}'
+        )
+        if success:
+            on_success(row.index)
+        
+        progress_extra: dict[str, Any] = {
+            'row_latency_ms': round(latency * 1000, 1),
+            'tabs': tab_pool.to_dict(),
+            'navigation': tab_pool.navigator.to_dict()
+        }
+        if rate_limiter:
+            progress_extra['rate_limit'] = rate_limiter.to_dict()
+        if done % RSS_SAMPLE_EVERY_ROWS == 1:
+            health.sample(state.driver)
+        if health.last_rss is not None:
+            progress_extra['browser_rss_mb'] = round(health.last_rss / (1024 * 1024), 1)
+        progress_extra['driver_health'] = health.to_dict()
+        update_progress(
+            rows_before + done, state.stats.total,
+            state.stats.success,
+            state.stats.failed,
+            extra=progress_extra
+        )
+    
+    def settle(tab: BrowserTab) -> None:
+        row = tab.in_flight
+        tab.in_flight = None
+        started = time.perf_counter()
+        settled = None
+        try:
+            settled = wait_until(
+                state.driver,
+                lambda driver: driver.execute_script(TAB_READY_SCRIPT, state.element_xpath, TAB_SAME_PAGE_GRACE_MS),
+                state.control
+            )
+            success, error = True, None
+        except RunStoppedError:
+            success, error = False, 'Stopped before the submit settled'
+        except TimeoutException:
+            success, error = False, 'Timeout waiting for the page to settle after submit'
+        except WebDriverException as e:
+            success, error = False, f'Browser error: {e}'
+        row.phases['settle'] = time.perf_counter() - started
+        if settled == 'navigated':
+            # The submit loaded a page without the form; the tab needs it for its next row
+            try:
+                tab_pool.navigator.restore(state.driver, state.element_xpath, state.control, row.phases)
+            except RunStoppedError:
+                pass  # The submit itself went through; the run loop sees the stop
+        tab.busy_seconds += time.perf_counter() - started
+        finish(tab, row, success, error)
+    
+    def drain() -> None:
+        for tab in tab_pool.in_flight():
+            if state.driver is None or state.control.stopped:
+                reason = 'Stopped' if state.control.stopped else 'Browser closed'
+                finish(tab, tab.in_flight, False, f'{reason} before the submit settled')
+                tab.in_flight = None
+                continue
+            try:
+                state.driver.switch_to.window(tab.handle)
+            except WebDriverException:
+                pass  # settle() records the failure
+            settle(tab)
+    
+    try:
+        for index, value in values.items():
+            run_profiler.checkpoint()
+            if not pause_point(state):
+                log_message('Automation stopped by user', 'warning')
+                break
+            
+            tab = tab_pool.next_tab()
+            if tab.in_flight:
+                settle(tab)
+                if state.control.stopped:
+                    log_message('Automation stopped by user', 'warning')
+                    break
+            
+            phases: dict[str, float] = {}
+            throttle_started = time.perf_counter()
+            if rate_limiter and not rate_limiter.acquire(state.control):
+                log_message('Automation stopped by user', 'warning')
+                break
+            phases['throttle'] = time.perf_counter() - throttle_started
+            
+            value = str(value)
+            submitted += 1
+            state.stats.current = rows_before + submitted
+            started = time.perf_counter()
+            driver = state.driver
+            try:
+                driver.execute_script(TAB_FORM_SCRIPT)
+            except WebDriverException:
+                pass  # process_row_with_recovery() handles a dead session
+            try:
+                success, error, attempts = process_row_with_recovery(
+                    state, config, health, value, max_retries, phases
+                )
+            except RunStoppedError:
+                log_message('Automation stopped by user', 'warning')
+                break
+            health.row_done()
+            if state.driver is not driver:
+                # The browser was relaunched; rows still loading in the old tabs are lost
+                for other in tab_pool.in_flight():
+                    finish(other, other.in_flight, False, 'Browser restarted before the submit settled')
+                tab_pool.attach(state.driver, config.url)
+                tab = tab_pool.next_tab()
+            tab.busy_seconds += time.perf_counter() - started
+            
+            row = InFlightRow(index, value, attempts, phases, started)
+            if success:
+                try:
+                    state.driver.execute_script(TAB_SUBMITTED_SCRIPT)
+                except WebDriverException:
+                    pass  # The page is navigating; settle() waits for the new one
+                tab.in_flight = row
+            else:
+                finish(tab, row, False, error)
+            
+            # A loop iteration can finish zero, one or two rows, so compare against the last checkpoint
+            if config.write_back and config.write_back_checkpoint and done - checkpointed >= config.write_back_checkpoint:
+                write_back_results()
+                checkpointed = done
+            
+            recycle_reason = health.recycle_reason()
+            if recycle_reason:
+                drain()
+                health.recycles += 1
+                relaunch_driver(state, config, recycle_reason)
+                health.launched()
+                tab_pool.attach(state.driver, config.url)
+            
+            state.control.sleep(config.delay)
+    finally:
+        drain()
+
+
+# =============================================================================
+# Distributed Execution
+# =============================================================================
+
+@dataclass
+class RowLease:
+    """A batch of rows handed to a worker agent."""
+    
+    lease_id: str
+    worker_id: str
+    rows: dict[int, str]
+    expires_at: float
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to the payload sent to the worker."""
+        return {
+            'lease_id': self.lease_id,
+            'expires_in': max(0.0, round(self.expires_at - time.time(), 1)),
+            'rows': [{'index': index, 'value': value} for index, value in self.rows.items()]
+        }
+
+
+@dataclass
+class WorkerResult:
+    """Outcome of one row as reported by a worker agent."""
+    
+    index: int
+    success: bool
+    worker_id: str
+    error: Optional[str] = None
+    attempts: int = 1
+    latency: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], worker_id: str) -> WorkerResult:
+        """
+        Create a result from a worker report entry.
+        
+        Raises:
+            KeyError, TypeError, ValueError: If the entry is malformed.
+        """
+        return cls(
+            index=int(data['index']),
+            success=bool(data['success']),
+            worker_id=worker_id,
+            error=str(data['error']) if data.get('error') else None,
+            attempts=int(data.get('attempts', 1)),
+            latency=float(data.get('latency', 0.0)),
+            phases={str(k): float(v) for k, v in (data.get('phases') or {}).items()}
+        )
+
+
+class LeaseCoordinator:
+    """
+    Hands out a run's rows to remote worker agents in leased batches.
+    
+    Workers lease up to `lease_rows` rows at a time and report outcomes as
+    they go; every report renews the lease. A lease that is not renewed
+    within `lease_seconds` expires and its unreported rows go back to the
+    front of the queue for another worker. The first outcome reported for
+    a row wins, so a slow worker finishing a reassigned row cannot count
+    it twice. Accepted outcomes are queued for the run thread, which
+    applies them to the run state as if the rows had been processed
+    locally. With a rate limiter, workers take a token before each row
+    through grant_token(), so all of them together keep to the run's rate.
+    """
+    
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.workers: dict[str, dict[str, Any]] = {}
+        self.results: queue.Queue[WorkerResult] = queue.Queue()
+        self.job: dict[str, Any] = {}
+        self.run_id: Optional[str] = None
+        self.is_open = False
+        self.paused = False
+        self.lease_rows = 1
+        self.lease_seconds = 0
+        self.reassigned = 0
+        self.limiter: Optional[RateLimiter] = None
+        self.control: Optional[RunControl] = None
+        self._values: dict[int, str] = {}
+        self._pending: deque[int] = deque()
+        self._leases: dict[str, RowLease] = {}
+        self._issued: set[str] = set()
+        self._done: set[int] = set()
+    
+    def open(
+        self,
+        run_id: Optional[str],
+        job: dict[str, Any],
+        rows: list[tuple[int, str]],
+        lease_rows: int,
+        lease_seconds: int,
+        limiter: Optional[RateLimiter] = None,
+        control: Optional[RunControl] = None
+    ) -> None:
+        """
+        Start leasing a new set of rows; anything left from before is dropped.
+        
+        Args:
+            run_id: Run the rows belong to.
+            job: Settings the workers need (URL, selectors, browser, ...).
+            rows: (index, value) pairs in processing order.
+            lease_rows: Maximum rows per lease.
+            lease_seconds: Seconds a lease stays valid without a report.
+            limiter: Rate limiter workers take tokens from, if any.
+            control: Run control notified when outcomes arrive.
+        """
+        with self._lock:
+            self.run_id = run_id
+            self.job = job
+            self.lease_rows = lease_rows
+            self.lease_seconds = lease_seconds
+            self.limiter = limiter
+            self.control = control
+            self.results = queue.Queue()
+            self._values = dict(rows)
+            self._pending = deque(index for index, _ in rows)
+            self._leases = {}
+            self._issued = set()
+            self._done = set()
+            self.reassigned = 0
+            self.paused = False
+            self.is_open = True
+    
+    def close(self) -> None:
+        """Stop leasing; outstanding leases are revoked."""
+        with self._lock:
+            self.is_open = False
+            self._pending.clear()
+            self._leases.clear()
+    
+    def _seen(self, worker_id: str) -> dict[str, Any]:
+        """Registry entry of a worker, refreshed as seen now."""
+        worker = self.workers.setdefault(worker_id, {'rows_done': 0, 'leases': 0})
+        worker['last_seen'] = time.time()
+        return worker
+    
+    def lease(self, worker_id: str, max_rows: int = 0) -> Optional[RowLease]:
+        """
+        Lease the next batch of rows to a worker.
+        
+        Args:
+            worker_id: ID the worker reports under.
+            max_rows: Upper bound requested by the worker (0 for no bound).
+        
+        Returns:
+            The new lease, or None if no rows are available right now.
+        """
+        with self._lock:
+            worker = self._seen(worker_id)
+            if not self.is_open or self.paused:
+                return None
+            count = min(max_rows, self.lease_rows) if max_rows > 0 else self.lease_rows
+            rows: dict[int, str] = {}
+            while self._pending and len(rows) < count:
+                index = self._pending.popleft()
+                if index not in self._done:
+                    rows[index] = self._values[index]
+            if not rows:
+                return None
+            lease = RowLease(secrets.token_hex(8), worker_id, rows, time.time() + self.lease_seconds)
+            self._leases[lease.lease_id] = lease
+            self._issued.add(lease.lease_id)
+            worker['leases'] += 1
+            return lease
+    
+    def report(
+        self,
+        worker_id: str,
+        lease_id: str,
+        results: list[dict[str, Any]],
+        finished: bool = False
+    ) -> tuple[int, bool]:
+        """
+        Accept row outcomes from a worker and renew its lease.
+        
+        Args:
+            worker_id: ID of the reporting worker.
+            lease_id: Lease the outcomes belong to.
+            results: Outcome entries (see WorkerResult.from_dict).
+            finished: True if the worker is done with the lease; rows it
+                did not report are returned to the queue.
+        
+        Returns:
+            Tuple of (outcomes accepted, whether the lease is still active).
+        
+        Raises:
+            LeaseError: If no distributed run is active, the lease was not
+                issued for it or an entry is malformed.
+        """
+        with self._lock:
+            worker = self._seen(worker_id)
+            if not self.is_open:
+                raise LeaseError('No distributed run is active')
+            if lease_id not in self._issued:
+                raise LeaseError('Unknown lease')
+            
+            lease = self._leases.get(lease_id)
+            accepted = 0
+            for entry in results:
+                try:
+                    result = WorkerResult.from_dict(entry, worker_id)
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    raise LeaseError(f'Malformed result: {e}') from e
+                if result.index not in self._values or result.index in self._done:
+                    continue
+                self._done.add(result.index)
+                if lease:
+                    lease.rows.pop(result.index, None)
+                self.results.put(result)
+                accepted += 1
+            worker['rows_done'] += accepted
+            if accepted and self.control:
+                self.control.notify()
+            
+            # An expired lease stays revoked; its late outcomes still count above
+            if lease is None:
+                return accepted, False
+            if finished or not lease.rows:
+                self._pending.extendleft(reversed(list(lease.rows)))
+                del self._leases[lease_id]
+                return accepted, False
+            lease.expires_at = time.time() + self.lease_seconds
+            return accepted, True
+    
+    def grant_token(self, worker_id: str, lease_id: str, wait: float = WORKER_TOKEN_WAIT_SECONDS) -> tuple[bool, bool]:
+        """
+        Give a worker a rate-limit token for the next row of its lease.
+        
+        Waits up to `wait` seconds for the shared bucket; the worker asks
+        again if none was free. A granted token renews the lease, since
+        at a low rate reports can be further apart than `lease_seconds`.
+        
+        Args:
+            worker_id: ID of the asking worker.
+            lease_id: Lease the row belongs to.
+            wait: Seconds to wait for a token at most.
+        
+        Returns:
+            Tuple of (token granted, whether the lease is still active).
+        """
+        with self._lock:
+            self._seen(worker_id)
+            limiter = self.limiter
+            if not self.is_open or lease_id not in self._leases:
+                return False, False
+        if limiter is not None and not limiter.acquire(timeout=wait):
+            return False, True
+        with self._lock:
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return False, False
+            lease.expires_at = time.time() + self.lease_seconds
+            return True, True
+    
+    def reclaim_expired(self) -> int:
+        """
+        Return the rows of expired leases to the front of the queue.
+        
+        Returns:
+            Number of rows put back.
+        """
+        now = time.time()
+        reclaimed = 0
+        with self._lock:
+            for lease_id, lease in list(self._leases.items()):
+                if lease.expires_at > now:
+                    continue
+                self._pending.extendleft(reversed(list(lease.rows)))
+                reclaimed += len(lease.rows)
+                del self._leases[lease_id]
+            self.reassigned += reclaimed
+        return reclaimed
+    
+    def next_expiry(self) -> Optional[float]:
+        """Seconds until the next outstanding lease expires, or None."""
+        with self._lock:
+            if not self._leases:
+                return None
+            return min(lease.expires_at for lease in self._leases.values()) - time.time()
+    
+    def active_workers(self) -> int:
+        """Number of workers seen within the lease duration."""
+        cutoff = time.time() - max(self.lease_seconds, MIN_LEASE_SECONDS)
+        return sum(1 for worker in list(self.workers.values()) if worker['last_seen'] >= cutoff)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Coordinator snapshot for status reporting."""
+        now = time.time()
+        with self._lock:
+            return {
+                'open': self.is_open,
+                'run_id': self.run_id,
+                'paused': self.paused,
+                'pending': len(self._pending),
+                'leased': sum(len(lease.rows) for lease in self._leases.values()),
+                'done': len(self._done),
+                'reassigned': self.reassigned,
+                'leases': [
+                    {'lease_id': lease.lease_id, 'worker_id': lease.worker_id, 'rows': len(lease.rows),
+                     'expires_in': round(lease.expires_at - now, 1)}
+                    for lease in self._leases.values()
+                ],
+                'workers': {
+                    worker_id: {**worker, 'last_seen': round(now - worker['last_seen'], 1)}
+                    for worker_id, worker in self.workers.items()
+                }
+            }
+
+
+lease_coordinator = LeaseCoordinator()
+
+
+def worker_job(state: AutomationState, config: AutomationConfig) -> dict[str, Any]:
+    """Settings a worker agent needs to process the run's rows."""
+    return {
+        'run_id': state.run_id,
+        'url': config.url,
+        'browser': config.browser,
+        'headless': config.headless,
+        'throughput_profile': config.throughput_profile,
+        'delay': config.delay,
+        'max_retries': config.max_retries if config.retry_failed else 0,
+        'recycle_after_rows': config.recycle_after_rows,
+        'recycle_rss_mb': config.recycle_rss_mb,
+        'reuse_session': config.reuse_session,
+        'rate_limited': config.rate_limit > 0,
+        'input_xpath': state.element_xpath,
+        'submit_xpath': state.submit_xpath
+    }
+
+
+def run_distributed_rows(
+    state: AutomationState,
+    config: AutomationConfig,
+    sheet_name: Optional[str],
+    values: pd.Series,
+    rows_before: int,
+    on_success: Callable[[int], None]
+) -> None:
+    """
+    Process a sheet's rows on worker agents instead of the local browser.
+    
+    Leases the rows through lease_coordinator and applies the outcomes
+    the workers report until every row is done or the run is stopped.
+    Pausing the run stops new leases; leases already out are finished.
+    With rate limiting on, workers take their tokens from the run's
+    limiter and their outcomes tune it as local rows would.
+    
+    Args:
+        state: Run state.
+        config: Run configuration.
+        sheet_name: Sheet the rows come from.
+        values: Values to submit, indexed by data row.
+        rows_before: Rows processed in earlier sheets of the run.
+        on_success: Called with the row index of each successful row.
+    """
+    total = len(values)
+    rate_limiter = get_rate_limiter(config)
+    lease_coordinator.open(
+        state.run_id,
+        worker_job(state, config),
+        list(zip(values.index.tolist(), values.astype(str).tolist())),
+        config.lease_rows,
+        config.lease_seconds,
+        rate_limiter,
+        state.control
+    )
+    log_message(f'🌐 Waiting for workers to lease {total} rows ({config.lease_rows} per lease)', 'info')
+    done = 0
+    try:
+        while done < total:
+            run_profiler.checkpoint()
+            lease_coordinator.paused = state.control.paused
+            if not pause_point(state):
+                log_message('Automation stopped by user', 'warning')
+                break
+            lease_coordinator.paused = False
+            reclaimed = lease_coordinator.reclaim_expired()
+            if reclaimed:
+                log_message(f'⏱️ A worker lease expired; {reclaimed} rows will be reassigned', 'warning')
+            
+            try:
+                result = lease_coordinator.results.get_nowait()
+            except queue.Empty:
+                # Woken by a report, a pause or a stop; otherwise when a lease expires
+                expiry = lease_coordinator.next_expiry()
+                state.control.wait(
+                    lambda: not lease_coordinator.results.empty() or state.control.paused,
+                    min(expiry, WORKER_POLL_SECONDS) if expiry is not None else WORKER_POLL_SECONDS
+                )
+                continue
+            
+            done += 1
+            state.stats.current = rows_before + done
+            row_timings.append(result.phases)
+            if rate_limiter:
+                rate_limiter.record(result.success, result.latency)
+            record_row_result(
+                state, sheet_name, result.index, str(values.at[result.index]),
+                result.success, result.error, result.attempts, result.latency, result.phases,
+                source=result.worker_id
+            )
+            if result.success:
+                on_success(result.index)
+            
+            progress_extra: dict[str, Any] = {
+                'row_latency_ms': round(result.latency * 1000, 1),
+                'worker': result.worker_id,
+                'workers': lease_coordinator.active_workers()
+            }
+            if rate_limiter:
+                progress_extra['rate_limit'] = rate_limiter.to_dict()
+            update_progress(
+                rows_before + done, state.stats.total,
+                state.stats.success,
+                state.stats.failed,
+                extra=progress_extra
+            )
+            
+            if config.write_back and config.write_back_checkpoint and done % config.write_back_checkpoint == 0:
+                write_back_results()
+    finally:
+        lease_coordinator.close()
+
+
+# =============================================================================
+# Main Automation Logic
+# =============================================================================
+
+def load_run_sheet(state: AutomationState, sheet_name: Optional[str]) -> Optional[pd.DataFrame]:
+    """
+    Return the DataFrame for a sheet of the current run.
+    
+    The current dataset is used as-is; other sheets are parsed lazily
+    through the workbook cache and become the current dataset.
+    """
+    if sheet_name is None or sheet_name == state.sheet_name or state.workbook is None:
+        return current_dataset()[0]
+    if state.file_info is not None:
+        activate_sheet(state.workbook, sheet_name, state.file_info)
+        return state.data
+    return state.workbook.load(sheet_name)
+
+
+def run_automation(
+    column_name: str,
+    sheets: Optional[list[str]] = None,
+    dry_run: Optional[DryRunPlan] = None,
+    rejections: Optional[dict[str, pd.Series]] = None
+) -> None:
+    """
+    Main automation loop - runs in background thread.
+    
+    Orchestrates the complete automation workflow including browser
+    initialization, element selection, and data processing.
+    
+    Args:
+        column_name: Name of the DataFrame column containing values to process.
+        sheets: Workbook sheets to process in sequence; defaults to the
+            currently selected sheet.
+        dry_run: If given, only a random sample of rows is processed and
+            a forecast for the full run is published when it completes.
+        rejections: Rejection reasons from prevalidate_run, keyed by sheet
+            name; if not given, rows are validated as each sheet starts.
+    """
+    state = automation_state
+    config = state.config
+    run_id = state.run_id
+    state.run_thread = threading.get_ident()
+    run_sheets: list[Optional[str]] = list(sheets) if sheets else [state.sheet_name]
+    run_file = state.file_path
+    upload_store.pin(run_file)
+    submission_scope = ''
+    submitted_hashes: list[int] = []
+    selected_hashes: set[int] = set()
+    health = DriverHealthMonitor(config.recycle_after_rows, config.recycle_rss_mb)
+    tab_pool = TabPool(config.tabs) if config.tabs > 1 and not config.distributed else None
+    state.navigator = PostSubmitNavigator(config.url) if not tab_pool and not config.distributed else None
+    
+    try:
+        with state_lock:
+            state.stats.reset()
+            state.failed_rows = []
+        run_history.start_run(state, column_name, run_sheets, dry_run is not None)
+        
+        log_message('Initializing browser...', 'info')
+        log_message(f'Navigating to: {config.url}', 'info')
+        state.driver = launch_driver(config, state.driver_slot)
+        health.launched()
+        
+        # Element selection phase, unless selectors were given up front
+        if not (state.input_selected and state.submit_selected):
+            # Input field
+            log_message('⚠️ Click on the INPUT FIELD in the browser window', 'warning')
+            inject_element_selector(state.driver, 'INPUT FIELD')
+            publish_event('wait_for_element', {'type': 'input'}, run_id=run_id)
+            
+            # Wait for element selection; a confirmation or stop request wakes the wait
+            while not state.input_selected and not state.should_stop:
+                elem_info = get_selected_element(state.driver)
+                if elem_info:
+                    state.element_xpath = elem_info['xpath']
+                    state.control.select('input')
+                    elem_id_display = f" #{elem_info['id']}" if elem_info.get('id') else ''
+                    log_message(f"✅ Input field selected: {elem_info['tag']}{elem_id_display}", 'success')
+                else:
+                    state.control.wait_for_selection('input', SELECTION_POLL_SECONDS)
+            
+            if not state.control.sleep(1):
+                raise AutomationError('Automation stopped by user')
+            
+            # Submit button
+            log_message('⚠️ Now click on the SUBMIT BUTTON in the browser window', 'warning')
+            inject_element_selector(state.driver, 'SUBMIT BUTTON')
+            publish_event('wait_for_element', {'type': 'submit'}, run_id=run_id)
+            
+            while not state.submit_selected and not state.should_stop:
+                elem_info = get_selected_element(state.driver)
+                if elem_info:
+                    state.submit_xpath = elem_info['xpath']
+                    state.control.select('submit')
+                    elem_id_display = f" #{elem_info['id']}" if elem_info.get('id') else ''
+                    log_message(f"✅ Submit button selected: {elem_info['tag']}{elem_id_display}", 'success')
+                else:
+                    state.control.wait_for_selection('submit', SELECTION_POLL_SECONDS)
+            
+            if state.should_stop:
+                raise AutomationError('Automation stopped by user')
+        
+        publish_event('elements_confirmed', run_id=run_id)
+        log_message('Starting data processing...', 'info')
+        
+        if config.reuse_session and state.driver:
+            save_session_snapshot(state.driver, config)
+        
+        if config.distributed and state.driver:
+            # Rows are submitted by worker agents; the local browser was only needed for selection
+            state.driver.quit()
+            state.driver = None
+        
+        submission_scope = SubmissionIndex.scope(config.url, state.element_xpath, state.submit_xpath)
+        rows_before = 0
+        planned_rows = 0
+        
+        for sheet_name in run_sheets:
+            if state.should_stop:
+                break
+            if len(run_sheets) > 1:
+                log_message(f'📑 Processing sheet: {sheet_name}', 'info')
+                
+            # Get data range
+            data = load_run_sheet(state, sheet_name)
+            if data is None:
+                raise AutomationError('No data loaded')
+            if column_name not in data.columns:
+                log_message(f'Sheet "{sheet_name}" has no column "{column_name}", skipping it', 'warning')
+                continue
+            
+            start = config.start_row
+            end = config.end_row if config.end_row != -1 else len(data)
+            if rejections is not None:
+                rejected = rejections.get(sheet_name or '', pd.Series(dtype=object))
+            else:
+                rejected = validate_rows(data.iloc[start:end], config.validation_rules)
+            # The run only holds the chosen column; the full sheet can be released while idle
+            data_subset = data[[column_name]].iloc[start:end]
+            del data
+            run_range = (start, start + len(data_subset))
+            sheet_run = SheetRun(run_range)
+            
+            rejected = rejected[rejected.index.isin(data_subset.index)]
+            if len(rejected):
+                data_subset = data_subset.drop(index=rejected.index)
+                with state_lock:
+                    state.stats.rejected += len(rejected)
+                    for index, reason in rejected.items():
+                        sheet_run.outcomes[index] = RowOutcome(index=index, status=ROW_STATUS_REJECTED, error=reason)
+                log_message(f'🚫 Rejected {len(rejected)} rows failing validation rules', 'warning')
+            
+            value_hashes: Optional[pd.Series] = None
+            if config.skip_submitted:
+                data_subset, value_hashes, skipped = select_rows_to_submit(
+                    data_subset, column_name, submission_scope, selected_hashes
+                )
+                with state_lock:
+                    state.stats.skipped += len(skipped)
+                    for index, reason in skipped.items():
+                        sheet_run.outcomes[index] = RowOutcome(index=index, status=ROW_STATUS_SKIPPED, error=reason)
+                if skipped:
+                    log_message(f'⏭️ Skipping {len(skipped)} rows already submitted or duplicated', 'info')
+            run_history.record_outcomes(run_id, sheet_name, sheet_run.outcomes.values())
+            
+            planned_rows += len(data_subset)
+            if dry_run and len(data_subset) > dry_run.sample_rows:
+                data_subset = data_subset.sample(n=dry_run.sample_rows).sort_index()
+            
+            total = len(data_subset)
+            rate_limiter = get_rate_limiter(config)
+            
+            with state_lock:
+                state.stats.total += total
+                state.run_range = run_range
+                state.row_outcomes = sheet_run.outcomes
+                state.sheet_runs[sheet_name or ''] = sheet_run
+            
+            def mark_submitted(index: int) -> None:
+                if value_hashes is None:
+                    return
+                submitted_hashes.append(value_hashes.at[index])
+                if len(submitted_hashes) >= SUBMISSION_FLUSH_ROWS:
+                    submission_index.record(submission_scope, submitted_hashes)
+                    submitted_hashes.clear()
+            
+            if config.distributed:
+                run_distributed_rows(state, config, sheet_name, data_subset[column_name], rows_before, mark_submitted)
+                rows_before = state.stats.total
+                continue
+            if tab_pool:
+                run_tabbed_rows(
+                    state, config, health, tab_pool, sheet_name,
+                    data_subset[column_name], rows_before, mark_submitted, rate_limiter
+                )
+                rows_before = state.stats.total
+                continue
+            
+            # Process each row
+            for idx, (index, row) in enumerate(data_subset.iterrows()):
+                run_profiler.checkpoint()
+                if not pause_point(state):
+                    log_message('Automation stopped by user', 'warning')
+                    break
+                
+                value = str(row[column_name])
+                state.stats.current = rows_before + idx + 1
+                
+                max_retries = config.max_retries if config.retry_failed else 0
+                
+                phases: dict[str, float] = {}
+                throttle_started = time.perf_counter()
+                if rate_limiter and not rate_limiter.acquire(state.control):
+                    log_message('Automation stopped by user', 'warning')
+                    break
+                phases['throttle'] = time.perf_counter() - throttle_started
+                
+                row_started = time.perf_counter()
+                try:
+                    success, error, attempts = process_row_with_recovery(
+                        state, config, health, value, max_retries, phases
+                    )
+                except RunStoppedError:
+                    log_message('Automation stopped by user', 'warning')
+                    break
+                health.row_done()
+                latency = time.perf_counter() - row_started
+                row_timings.append(phases)
+                if rate_limiter:
+                    rate_limiter.record(success, latency)
+                
+                artifact_id = None
+                if not success and config.failure_artifacts and state.driver:
+                    artifact_id = artifact_writer.submit(
+                        run_id, index, capture_failure(state.driver, state.element_xpath)
+                    )
+                if not success and config.reuse_session:
+                    check_session_redirect(state.driver, config)
+                record_row_result(
+                    state, sheet_name, index, value,
+                    success, error, attempts, latency, phases, artifact_id
+                )
+                if success:
+                    mark_submitted(index)
+                
+                progress_extra: dict[str, Any] = {'row_latency_ms': round(latency * 1000, 1)}
+                if rate_limiter:
+                    progress_extra['rate_limit'] = rate_limiter.to_dict()
+                if idx % RSS_SAMPLE_EVERY_ROWS == 0:
+                    health.sample(state.driver)
+                    if health.last_rss is not None:
+                        progress_extra['browser_rss_mb'] = round(health.last_rss / (1024 * 1024), 1)
+                progress_extra['driver_health'] = health.to_dict()
+                if state.navigator:
+                    progress_extra['navigation'] = state.navigator.to_dict()
+                
+                update_progress(
+                    rows_before + idx + 1, state.stats.total,
+                    state.stats.success,
+                    state.stats.failed,
+                    extra=progress_extra
+                )
+                
+                if config.write_back and config.write_back_checkpoint and (idx + 1) % config.write_back_checkpoint == 0:
+                    write_back_results()
+                
+                recycle_reason = health.recycle_reason()
+                if recycle_reason:
+                    health.recycles += 1
+                    relaunch_driver(state, config, recycle_reason)
+                    health.launched()
+                
+                state.control.sleep(config.delay)
+            
+            rows_before = state.stats.total
+        
+        record_benchmark_run(
+            config,
+            [outcome for sheet_run in state.sheet_runs.values() for outcome in sheet_run.outcomes.values()],
+            health.rss_samples
+        )
+        
+        if dry_run:
+            publish_forecast(state, [
+                outcome.phases
+                for sheet_run in state.sheet_runs.values()
+                for outcome in sheet_run.outcomes.values()
+                if outcome.phases
+            ], planned_rows, dry_run)
+        
+        # Summary
+        log_message('═' * 40, 'info')
+        log_message(
+            f'✅ Completed! Success: {state.stats.success}, Failed: {state.stats.failed}, '
+            f'Skipped: {state.stats.skipped}, Rejected: {state.stats.rejected}',
+            'success'
+        )
+        
+        if state.failed_rows:
+            log_message(
+                f'⚠️ {len(state.failed_rows)} rows failed. Check failed rows for details.',
+                'warning'
+            )
+        
+        navigator = tab_pool.navigator if tab_pool else state.navigator
+        if navigator and navigator.restores:
+            log_message(f'🧭 Form after submit: {navigator.summary()}', 'info')
+        
+        if tab_pool:
+            for tab in tab_pool.to_dict():
+                log_message(
+                    f"🗂️ Tab {tab['tab']}: {tab['rows']} rows, {tab['rows_per_minute']}/min, "
+                    f"busy {tab['busy_share']:.0%}",
+                    'info'
+                )
+            if health.rss_samples:
+                log_message(f'🧠 Browser memory peak: {max(health.rss_samples) // (1024 * 1024)} MB', 'info')
+        
+        publish_event('automation_complete', {
+            **state.stats.to_dict(),
+            'failed_rows': [fr.to_dict() for fr in state.failed_rows]
+        }, run_id)
+        publish_event('play_sound', {'type': 'complete'}, run_id)
+        
+    except BrowserInitError as e:
+        state.error = str(e)
+        log_message(f'Browser Error: {e}', 'error')
+        publish_event('automation_error', {'error': str(e)}, run_id)
+        publish_event('play_sound', {'type': 'error'}, run_id)
+    except AutomationError as e:
+        state.error = str(e)
+        log_message(f'Automation Error: {e}', 'error')
+        publish_event('automation_error', {'error': str(e)}, run_id)
+        publish_event('play_sound', {'type': 'error'}, run_id)
+    except Exception as e:
+        state.error = str(e)
+        log_message(f'Unexpected Error: {e}', 'error')
+        publish_event('automation_error', {'error': str(e)}, run_id)
+        publish_event('play_sound', {'type': 'error'}, run_id)
+    
+    finally:
+        run_profiler.finish()
+        try:
+            submission_index.record(submission_scope, submitted_hashes)
+        except sqlite3.Error as e:
+            log_message(f'Failed to update submission index: {e}', 'warning')
+        
+        if config.write_back:
+            write_back_results()
+        
+        if state.should_stop:
+            run_history.finish_run(state, 'stopped')
+        else:
+            run_history.finish_run(state, 'error' if state.error else 'completed')
+        run_history.flush()
+        history_error = run_history.take_error()
+        if history_error:
+            log_message(f'Failed to record run history: {history_error}', 'warning')
+        
+        # Clean up driver
+        if state.driver:
+            try:
+                state.driver.quit()
+            except WebDriverException:
+                pass  # Ignore errors during cleanup
+            state.driver = None
+        
+        with state_lock:
+            state.cleanup_after_run()
+        upload_store.unpin(run_file)
+        publish_event('automation_stopped', run_id=run_id)
+
+
+# =============================================================================
+# File Management
+# =============================================================================
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded files.
+    
+    Uploads are stored under the SHA-256 of their contents, so identical
+    files uploaded under different names share one copy on disk. A
+    background janitor thread enforces an age limit and a total disk quota,
+    evicting least-recently-used files first and never touching pinned
+    files (those used by a running or queued job) or the loaded dataset.
+    Parsed sheets spilled to the DATASET_CACHE_FOLDER cache count toward
+    the quota too; evicting one only means the sheet is parsed again.
+    """
+    
+    def __init__(self, folder: Path, max_age: int, quota_bytes: int, interval: int) -> None:
+        self.folder = folder
+        self.max_age = max_age
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self._pins: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.housekeeping: list[Callable[[], None]] = []
+    
+    def store(self, stream: Any, filename: str) -> Path:
+        """
+        Save an upload stream under its content hash.
+        
+        The stream is hashed while it is written to a temporary file. If a
+        file with the same hash already exists, the temporary copy is
+        discarded and the existing file is marked as recently used.
+        
+        Args:
+            stream: Readable binary stream of the uploaded file.
+            filename: Original file name (used for its extension only).
+        
+        Returns:
+            Path of the stored file.
+        """
+        digest = hashlib.sha256()
+        temp_path = self.folder / f".{secrets.token_hex(8)}.part"
+        try:
+            with temp_path.open('wb') as f:
+                while chunk := stream.read(UPLOAD_HASH_CHUNK_BYTES):
+                    digest.update(chunk)
+                    f.write(chunk)
+            target = self.folder / f"{digest.hexdigest()}{Path(filename).suffix.lower()}"
+            with self._lock:
+                if target.exists():
+                    temp_path.unlink()
+                    self.touch(target)
+                else:
+                    os.replace(temp_path, target)
+            return target
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def touch(self, path: Path | str) -> None:
+        """Mark a stored file as recently used for LRU eviction."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def pin(self, path: Optional[str]) -> None:
+        """Protect a file from eviction until a matching unpin()."""
+        if path:
+            with self._lock:
+                self._pins[str(Path(path).resolve())] += 1
+            self.touch(path)
+    
+    def unpin(self, path: Optional[str]) -> None:
+        """Release a pin taken with pin()."""
+        if path:
+            key = str(Path(path).resolve())
+            with self._lock:
+                self._pins[key] -= 1
+                if self._pins[key] <= 0:
+                    del self._pins[key]
+    
+    def discard(self, path: Optional[str]) -> bool:
+        """
+        Delete a stored file unless it is pinned.
+        
+        Returns:
+            True if the file was removed.
+        """
+        if not path:
+            return False
+        with self._lock:
+            if str(Path(path).resolve()) in self._pins:
+                return False
+            try:
+                Path(path).unlink()
+                return True
+            except OSError:
+                return False
+    
+    def _protected(self) -> set[str]:
+        """Paths that must survive a sweep."""
+        protected = set(self._pins)
+        for path in (automation_state.file_path, automation_state.results_path):
+            if path:
+                protected.add(str(Path(path).resolve()))
+        return protected
+    
+    def sweep(self) -> int:
+        """
+        Remove expired files, then evict LRU files until under quota.
+        
+        Uploads still being written (.part files) count toward the quota
+        but are only removed once expired, i.e. left over from an upload
+        that never finished.
+        
+        Returns:
+            Number of files removed.
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            protected = self._protected()
+            entries: list[tuple[float, int, Path]] = []
+            for folder in (self.folder, self.folder / DATASET_CACHE_FOLDER):
+                try:
+                    scan = list(os.scandir(folder))
+                except FileNotFoundError:
+                    continue
+                for entry in scan:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Renamed or removed since the scan
+                    entries.append((info.st_mtime, info.st_size, Path(entry.path)))
+            
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for mtime, size, path in entries:
+                expired = now - mtime > self.max_age
+                over_quota = total > self.quota_bytes and path.suffix != '.part'
+                if not (expired or over_quota) or str(path.resolve()) in protected:
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        return removed
+    
+    def _run_janitor(self) -> None:
+        """Janitor loop; sweeps and runs housekeeping tasks every `interval` seconds until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except OSError as e:
+                log_message(f"Failed to cleanup uploads: {e}", 'warning')
+            for task in self.housekeeping:
+                try:
+                    task()
+                except Exception as e:
+                    log_message(f"Housekeeping task failed: {e}", 'warning')
+    
+    def start_janitor(self) -> None:
+        """Start the background janitor thread if it is not running."""
+        with self._lock:
+            if self._janitor and self._janitor.is_alive():
+                return
+            self._stop.clear()
+            self._janitor = threading.Thread(target=self._run_janitor, name='upload-janitor', daemon=True)
+            self._janitor.start()
+    
+    def stop_janitor(self) -> None:
+        """Signal the janitor thread to exit."""
+        self._stop.set()
+
+
+upload_store = UploadStore(
+    Path(app.config['UPLOAD_FOLDER']),
+    max_age=FILE_CLEANUP_AGE_SECONDS,
+    quota_bytes=UPLOAD_QUOTA_BYTES,
+    interval=JANITOR_INTERVAL_SECONDS
+)
+
+
+def validate_excel_file(filename: str) -> None:
+    """
+    Validate that the uploaded file is an Excel file.
+    
+    Args:
+        filename: Name of the uploaded file.
+    
+    Raises:
+        FileValidationError: If the file extension is not allowed.
+    """
+    file_ext = Path(filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise FileValidationError(
+            f"Invalid file type '{file_ext}'. "
+            f"Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+
+# =============================================================================
+# Workbook Sheets
+# =============================================================================
+
+# Called with (rows parsed, bytes read, early preview frame or None)
+SheetProgress = Callable[[int, int, Optional[pd.DataFrame]], None]
+
+
+def _read_sheet_dimension(archive: zipfile.ZipFile, part: str) -> tuple[Optional[int], Optional[int]]:
+    """
+    Read a worksheet's dimensions from its <dimension> element.
+    
+    Only the head of the worksheet XML (before <sheetData>) is read, so no
+    cell data is decompressed or parsed.
+    
+    Counts follow pd.read_excel(), which reads from cell A1 whatever the
+    range's first cell is: Excel row 1 is the header and blank leading
+    columns become 'Unnamed' columns.
+    
+    Returns:
+        Tuple of (data rows excluding the header, columns), or (None, None)
+        if the sheet has no usable dimension.
+    """
+    from openpyxl.utils import column_index_from_string
+    
+    head = ''
+    with archive.open(part) as stream:
+        while '<sheetData' not in head and len(head) < 1024 * 1024:
+            chunk = stream.read(16 * 1024)
+            if not chunk:
+                break
+            head += chunk.decode('utf-8', errors='ignore')
+    
+    match = _DIMENSION_PATTERN.search(head)
+    if not match or not match.group(3):
+        return None, None
+    return int(match.group(4)) - 1, column_index_from_string(match.group(3))
+
+
+def read_sheet_metadata(filepath: Path) -> list[SheetInfo]:
+    """
+    List the sheets of a workbook with their dimensions.
+    
+    For .xlsx files this only reads workbook metadata and the head of each
+    worksheet. Other formats fall back to listing sheet names through
+    pandas, without dimensions.
+    
+    Raises:
+        FileValidationError: If the workbook has no sheets.
+    """
+    sheets: list[SheetInfo] = []
+    if zipfile.is_zipfile(filepath):
+        with zipfile.ZipFile(filepath) as archive:
+            for name, part in list_sheet_parts(archive):
+                try:
+                    rows, columns = _read_sheet_dimension(archive, part)
+                except KeyError:
+                    rows, columns = None, None
+                sheets.append(SheetInfo(name=name, rows=rows, columns=columns))
+    else:
+        with pd.ExcelFile(filepath) as workbook:
+            sheets = [SheetInfo(name=str(name)) for name in workbook.sheet_names]
+    
+    if not sheets:
+        raise FileValidationError('The workbook contains no sheets')
+    return sheets
+
+
+class _CountingReader:
+    """Binary file wrapper that counts the bytes read through it."""
+    
+    def __init__(self, handle: Any) -> None:
+        self._handle = handle
+        self.bytes_read = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._handle.read(size)
+        self.bytes_read += len(data)
+        return data
+    
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._handle.seek(offset, whence)
+    
+    def tell(self) -> int:
+        return self._handle.tell()
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readable(self) -> bool:
+        return True
+
+
+def _excel_cell(cell: Any) -> Any:
+    """Convert an openpyxl cell the way pandas' openpyxl reader does."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+    
+    if cell.value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        integral = int(cell.value)
+        return integral if integral == cell.value else float(cell.value)
+    return cell.value
+
+
+def parse_sheet(filepath: Path, name: str, progress: Optional[SheetProgress] = None) -> pd.DataFrame:
+    """
+    Parse one sheet, the same as pd.read_excel(), reporting progress.
+    
+    .xlsx sheets are streamed with openpyxl in read-only mode and the
+    collected cells go through the same TextParser step as read_excel(),
+    so dtypes and values match. Every INGEST_CHUNK_ROWS rows, `progress`
+    is called with the rows and bytes read so far; the first call also
+    gets the rows parsed so far as a DataFrame for an early preview.
+    Legacy .xls files are parsed in one step.
+    
+    Args:
+        filepath: Path of the workbook.
+        name: Sheet name.
+        progress: Optional progress callback.
+    
+    Returns:
+        The parsed sheet.
+    """
+    if filepath.suffix.lower() != '.xlsx':
+        df = pd.read_excel(filepath, sheet_name=name)
+        if progress:
+            progress(len(df), filepath.stat().st_size, df.head(PREVIEW_ROW_COUNT))
+        return df
+    
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+    
+    def to_frame(rows: list[list[Any]]) -> pd.DataFrame:
+        if not rows:
+            return pd.DataFrame()
+        # Pad rows to the widest one, as read_excel() does
+        width = max(len(row) for row in rows)
+        try:
+            return TextParser(
+                [row + [''] * (width - len(row)) for row in rows], header=0, skip_blank_lines=False
+            ).read()
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+    
+    with filepath.open('rb') as handle:
+        reader = _CountingReader(handle)
+        book = load_workbook(reader, read_only=True, data_only=True, keep_links=False)
+        try:
+            sheet = book[name]
+            sheet.reset_dimensions()
+            rows: list[list[Any]] = []
+            last_with_data = -1
+            for number, row in enumerate(sheet.rows):
+                values = [_excel_cell(cell) for cell in row]
+                while values and values[-1] == '':
+                    values.pop()
+                if values:
+                    last_with_data = number
+                rows.append(values)
+                if number % INGEST_YIELD_ROWS == 0:
+                    cooperative_yield()
+                if progress and number and number % INGEST_CHUNK_ROWS == 0:
+                    head = to_frame(rows[:PREVIEW_ROW_COUNT + 1]) if number == INGEST_CHUNK_ROWS else None
+                    progress(number, reader.bytes_read, head)
+        finally:
+            book.close()
+    
+    rows = rows[:last_with_data + 1]
+    df = offload(to_frame, rows)
+    if progress:
+        progress(max(len(rows) - 1, 0), filepath.stat().st_size, df.head(PREVIEW_ROW_COUNT))
+    return df
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a parsed sheet to compact dtypes.
+    
+    Text columns with repetitive values become categorical; other object
+    text columns without missing values become Arrow-backed strings when
+    pyarrow is installed. Integer columns are downcast. Columns with mixed
+    types, missing text and floats are left alone, so every value keeps
+    the string form it is submitted and exported with.
+    """
+    try:
+        import pyarrow  # noqa: F401
+        arrow_strings = True
+    except ImportError:
+        arrow_strings = False
+    
+    compact = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.StringDtype):
+            repetitive = series.nunique() <= CATEGORY_MAX_DISTINCT_RATIO * len(series)
+            compact[col] = series.astype('category') if repetitive else series
+        elif series.dtype == object:
+            values = series.dropna()
+            if len(values) == 0 or not values.map(type).eq(str).all():
+                compact[col] = series
+            elif values.nunique() <= CATEGORY_MAX_DISTINCT_RATIO * len(series):
+                compact[col] = series.astype('category')
+            elif arrow_strings and len(values) == len(series):
+                compact[col] = series.astype('string[pyarrow]')
+            else:
+                compact[col] = series
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            compact[col] = pd.to_numeric(series, downcast='integer')
+        else:
+            compact[col] = series
+    return pd.DataFrame(compact, index=df.index)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Memory used by a DataFrame including the contents of object columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class WorkbookSheets:
+    """
+    Lazily parsed, memory-bounded sheets of an uploaded workbook.
+    
+    Sheet names and dimensions come from workbook metadata at upload
+    time. Each sheet is parsed into a compact DataFrame only when first
+    selected for preview or a run. Parsed sheets stay in memory while in
+    use; idle sheets are spilled to a pickle cache on disk and released,
+    and reloading them from the cache is much faster than re-parsing.
+    """
+    
+    def __init__(self, filepath: Path) -> None:
+        self.filepath = filepath
+        self.sheets = read_sheet_metadata(filepath)
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._last_used: dict[str, float] = {}
+        self._spilled: dict[str, Path] = {}
+        self._cache_dir = filepath.parent / DATASET_CACHE_FOLDER
+        self._lock = threading.Lock()
+    
+    @property
+    def names(self) -> list[str]:
+        return [sheet.name for sheet in self.sheets]
+    
+    def load(self, name: str, progress: Optional[SheetProgress] = None) -> pd.DataFrame:
+        """
+        Return a sheet's DataFrame, parsing it on first use.
+        
+        Args:
+            name: Sheet name.
+            progress: Progress callback for parse_sheet(), if the sheet
+                has to be parsed.
+        
+        Raises:
+            FileValidationError: If the sheet does not exist.
+        """
+        if name not in self.names:
+            raise FileValidationError(f"Sheet '{name}' not found in workbook")
+        with self._lock:
+            frame = self._frames.get(name)
+            if frame is None:
+                spilled = self._spilled.pop(name, None)
+                if spilled is not None:
+                    try:
+                        frame = pd.read_pickle(spilled)
+                        self._spilled[name] = spilled
+                    except OSError:
+                        pass  # Evicted by the upload janitor
+                if frame is None:
+                    frame = compact_frame(parse_sheet(self.filepath, name, progress))
+                self._frames[name] = frame
+            self._last_used[name] = time.time()
+            return frame
+    
+    def touch(self, name: str) -> None:
+        """Mark a sheet as in use so it is not released as idle."""
+        with self._lock:
+            if name in self._frames:
+                self._last_used[name] = time.time()
+    
+    def release_idle(self, max_idle: float) -> list[str]:
+        """
+        Spill sheets unused for max_idle seconds to disk and drop them.
+        
+        Returns:
+            Names of the released sheets.
+        """
+        now = time.time()
+        released = []
+        with self._lock:
+            for name, frame in list(self._frames.items()):
+                if now - self._last_used.get(name, 0) < max_idle:
+                    continue
+                if name not in self._spilled:
+                    path = self._cache_dir / f'{self.filepath.stem}-{self.names.index(name)}.pkl'
+                    try:
+                        self._cache_dir.mkdir(parents=True, exist_ok=True)
+                        frame.to_pickle(path)
+                    except OSError:
+                        continue  # Keep it in memory rather than re-parse later
+                    self._spilled[name] = path
+                del self._frames[name]
+                released.append(name)
+        return released
+    
+    def close(self) -> None:
+        """Drop all parsed sheets and delete their spill files."""
+        with self._lock:
+            self._frames.clear()
+            for path in self._spilled.values():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._spilled.clear()
+    
+    def memory_report(self) -> list[dict[str, Any]]:
+        """Per-sheet state ('parsed', 'spilled' or 'not parsed') and footprint."""
+        with self._lock:
+            frames = dict(self._frames)
+            spilled = dict(self._spilled)
+            last_used = dict(self._last_used)
+        report = []
+        for sheet in self.sheets:
+            frame = frames.get(sheet.name)
+            entry: dict[str, Any] = {'sheet': sheet.name, 'rows': sheet.rows}
+            if frame is not None:
+                entry.update({
+                    'state': 'parsed',
+                    'bytes': frame_bytes(frame),
+                    'dtypes': {str(col): str(dtype) for col, dtype in frame.dtypes.items()},
+                    'idle_seconds': round(time.time() - last_used.get(sheet.name, time.time()), 1)
+                })
+            elif sheet.name in spilled:
+                path = spilled[sheet.name]
+                entry.update({'state': 'spilled', 'bytes': 0, 'disk_bytes': path.stat().st_size if path.exists() else 0})
+            else:
+                entry.update({'state': 'not parsed', 'bytes': 0})
+            report.append(entry)
+        return report
+
+
+def read_sheet(
+    workbook: WorkbookSheets,
+    name: str,
+    file_info: FileInfo,
+    progress: Optional[SheetProgress] = None
+) -> tuple[pd.DataFrame, DataIndex]:
+    """
+    Parse a sheet if needed and fill the file info from it.
+    
+    Does not touch the automation state, so it can run in the background.
+    
+    Returns:
+        Tuple of (sheet DataFrame, its browse index).
+    
+    Raises:
+        FileValidationError: If the sheet does not exist.
+    """
+    df = workbook.load(name, progress)
+    data_index = DataIndex(df)
+    file_info.sheet = name
+    file_info.rows = len(df)
+    file_info.columns = list(df.columns)
+    file_info.preview = df.head(PREVIEW_ROW_COUNT).to_dict('records')
+    return df, data_index
+
+
+def activate_sheet(workbook: WorkbookSheets, name: str, file_info: FileInfo) -> None:
+    """
+    Make a sheet the current dataset.
+    
+    Parses the sheet if needed, builds its browse index and updates the
+    state's data and file info so preview, data browser and runs use it.
+    """
+    df, data_index = read_sheet(workbook, name, file_info)
+    
+    with state_lock:
+        automation_state.data = df
+        automation_state.data_index = data_index
+        automation_state.sheet_name = name
+        automation_state.file_info = file_info
+
+
+def install_workbook(workbook: WorkbookSheets, file_info: FileInfo, df: pd.DataFrame, data_index: DataIndex) -> None:
+    """
+    Make a workbook with a parsed sheet (from read_sheet()) the loaded dataset.
+    
+    The previously loaded workbook is closed unless a run still uses it.
+    """
+    with state_lock:
+        previous = automation_state.workbook
+        automation_state.file_path = str(workbook.filepath)
+        automation_state.workbook = workbook
+        automation_state.data = df
+        automation_state.data_index = data_index
+        automation_state.sheet_name = file_info.sheet
+        automation_state.file_info = file_info
+    if previous is not None and previous is not workbook and not automation_state.is_running:
+        previous.close()
+
+
+def open_workbook(filepath: Path, filename: str, sheet: Optional[str] = None) -> FileInfo:
+    """
+    Make an Excel file the loaded dataset.
+    
+    All sheets are listed from workbook metadata; only the selected sheet
+    (the first by default) is parsed.
+    
+    Args:
+        filepath: Path of the Excel file.
+        filename: Name shown for the file.
+        sheet: Sheet to select initially.
+    
+    Returns:
+        File info of the loaded dataset.
+    
+    Raises:
+        FileValidationError: If the sheet does not exist.
+    """
+    workbook = WorkbookSheets(filepath)
+    file_info = FileInfo(
+        name=filename,
+        rows=0,
+        columns=[],
+        size=filepath.stat().st_size,
+        preview=[],
+        sheets=workbook.sheets
+    )
+    df, data_index = read_sheet(workbook, sheet or workbook.names[0], file_info)
+    install_workbook(workbook, file_info, df, data_index)
+    return file_info
+
+
+def current_dataset() -> tuple[Optional[pd.DataFrame], Optional[DataIndex]]:
+    """
+    Return the current sheet's data and browse index.
+    
+    Reloads them (from the spill cache) if they were released while
+    idle, and marks the sheet as in use.
+    """
+    with state_lock:
+        data = automation_state.data
+        data_index = automation_state.data_index
+        workbook = automation_state.workbook
+        sheet = automation_state.sheet_name
+        file_info = automation_state.file_info
+    if workbook is None or sheet is None:
+        return data, data_index
+    if data is None and file_info is not None:
+        activate_sheet(workbook, sheet, file_info)
+        with state_lock:
+            return automation_state.data, automation_state.data_index
+    workbook.touch(sheet)
+    return data, data_index
+
+
+def release_idle_dataset() -> None:
+    """Spill idle sheets of the loaded workbook and drop the state's references."""
+    with state_lock:
+        workbook = automation_state.workbook
+    if workbook is None:
+        return
+    released = workbook.release_idle(DATASET_IDLE_SECONDS)
+    with state_lock:
+        if automation_state.workbook is workbook and automation_state.sheet_name in released:
+            automation_state.data = None
+            automation_state.data_index = None
+
+
+upload_store.housekeeping.append(release_idle_dataset)
+
+
+def _approx_bytes(items: list[Any]) -> int:
+    """Estimate the memory of a list of similar objects from its first item."""
+    if not items:
+        return sys.getsizeof(items)
+    sample = items[0]
+    per_item = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in getattr(sample, '__dict__', {}).values())
+    return sys.getsizeof(items) + per_item * len(items)
+
+
+def memory_report() -> dict[str, Any]:
+    """
+    Report the memory footprint of the loaded dataset and the current job.
+    
+    Dataset figures are exact (deep DataFrame memory usage); job figures
+    are estimates from a sample object.
+    """
+    with state_lock:
+        workbook = automation_state.workbook
+        data_index = automation_state.data_index
+        file_info = automation_state.file_info
+        outcomes = [outcome for sheet_run in automation_state.sheet_runs.values() for outcome in sheet_run.outcomes.values()]
+        failed_rows = list(automation_state.failed_rows)
+        logs = list(automation_state.logs)
+        timings = list(row_timings)
+    
+    datasets = []
+    if workbook is not None:
+        sheets = workbook.memory_report()
+        index_bytes = data_index.memory_bytes() if data_index is not None else 0
+        datasets.append({
+            'file': file_info.name if file_info else workbook.filepath.name,
+            'current_sheet': automation_state.sheet_name,
+            'sheets': sheets,
+            'index_bytes': index_bytes,
+            'bytes': sum(sheet['bytes'] for sheet in sheets) + index_bytes
+        })
+    
+    job = {
+        'run_id': automation_state.run_id,
+        'running': automation_state.is_running,
+        'row_outcomes': len(outcomes),
+        'failed_rows': len(failed_rows),
+        'logs': len(logs),
+        'row_timings': len(timings),
+        'bytes': _approx_bytes(outcomes) + _approx_bytes(failed_rows) + _approx_bytes(logs) + _approx_bytes(timings)
+    }
+    
+    process_rss = None
+    try:
+        import psutil
+        process_rss = psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    
+    return {'process_rss_bytes': process_rss, 'datasets': datasets, 'job': job}
+
+
+# =============================================================================
+# Upload Ingest
+# =============================================================================
+
+@dataclass
+class IngestJob:
+    """Background parse of an uploaded workbook."""
+    
+    job_id: str
+    filename: str
+    filepath: Path
+    size: int
+    seq: int
+    status: str = INGEST_QUEUED
+    sheet: Optional[str] = None
+    rows_total: Optional[int] = None
+    rows_parsed: int = 0
+    bytes_read: int = 0
+    columns: list[str] = field(default_factory=list)
+    preview: list[dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    active: bool = False
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    file_info: Optional[FileInfo] = None
+    workbook: Optional[WorkbookSheets] = None
+    
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds until parsing finishes, from rows (or bytes) done so far."""
+        if self.status != INGEST_PARSING or self.started_at is None:
+            return None
+        if self.rows_total and self.rows_parsed:
+            done = self.rows_parsed / self.rows_total
+        elif self.bytes_read and self.size:
+            done = self.bytes_read / self.size
+        else:
+            return None
+        done = min(done, 1.0)
+        return round((time.time() - self.started_at) * (1 - done) / done, 1)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'job_id': self.job_id,
+            'filename': self.filename,
+            'size': self.size,
+            'status': self.status,
+            'sheet': self.sheet,
+            'rows_total': self.rows_total,
+            'rows_parsed': self.rows_parsed,
+            'bytes_read': self.bytes_read,
+            'eta_seconds': self.eta_seconds(),
+            'columns': self.columns,
+            'preview': self.preview,
+            'error': self.error,
+            'active': self.active,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'file': self.file_info.to_dict() if self.file_info and self.status == INGEST_READY else None
+        }
+
+
+class IngestManager:
     """
-    Process a single data row with retry logic.
+    Parses uploaded workbooks on a bounded pool of background threads.
+    
+    An upload is stored and handed over as a job, so the request returns
+    at once. Each job parses the workbook's first sheet, publishing
+    'ingest_progress' events with rows and bytes read and an ETA; the
+    first chunk already provides a preview. When a job finishes, it
+    becomes the loaded dataset unless a newer upload already has (or a
+    run is in progress); other finished jobs keep their parsed sheet
+    spilled to disk until activated. Files of jobs still listed are
+    pinned in the upload store.
+    """
+    
+    def __init__(self, max_workers: int, history: int) -> None:
+        self.max_workers = max_workers
+        self.history = history
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._active_seq = 0
+    
+    def submit(self, filepath: Path, filename: str) -> IngestJob:
+        """
+        Queue a stored upload for parsing.
+        
+        Args:
+            filepath: Path of the stored file.
+            filename: Name shown for the file.
+        
+        Returns:
+            The queued job.
+        """
+        upload_store.pin(str(filepath))
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ingest')
+            self._seq += 1
+            job = IngestJob(
+                job_id=secrets.token_hex(8),
+                filename=filename,
+                filepath=filepath,
+                size=filepath.stat().st_size,
+                seq=self._seq
+            )
+            self._jobs[job.job_id] = job
+            expired = self._expire()
+        for old in expired:
+            self._release(old)
+        self._publish(job)
+        self._executor.submit(self._run, job)
+        return job
+    
+    def _expire(self) -> list[IngestJob]:
+        """Drop the oldest finished, inactive jobs beyond the history limit (lock held)."""
+        expired = []
+        for job in list(self._jobs.values()):
+            if len(self._jobs) <= self.history:
+                break
+            if job.status in (INGEST_READY, INGEST_FAILED) and not job.active:
+                expired.append(self._jobs.pop(job.job_id))
+        return expired
+    
+    def _release(self, job: IngestJob) -> None:
+        """Unpin a dropped job's file and free its parsed sheets."""
+        if job.status == INGEST_READY:
+            upload_store.unpin(str(job.filepath))
+        if job.workbook is not None and job.workbook is not automation_state.workbook:
+            job.workbook.close()
+        job.workbook = None
+    
+    def _publish(self, job: IngestJob) -> None:
+        """Broadcast a job's state."""
+        publish_event('ingest_progress', job.to_dict())
+    
+    def _run(self, job: IngestJob) -> None:
+        """Parse a job's workbook (executor thread)."""
+        job.status = INGEST_PARSING
+        job.started_at = time.time()
+        self._publish(job)
+        last_publish = time.monotonic()
+        
+        def progress(rows: int, bytes_read: int, head: Optional[pd.DataFrame]) -> None:
+            nonlocal last_publish
+            job.rows_parsed = rows
+            job.bytes_read = min(bytes_read, job.size)
+            first_chunk = head is not None and not job.preview
+            if first_chunk:
+                job.columns = [str(column) for column in head.columns]
+                job.preview = head.head(PREVIEW_ROW_COUNT).to_dict('records')
+            if first_chunk or time.monotonic() - last_publish >= INGEST_PROGRESS_SECONDS:
+                last_publish = time.monotonic()
+                self._publish(job)
+        
+        try:
+            workbook = WorkbookSheets(job.filepath)
+            if not workbook.sheets:
+                raise FileValidationError('The workbook has no sheets')
+            job.sheet = workbook.names[0]
+            job.rows_total = workbook.sheets[0].rows
+            file_info = FileInfo(
+                name=job.filename,
+                rows=0,
+                columns=[],
+                size=job.size,
+                preview=[],
+                sheets=workbook.sheets
+            )
+            df, data_index = read_sheet(workbook, job.sheet, file_info, progress)
+        except FileValidationError as e:
+            self._fail(job, str(e))
+            return
+        except pd.errors.EmptyDataError:
+            self._fail(job, 'The Excel file is empty')
+            return
+        except pd.errors.ParserError as e:
+            self._fail(job, f'Failed to parse Excel file: {e}')
+            return
+        except OSError as e:
+            self._fail(job, f'File system error: {e}')
+            return
+        except Exception as e:
+            self._fail(job, f'Unexpected error: {e}')
+            return
+        
+        job.file_info = file_info
+        job.workbook = workbook
+        job.rows_parsed = len(df)
+        job.bytes_read = job.size
+        job.columns = [str(column) for column in file_info.columns]
+        job.preview = file_info.preview
+        
+        with self._lock:
+            activate = job.seq > self._active_seq and not automation_state.is_running
+            if activate:
+                self._active_seq = job.seq
+        if activate:
+            install_workbook(workbook, file_info, df, data_index)
+            self._mark_active(job)
+        else:
+            # Kept on disk until activated; the loaded dataset stays as it is
+            workbook.release_idle(0)
+        
+        job.status = INGEST_READY
+        job.finished_at = time.time()
+        log_message(f'File loaded: {job.filename} ({len(df)} rows, {job.finished_at - job.started_at:.1f}s)', 'success')
+        self._publish(job)
+    
+    def _fail(self, job: IngestJob, error: str) -> None:
+        """Finish a job as failed and report why."""
+        job.error = error
+        job.status = INGEST_FAILED
+        job.finished_at = time.time()
+        upload_store.unpin(str(job.filepath))
+        log_message(f'Failed to load {job.filename}: {error}', 'error')
+        self._publish(job)
+    
+    def _mark_active(self, job: IngestJob) -> None:
+        """Flag a job as the loaded dataset."""
+        with self._lock:
+            for other in self._jobs.values():
+                other.active = other is job
+    
+    def activate(self, job_id: str) -> IngestJob:
+        """
+        Make a finished job's workbook the loaded dataset.
+        
+        Raises:
+            FileValidationError: If the job is unknown or not ready.
+        """
+        job = self.get(job_id)
+        if job is None or job.status != INGEST_READY or job.file_info is None:
+            raise FileValidationError('Upload is not ready to be loaded')
+        workbook = job.workbook or WorkbookSheets(job.filepath)
+        df, data_index = read_sheet(workbook, job.sheet or workbook.names[0], job.file_info)
+        with self._lock:
+            self._active_seq = max(self._active_seq, job.seq)
+        job.workbook = workbook
+        install_workbook(workbook, job.file_info, df, data_index)
+        self._mark_active(job)
+        self._publish(job)
+        return job
+    
+    def forget(self, filepath: Optional[str]) -> None:
+        """Drop finished jobs of a file (e.g. when it is cleared), releasing their pins."""
+        if not filepath:
+            return
+        with self._lock:
+            dropped = [
+                self._jobs.pop(job.job_id) for job in list(self._jobs.values())
+                if str(job.filepath) == filepath and job.status in (INGEST_READY, INGEST_FAILED)
+            ]
+        for job in dropped:
+            job.active = False
+            self._release(job)
+    
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """Look up a job."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Jobs, newest first, and pool size."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'max_workers': self.max_workers,
+            'jobs': [job.to_dict() for job in reversed(jobs)]
+        }
+
+
+def ingest_workers() -> int:
+    """Number of uploads parsed concurrently, from INGEST_WORKERS_ENV."""
+    try:
+        return max(1, int(os.environ.get(INGEST_WORKERS_ENV, DEFAULT_INGEST_WORKERS)))
+    except ValueError:
+        return DEFAULT_INGEST_WORKERS
+
+
+ingest_manager = IngestManager(ingest_workers(), INGEST_JOB_HISTORY)
+
+
+# =============================================================================
+# Data Browser
+# =============================================================================
+
+class DataIndex:
+    """
+    Browse index over an uploaded DataFrame.
+    
+    String views of columns, per-column statistics and sort orders are
+    computed on first use, and the row positions matching a filter/sort
+    query are cached. String views of categorical columns stay
+    categorical, so they cost one code per row. Paging through a cached
+    query only slices a position array and the requested rows, so each
+    page request is O(page).
+    """
+    
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+        self.columns = [str(col) for col in data.columns]
+        self._text: dict[str, pd.Series] = {}
+        self._stats: Optional[dict[str, dict[str, Any]]] = None
+        self._orders: dict[str, tuple[np.ndarray, int]] = {}
+        self._queries: OrderedDict[tuple[Any, ...], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _column(self, name: str) -> pd.Series:
+        return self.data[self.data.columns[self.columns.index(name)]]
+    
+    def _text_of(self, name: str, cache: bool = True) -> pd.Series:
+        """String view of a column with '' for nulls, cached per column."""
+        text = self._text.get(name)
+        if text is None:
+            series = self._column(name)
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # compact_frame only categorizes all-string columns
+                text = series if '' in series.cat.categories else series.cat.add_categories([''])
+                text = text.fillna('')
+            elif isinstance(series.dtype, pd.StringDtype):
+                text = series.fillna('')
+            else:
+                text = series.astype(str).where(series.notna(), '')
+            if cache:
+                self._text[name] = text
+        return text
+    
+    @property
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-column statistics, computed on first use."""
+        with self._lock:
+            if self._stats is None:
+                self._stats = {
+                    name: self._column_stats(self._column(name), self._text_of(name, cache=False))
+                    for name in self.columns
+                }
+            return self._stats
+    
+    def memory_bytes(self) -> int:
+        """Memory held by cached string views, sort orders and query results."""
+        with self._lock:
+            text = sum(int(series.memory_usage(index=False, deep=True)) for series in self._text.values())
+            orders = sum(order.nbytes for order, _ in self._orders.values())
+            queries = sum(positions.nbytes for positions in self._queries.values())
+        return text + orders + queries
+    
+    @staticmethod
+    def _column_stats(series: pd.Series, text: pd.Series) -> dict[str, Any]:
+        """Compute null count, distinct count and min/max string length."""
+        lengths = text[series.notna()].astype(str).str.len()
+        return {
+            'nulls': int(series.isna().sum()),
+            'distinct': int(series.nunique(dropna=True)),
+            'min_length': int(lengths.min()) if len(lengths) else 0,
+            'max_length': int(lengths.max()) if len(lengths) else 0
+        }
+    
+    def _order(self, column: str, descending: bool) -> np.ndarray:
+        """Sorted row positions for a column with nulls last, cached per column."""
+        cached = self._orders.get(column)
+        if cached is None:
+            series = self._column(column).reset_index(drop=True)
+            try:
+                order = series.sort_values(kind='mergesort', na_position='last').index.to_numpy()
+            except TypeError:
+                order = self._text_of(column).reset_index(drop=True).sort_values(kind='mergesort').index.to_numpy()
+            cached = (order, int(series.isna().sum()))
+            self._orders[column] = cached
+        order, nulls = cached
+        if not descending:
+            return order
+        split = len(order) - nulls
+        return np.concatenate([order[:split][::-1], order[split:]])
+    
+    def _match(self, text: str, column: Optional[str], regex: bool, case: bool) -> np.ndarray:
+        """Boolean mask of rows whose text matches the filter."""
+        targets = [column] if column else self.columns
+        mask = np.zeros(len(self.data), dtype=bool)
+        for name in targets:
+            mask |= self._text_of(name).str.contains(text, case=case, regex=regex, na=False).to_numpy(dtype=bool)
+        return mask
+    
+    def query(
+        self,
+        text: str = '',
+        column: Optional[str] = None,
+        regex: bool = False,
+        case: bool = False,
+        sort: Optional[str] = None,
+        descending: bool = False
+    ) -> np.ndarray:
+        """
+        Return the row positions matching a filter in sort order.
+        
+        Raises:
+            KeyError: If the filter or sort column does not exist.
+            re.error: If a regex filter is invalid.
+        """
+        for name in (column, sort):
+            if name and name not in self.columns:
+                raise KeyError(name)
+        if regex and text:
+            re.compile(text)
+        
+        key = (text, column, regex, case, sort, descending)
+        with self._lock:
+            cached = self._queries.get(key)
+            if cached is not None:
+                self._queries.move_to_end(key)
+                return cached
+            
+            if sort:
+                positions = self._order(sort, descending)
+            else:
+                positions = np.arange(len(self.data))
+                if descending:
+                    positions = positions[::-1]
+            if text:
+                positions = positions[self._match(text, column, regex, case)[positions]]
+            
+            self._queries[key] = positions
+            if len(self._queries) > DATA_QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+            return positions
+    
+    def page(self, positions: np.ndarray, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Materialize one page of rows as JSON-safe records."""
+        selected = positions[offset:offset + limit]
+        page = self.data.iloc[selected].astype(object)
+        page = page.where(page.notna(), None)
+        records = []
+        for position, values in zip(selected, page.itertuples(index=False, name=None)):
+            record = {'_row': int(position) + 1}
+            record.update(zip(self.columns, (_json_value(v) for v in values)))
+            records.append(record)
+        return records
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a cell value into something jsonify can serialize."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    return str(value)
+
+
+# =============================================================================
+# Result Export
+# =============================================================================
+
+class _ChunkPipe:
+    """
+    Write-only, non-seekable file object feeding a bounded queue.
+    
+    Lets writers that expect a file (zip archives, Parquet) produce output
+    in a background thread while a response generator drains it, so exports
+    never hold a complete copy of the file in memory.
+    """
+    
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event) -> None:
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data: bytes) -> int:
+        """Queue a chunk, blocking while the consumer catches up."""
+        chunk = bytes(data)
+        while True:
+            if self._cancelled.is_set():
+                raise OSError('Export cancelled by client')
+            try:
+                self._chunks.put(chunk, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._position += len(chunk)
+        return len(chunk)
+    
+    def tell(self) -> int:
+        """Return the number of bytes written so far."""
+        return self._position
+    
+    def seek(self, *args: Any) -> int:
+        """Seeking is not supported; writers fall back to streaming mode."""
+        raise io.UnsupportedOperation('seek')
+    
+    def seekable(self) -> bool:
+        return False
+    
+    def writable(self) -> bool:
+        return True
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+
+
+def stream_from_writer(writer: Callable[[_ChunkPipe], None]) -> Iterator[bytes]:
+    """
+    Run a file writer in a background thread and yield its output.
+    
+    The writer receives a non-seekable file object backed by a bounded
+    queue, so memory use stays constant regardless of output size. If the
+    client disconnects, the writer is cancelled on its next write.
+    
+    Args:
+        writer: Callable that writes the complete file to the given object.
+    
+    Yields:
+        Chunks of the written file as bytes.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    done = object()
+    
+    def _produce() -> None:
+        pipe = _ChunkPipe(chunks, cancelled)
+        outcome: Any = done
+        try:
+            writer(pipe)
+        except Exception as e:
+            outcome = e
+        while not cancelled.is_set():
+            try:
+                chunks.put(outcome, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+    
+    thread = threading.Thread(target=_produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+def stream_csv(header: list[str], rows: Iterator[list[Any]]) -> Iterator[str]:
+    """
+    Encode rows as CSV text in chunks of EXPORT_CHUNK_ROWS rows.
+    
+    Args:
+        header: Column names for the first line.
+        rows: Iterator of row value lists.
+    
+    Yields:
+        CSV text chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def result_columns(data: pd.DataFrame) -> list[str]:
+    """Return the header used by result exports for the given dataset."""
+    return ['row', *[str(col) for col in data.columns], 'status', 'error', 'attempts', 'latency_ms']
+
+
+def iter_result_rows(
+    data: pd.DataFrame,
+    outcomes: dict[int, RowOutcome],
+    start: int,
+    end: int
+) -> Iterator[list[Any]]:
+    """
+    Yield every input row in the range together with its outcome.
+    
+    The DataFrame is walked in slices of EXPORT_CHUNK_ROWS so no full copy
+    of the selected range is made. Rows without a recorded outcome are
+    reported as pending.
+    
+    Args:
+        data: Uploaded dataset.
+        outcomes: Row outcomes keyed by DataFrame index.
+        start: First positional row of the range.
+        end: End (exclusive) positional row of the range.
+    
+    Yields:
+        Lists of [row number, input values..., status, error, attempts, latency_ms].
+    """
+    for chunk_start in range(start, end, EXPORT_CHUNK_ROWS):
+        chunk = data.iloc[chunk_start:min(chunk_start + EXPORT_CHUNK_ROWS, end)]
+        for index, *values in chunk.itertuples(index=True, name=None):
+            outcome = outcomes.get(index)
+            if outcome is None:
+                status, error, attempts, latency_ms = ROW_STATUS_PENDING, None, 0, None
+            else:
+                status, error, attempts = outcome.status, outcome.error, outcome.attempts
+                latency_ms = round(outcome.latency * 1000, 1)
+            yield [
+                index + 1,
+                *[None if _is_missing(v) else v for v in values],
+                status, error, attempts, latency_ms
+            ]
+
+
+def _is_missing(value: Any) -> bool:
+    """Return True for scalar NaN/None/NaT values."""
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+# Static parts of a one-sheet workbook; style 1 formats date cells
+_XLSX_STATIC_PARTS: dict[str, str] = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Results" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+}
+
+_XLSX_SHEET_HEAD: str = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_TAIL: str = '</sheetData></worksheet>'
+
+# Characters XML 1.0 cannot carry; openpyxl rejects them too
+_XML_ILLEGAL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _xlsx_cell(ref: str, value: Any) -> str:
+    """Build the XML of one result cell; None, NaN and infinities stay empty."""
+    if value is None:
+        return ''
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        return f'<c r="{ref}"><v>{float(value)!r}</v></c>' if np.isfinite(value) else ''
+    if isinstance(value, date):
+        moment = value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+        serial = (moment.replace(tzinfo=None) - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="1"><v>{serial!r}</v></c>'
+    text = _XML_ILLEGAL_CHARS.sub('', str(value))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{xml_escape(text)}</t></is></c>'
+
+
+def write_results_xlsx(header: list[str], rows: Iterator[list[Any]], target: Any) -> None:
+    """
+    Write result rows to an XLSX workbook as they are produced.
+    
+    The worksheet XML is written straight into its zip entry, one chunk
+    of EXPORT_CHUNK_ROWS rows at a time, next to fixed workbook parts.
+    Unlike openpyxl's write-only mode, which spools the sheet and builds
+    the archive on save(), the first bytes reach the client at once.
+    Strings are stored inline and dates get a date format.
+    """
+    from openpyxl.utils import get_column_letter
+    
+    letters = [get_column_letter(number) for number in range(1, len(header) + 1)]
+    
+    def _row(number: int, values: list[Any]) -> str:
+        cells = ''.join(_xlsx_cell(f'{letter}{number}', value) for letter, value in zip(letters, values))
+        return f'<row r="{number}">{cells}</row>'
+    
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, xml)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            parts = [_XLSX_SHEET_HEAD, _row(1, header)]
+            for number, row in enumerate(rows, start=2):
+                parts.append(_row(number, row))
+                if len(parts) >= EXPORT_CHUNK_ROWS:
+                    sheet.write(''.join(parts).encode('utf-8'))
+                    parts = []
+            parts.append(_XLSX_SHEET_TAIL)
+            sheet.write(''.join(parts).encode('utf-8'))
+
+
+def write_results_parquet(header: list[str], rows: Iterator[list[Any]], target: Any) -> None:
+    """
+    Write result rows to Parquet, one row group per EXPORT_CHUNK_ROWS rows.
+    
+    Input columns are stored as strings so the schema stays stable across
+    row groups regardless of mixed Excel cell types.
+    
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    input_columns = header[1:-4]
+    schema = pa.schema(
+        [('row', pa.int64())]
+        + [(col, pa.string()) for col in input_columns]
+        + [('status', pa.string()), ('error', pa.string()),
+           ('attempts', pa.int32()), ('latency_ms', pa.float64())]
+    )
+    
+    def _flush(batch: list[list[Any]]) -> None:
+        columns = list(zip(*batch))
+        arrays = [columns[0]]
+        arrays += [[None if v is None else str(v) for v in col] for col in columns[1:-4]]
+        arrays += list(columns[-4:])
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=schema.field(i).type) for i, values in enumerate(arrays)],
+            schema=schema
+        ))
+    
+    with pq.ParquetWriter(target, schema) as writer:
+        batch: list[list[Any]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_CHUNK_ROWS:
+                _flush(batch)
+                batch = []
+        if batch:
+            _flush(batch)
+
+
+# =============================================================================
+# Workbook Write-Back
+# =============================================================================
+
+_ROW_PATTERN = re.compile(r'<row\b([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+_ROW_NUMBER_PATTERN = re.compile(r'\br="(\d+)"')
+_SPANS_PATTERN = re.compile(r'\bspans="(\d+):(\d+)"')
+_CELL_REF_PATTERN = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"')
+_DIMENSION_PATTERN = re.compile(r'<dimension\b[^>]*?\bref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+_SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def list_sheet_parts(archive: zipfile.ZipFile) -> list[tuple[str, str]]:
+    """
+    List worksheets of an XLSX archive in workbook order.
+    
+    Args:
+        archive: Open XLSX archive.
+    
+    Returns:
+        List of (sheet name, worksheet XML path inside the archive).
+    """
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target', '') for rel in rels.iter(f'{_PACKAGE_REL_NS}Relationship')}
+    
+    parts: list[tuple[str, str]] = []
+    for sheet in workbook.iter(f'{_SPREADSHEET_NS}sheet'):
+        target = targets.get(sheet.get(f'{_RELATIONSHIP_NS}id'), '')
+        if target.startswith('/'):
+            part = target.lstrip('/')
+        else:
+            part = str(PurePosixPath('xl') / target)
+        parts.append((sheet.get('name', ''), part))
+    return parts
+
+
+def resolve_sheet_part(archive: zipfile.ZipFile, sheet_name: Optional[str] = None) -> str:
+    """
+    Find the archive path of a worksheet's XML part.
+    
+    Args:
+        archive: Open XLSX archive.
+        sheet_name: Sheet to locate, or None for the first sheet.
+    
+    Returns:
+        Path of the worksheet XML inside the archive.
+    
+    Raises:
+        FileValidationError: If the sheet cannot be found.
+    """
+    for name, part in list_sheet_parts(archive):
+        if sheet_name is None or name == sheet_name:
+            return part
+    
+    raise FileValidationError(f"Sheet '{sheet_name}' not found in workbook")
+
+
+def _inline_cell(ref: str, text: str) -> str:
+    """Build an inline-string cell so sharedStrings.xml stays untouched."""
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{xml_escape(text)}</t></is></c>'
+
+
+def _append_cells_to_sheet(
+    sheet_xml: str,
+    cells_for_row: Callable[[int], str],
+    row_numbers: list[int],
+    last_column: str
+) -> str:
+    """
+    Append cells to rows of a worksheet XML document in a single pass.
     
-    Enters the value into the input field and clicks the submit button.
-    Automatically retries on failure up to the specified limit.
+    Existing rows are extended in place; rows that do not exist yet are
+    inserted in order. Everything outside <sheetData> is preserved except
+    the dimension reference, which is widened to cover the new columns.
     
     Args:
-        driver: WebDriver instance.
-        value: Value to enter into the input field.
-        input_xpath: XPath selector for the input element.
-        submit_xpath: XPath selector for the submit button.
-        retry_count: Current retry attempt (used internally).
-        max_retries: Maximum number of retry attempts.
+        sheet_xml: Worksheet XML text.
+        cells_for_row: Returns the cell XML to append for an Excel row number.
+        row_numbers: Sorted Excel row numbers that receive cells.
+        last_column: Column letter of the last appended column.
     
     Returns:
-        Tuple of (success: bool, error_message: Optional[str]).
+        Updated worksheet XML text.
     """
-    try:
-        # Find and populate input element
-        input_elem = WebDriverWait(driver, ELEMENT_WAIT_TIMEOUT).until(
-            EC.presence_of_element_located((By.XPATH, input_xpath))
-        )
-        input_elem.clear()
-        input_elem.send_keys(str(value))
-        
-        time.sleep(0.3)  # Brief pause for input registration
-        
-        # Find and click submit button
-        submit_elem = WebDriverWait(driver, ELEMENT_WAIT_TIMEOUT).until(
-            EC.element_to_be_clickable((By.XPATH, submit_xpath))
-        )
-        submit_elem.click()
+    from openpyxl.utils import column_index_from_string
+    
+    last_index = column_index_from_string(last_column)
+    open_start = sheet_xml.find('<sheetData')
+    if open_start == -1:
+        return sheet_xml
+    open_end = sheet_xml.index('>', open_start)
+    if sheet_xml[open_end - 1] == '/':
+        head, body, tail = sheet_xml[:open_end - 1] + '>', '', '</sheetData>' + sheet_xml[open_end + 1:]
+    else:
+        close_start = sheet_xml.index('</sheetData>', open_end)
+        head, body, tail = sheet_xml[:open_end + 1], sheet_xml[open_end + 1:close_start], sheet_xml[close_start:]
+    
+    pending = row_numbers
+    pending_pos = 0
+    parts: list[str] = []
+    position = 0
+    row_number = 0
+    max_row = 0
+    
+    def _new_row(number: int) -> str:
+        return f'<row r="{number}">{cells_for_row(number)}</row>'
+    
+    for match in _ROW_PATTERN.finditer(body):
+        attrs, content = match.group(1), match.group(2) or ''
+        number_match = _ROW_NUMBER_PATTERN.search(attrs)
+        row_number = int(number_match.group(1)) if number_match else row_number + 1
         
-        return True, None
+        while pending_pos < len(pending) and pending[pending_pos] < row_number:
+            parts.append(_new_row(pending[pending_pos]))
+            pending_pos += 1
+        if pending_pos < len(pending) and pending[pending_pos] == row_number:
+            pending_pos += 1
         
-    except TimeoutException as e:
-        error_msg = f"Timeout waiting for element: {e}"
-    except NoSuchElementException as e:
-        error_msg = f"Element not found: {e}"
-    except WebDriverException as e:
-        error_msg = f"Browser error: {e}"
-    except Exception as e:
-        error_msg = f"Unexpected error: {e}"
+        extra = cells_for_row(row_number)
+        if extra:
+            attrs = _SPANS_PATTERN.sub(
+                lambda m: f'spans="{m.group(1)}:{max(int(m.group(2)), last_index)}"', attrs
+            )
+            parts.append(body[position:match.start()])
+            parts.append(f'<row{attrs}>{content}{extra}</row>')
+            position = match.end()
+        max_row = max(max_row, row_number)
     
-    # Retry logic
-    if retry_count < max_retries:
-        time.sleep(1)  # Wait before retry
-        return process_row(
-            driver, value, input_xpath, submit_xpath,
-            retry_count + 1, max_retries
-        )
+    parts.append(body[position:])
+    for number in pending[pending_pos:]:
+        parts.append(_new_row(number))
+        max_row = max(max_row, number)
+    if pending:
+        max_row = max(max_row, pending[-1])
     
-    return False, error_msg
-
+    head = _DIMENSION_PATTERN.sub(
+        lambda m: f'<dimension ref="{m.group(1)}{m.group(2)}:{last_column}{max(max_row, int(m.group(4) or 0))}"',
+        head, count=1
+    )
+    return head + ''.join(parts) + tail
 
-# =============================================================================
-# Main Automation Logic
-# =============================================================================
 
-def run_automation(column_name: str) -> None:
+def write_back_outcomes(
+    source: Path,
+    target: Path,
+    outcomes: dict[int, RowOutcome],
+    sheet_name: Optional[str] = None
+) -> int:
     """
-    Main automation loop - runs in background thread.
+    Write status, error and timestamp columns into a copy of a workbook.
     
-    Orchestrates the complete automation workflow including browser
-    initialization, element selection, and data processing.
+    The worksheet XML is rewritten in one pass and every other part of the
+    archive is copied byte-for-byte, so formatting, other sheets, styles
+    and shared strings are preserved. The copy is written to a temporary
+    file and atomically moved into place, which makes repeated checkpoint
+    writes safe.
     
     Args:
-        column_name: Name of the DataFrame column containing values to process.
+        source: Uploaded .xlsx workbook.
+        target: Destination path of the annotated copy.
+        outcomes: Row outcomes keyed by DataFrame index.
+        sheet_name: Sheet the data was read from, or None for the first sheet.
+    
+    Returns:
+        Number of rows written.
+    
+    Raises:
+        FileValidationError: If the workbook is not a valid .xlsx file.
     """
-    state = automation_state
-    config = state.config
+    from openpyxl.utils import column_index_from_string, get_column_letter
     
     try:
-        with state_lock:
-            state.stats.reset()
-            state.failed_rows = []
-        
-        log_message('Initializing browser...', 'info')
-        state.driver = get_driver(config.browser, config.headless)
-        
-        log_message(f'Navigating to: {config.url}', 'info')
-        state.driver.get(config.url)
-        time.sleep(2)
-        
-        # Element selection phase - Input field
-        log_message('⚠️ Click on the INPUT FIELD in the browser window', 'warning')
-        inject_element_selector(state.driver, 'INPUT FIELD')
-        socketio.emit('wait_for_element', {'type': 'input'})
-        
-        # Wait for element selection
-        while not state.input_selected and not state.should_stop:
-            elem_info = get_selected_element(state.driver)
-            if elem_info:
-                state.element_xpath = elem_info['xpath']
-                state.input_selected = True
-                elem_id_display = f" #{elem_info['id']}" if elem_info.get('id') else ''
-                log_message(f"✅ Input field selected: {elem_info['tag']}{elem_id_display}", 'success')
-            time.sleep(0.5)
-        
-        if state.should_stop:
-            raise AutomationError('Automation stopped by user')
-        
-        time.sleep(1)
-        
-        # Element selection phase - Submit button
-        log_message('⚠️ Now click on the SUBMIT BUTTON in the browser window', 'warning')
-        inject_element_selector(state.driver, 'SUBMIT BUTTON')
-        socketio.emit('wait_for_element', {'type': 'submit'})
-        
-        while not state.submit_selected and not state.should_stop:
-            elem_info = get_selected_element(state.driver)
-            if elem_info:
-                state.submit_xpath = elem_info['xpath']
-                state.submit_selected = True
-                elem_id_display = f" #{elem_info['id']}" if elem_info.get('id') else ''
-                log_message(f"✅ Submit button selected: {elem_info['tag']}{elem_id_display}", 'success')
-            time.sleep(0.5)
-        
-        if state.should_stop:
-            raise AutomationError('Automation stopped by user')
-        
-        socketio.emit('elements_confirmed')
-        log_message('Starting data processing...', 'info')
-        
-        # Get data range
-        data = state.data
-        if data is None:
-            raise AutomationError('No data loaded')
-        
-        start = config.start_row
-        end = config.end_row if config.end_row != -1 else len(data)
-        data_subset = data.iloc[start:end]
-        total = len(data_subset)
-        
-        with state_lock:
-            state.stats.total = total
-        
-        # Process each row
-        for idx, (index, row) in enumerate(data_subset.iterrows()):
-            if state.should_stop:
-                log_message('Automation stopped by user', 'warning')
-                break
-            
-            while state.is_paused and not state.should_stop:
-                time.sleep(0.5)
-            
-            value = str(row[column_name])
-            state.stats.current = idx + 1
-            
-            max_retries = config.max_retries if config.retry_failed else 0
-            
-            success, error = process_row(
-                state.driver,
-                value,
-                state.element_xpath,
-                state.submit_xpath,
-                max_retries=max_retries
-            )
-            
-            # Truncate value for logging
-            display_value = value[:VALUE_TRUNCATE_LENGTH]
-            if len(value) > VALUE_TRUNCATE_LENGTH:
-                display_value += "..."
-            
-            if success:
-                with state_lock:
-                    state.stats.success += 1
-                log_message(f'Row {index + 1}: {display_value}', 'success')
-            else:
-                with state_lock:
-                    state.stats.failed += 1
-                    state.failed_rows.append(FailedRow(
-                        index=index,
-                        value=value,
-                        error=error or 'Unknown error'
-                    ))
-                log_message(f'Row {index + 1} failed: {error}', 'error')
-            
-            update_progress(
-                idx + 1, total,
-                state.stats.success,
-                state.stats.failed
-            )
-            
-            time.sleep(config.delay)
-        
-        # Summary
-        log_message('═' * 40, 'info')
-        log_message(
-            f'✅ Completed! Success: {state.stats.success}, Failed: {state.stats.failed}',
-            'success'
+        with zipfile.ZipFile(source) as archive:
+            part = resolve_sheet_part(archive, sheet_name)
+            sheet_xml = archive.read(part).decode('utf-8')
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise FileValidationError(f"Write-back requires an .xlsx workbook: {e}") from e
+    
+    dimension = _DIMENSION_PATTERN.search(sheet_xml)
+    if dimension and dimension.group(3):
+        last_existing = column_index_from_string(dimension.group(3))
+    else:
+        letters = set(_CELL_REF_PATTERN.findall(sheet_xml)) or {'A'}
+        last_existing = max(column_index_from_string(col) for col in letters)
+    
+    columns = [get_column_letter(last_existing + offset) for offset in range(1, len(WRITE_BACK_HEADERS) + 1)]
+    
+    # pandas reads Excel row 1 as the header, blank or not, so DataFrame
+    # index i is always Excel row i + 2
+    values_by_row: dict[int, tuple[str, str, str]] = {1: WRITE_BACK_HEADERS}
+    for index, outcome in outcomes.items():
+        stamp = datetime.fromtimestamp(outcome.finished_at).strftime('%Y-%m-%d %H:%M:%S')
+        values_by_row[int(index) + 2] = (outcome.status, outcome.error or '', stamp)
+    
+    def _cells(row_number: int) -> str:
+        values = values_by_row.get(row_number)
+        if values is None:
+            return ''
+        return ''.join(
+            _inline_cell(f'{col}{row_number}', text) for col, text in zip(columns, values) if text
         )
-        
-        if state.failed_rows:
-            log_message(
-                f'⚠️ {len(state.failed_rows)} rows failed. Check failed rows for details.',
-                'warning'
-            )
-        
-        socketio.emit('automation_complete', {
-            **state.stats.to_dict(),
-            'failed_rows': [fr.to_dict() for fr in state.failed_rows]
-        })
-        socketio.emit('play_sound', {'type': 'complete'})
-        
-    except BrowserInitError as e:
-        log_message(f'Browser Error: {e}', 'error')
-        socketio.emit('automation_error', {'error': str(e)})
-        socketio.emit('play_sound', {'type': 'error'})
-    except AutomationError as e:
-        log_message(f'Automation Error: {e}', 'error')
-        socketio.emit('automation_error', {'error': str(e)})
-        socketio.emit('play_sound', {'type': 'error'})
-    except Exception as e:
-        log_message(f'Unexpected Error: {e}', 'error')
-        socketio.emit('automation_error', {'error': str(e)})
-        socketio.emit('play_sound', {'type': 'error'})
+    updated = _append_cells_to_sheet(sheet_xml, _cells, sorted(values_by_row), columns[-1]).encode('utf-8')
     
-    finally:
-        # Clean up driver
-        if state.driver:
-            try:
-                state.driver.quit()
-            except WebDriverException:
-                pass  # Ignore errors during cleanup
-            state.driver = None
-        
-        with state_lock:
-            state.cleanup_after_run()
-        socketio.emit('automation_stopped')
-
+    temp_target = target.with_name(target.name + '.tmp')
+    with zipfile.ZipFile(source) as archive, \
+            zipfile.ZipFile(temp_target, 'w', zipfile.ZIP_DEFLATED) as output:
+        for item in archive.infolist():
+            if item.filename == part:
+                output.writestr(item, updated, compress_type=zipfile.ZIP_DEFLATED)
+            else:
+                with archive.open(item) as src, output.open(item, 'w') as dst:
+                    while chunk := src.read(1024 * 1024):
+                        dst.write(chunk)
+    os.replace(temp_target, target)
+    return len(values_by_row) - 1
 
-# =============================================================================
-# File Management
-# =============================================================================
 
-def cleanup_uploads() -> None:
+def write_back_results() -> None:
     """
-    Clean up old uploaded files.
+    Write the current run's outcomes into a copy of the uploaded workbook.
     
-    Removes files from the upload directory that are older than
-    FILE_CLEANUP_AGE_SECONDS (default: 1 hour).
+    The copy is stored next to the upload with a '_results' suffix and its
+    path is recorded in automation_state.results_path. Every sheet
+    processed by the run is annotated. Errors are logged rather than
+    raised so a failed write-back never aborts a run.
     """
-    upload_dir = Path(app.config['UPLOAD_FOLDER'])
+    with state_lock:
+        file_path = automation_state.file_path
+        sheet_outcomes = {
+            sheet or None: dict(sheet_run.outcomes)
+            for sheet, sheet_run in automation_state.sheet_runs.items()
+            if sheet_run.outcomes
+        }
+    
+    if not file_path or not sheet_outcomes:
+        return
+    
+    source = Path(file_path)
+    if source.suffix.lower() != '.xlsx':
+        log_message('Write-back skipped: only .xlsx workbooks can be annotated', 'warning')
+        return
+    
+    target = source.with_name(f"{source.stem}{WRITE_BACK_SUFFIX}{source.suffix}")
+    started = time.perf_counter()
+    written = 0
     try:
-        for filepath in upload_dir.iterdir():
-            if filepath.is_file():
-                file_age = time.time() - filepath.stat().st_mtime
-                if file_age > FILE_CLEANUP_AGE_SECONDS:
-                    filepath.unlink()
-    except OSError as e:
-        log_message(f"Failed to cleanup uploads: {e}", 'warning')
+        workbook = source
+        for sheet_name, outcomes in sheet_outcomes.items():
+            written += write_back_outcomes(workbook, target, outcomes, sheet_name)
+            workbook = target
+    except (FileValidationError, OSError, ValueError) as e:
+        log_message(f'Write-back failed: {e}', 'warning')
+        return
+    
+    with state_lock:
+        automation_state.results_path = str(target)
+    log_message(
+        f'📄 Wrote {written} outcomes to {target.name} in {time.perf_counter() - started:.1f}s',
+        'info'
+    )
 
 
-def validate_excel_file(filename: str) -> None:
+# =============================================================================
+# Benchmark Stand-in Page
+# =============================================================================
+
+BENCHMARK_PAGE_HTML: str = """<!DOCTYPE html>
+<html>
+<head>
+<title>Automation Benchmark Form</title>
+<style>
+{% for n in assets %}@font-face { font-family: bench{{ n }}; src: url('/benchmark/asset/font/{{ n }}.woff2'); }
+{% endfor %}
+body { font-family: system-ui, sans-serif; margin: 24px; }
+table { border-collapse: collapse; margin-top: 24px; }
+td, th { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+.heavy img, .heavy video { width: 64px; height: 64px; }
+{% for n in assets %}.f{{ n }} { font-family: bench{{ n }}; }
+{% endfor %}
+</style>
+</head>
+<body>
+<h1>Automation Benchmark Form</h1>
+<p>Stand-in target for comparing per-row latency and browser memory with the throughput profile on and off.
+Submitted: {{ submissions }}</p>
+<form method="post" action="/benchmark">
+  <input type="text" id="bench-input" name="value" autocomplete="off">
+  <button type="submit" id="bench-submit">Submit</button>
+</form>
+<div class="heavy">
+{% for n in assets %}<img src="/benchmark/asset/image/{{ n }}.png?r={{ revision }}" alt=""><span class="f{{ n }}">Aa</span>
+<video src="/benchmark/asset/media/{{ n }}.mp4?r={{ revision }}" preload="auto" muted></video>
+{% endfor %}
+</div>
+<h2>Recent runs</h2>
+<table>
+<tr><th>Finished</th><th>Browser</th><th>Throughput profile</th><th>Rows</th><th>Mean ms</th><th>p95 ms</th><th>Peak RSS MB</th></tr>
+{% for run in runs %}<tr><td>{{ run.finished }}</td><td>{{ run.browser }}</td><td>{{ 'on' if run.throughput_profile else 'off' }}</td>
+<td>{{ run.rows }}</td><td>{{ run.mean_ms }}</td><td>{{ run.p95_ms }}</td><td>{{ run.peak_rss_mb if run.peak_rss_mb is not none else 'n/a' }}</td></tr>
+{% endfor %}
+</table>
+</body>
+</html>
+"""
+
+_ASSET_MIMETYPES: dict[str, str] = {'image': 'image/png', 'font': 'font/woff2', 'media': 'video/mp4'}
+
+benchmark_runs: deque[dict[str, Any]] = deque(maxlen=BENCHMARK_HISTORY_LENGTH)
+_benchmark_submissions = 0
+
+
+def record_benchmark_run(config: AutomationConfig, outcomes: list[RowOutcome], rss_samples: list[int]) -> None:
     """
-    Validate that the uploaded file is an Excel file.
+    Record per-row latency and browser memory of a finished run.
     
-    Args:
-        filename: Name of the uploaded file.
-    
-    Raises:
-        FileValidationError: If the file extension is not allowed.
+    Shown on the /benchmark page so runs with the throughput profile on
+    and off can be compared on the same hardware.
     """
-    file_ext = Path(filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise FileValidationError(
-            f"Invalid file type '{file_ext}'. "
-            f"Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    latencies = [o.latency for o in outcomes if o.status in (ROW_STATUS_SUCCESS, ROW_STATUS_FAILED)]
+    if not latencies:
+        return
+    benchmark_runs.appendleft({
+        'finished': datetime.now().strftime('%H:%M:%S'),
+        'browser': config.browser,
+        'throughput_profile': config.throughput_profile,
+        'rows': len(latencies),
+        'mean_ms': round(float(np.mean(latencies)) * 1000, 1),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 1),
+        'peak_rss_mb': round(max(rss_samples) / (1024 * 1024), 1) if rss_samples else None
+    })
 
 
 # =============================================================================
@@ -918,18 +7082,66 @@ def index() -> str:
     return render_template('index.html')
 
 
+@app.route('/benchmark', methods=['GET', 'POST'])
+def benchmark_page() -> str:
+    """
+    Serve the benchmark stand-in form.
+    
+    A local target with heavy images, fonts and media that behaves like a
+    classic multi-page form: each POST renders the page again. The page
+    also lists latency and memory results of recent runs.
+    
+    Returns:
+        Rendered HTML page.
+    """
+    global _benchmark_submissions
+    if request.method == 'POST':
+        _benchmark_submissions += 1
+    return render_template_string(
+        BENCHMARK_PAGE_HTML,
+        assets=range(BENCHMARK_ASSET_COUNT),
+        revision=_benchmark_submissions,
+        submissions=_benchmark_submissions,
+        runs=list(benchmark_runs)
+    )
+
+
+@app.route('/benchmark/asset/<kind>/<name>')
+def benchmark_asset(kind: str, name: str) -> tuple[Response, int] | Response:
+    """
+    Serve an uncacheable filler asset for the benchmark page.
+    
+    Returns:
+        BENCHMARK_ASSET_BYTES of filler with the asset's content type.
+    """
+    mimetype = _ASSET_MIMETYPES.get(kind)
+    if mimetype is None:
+        return jsonify({'error': 'Unknown asset kind'}), 404
+    return Response(
+        bytes(BENCHMARK_ASSET_BYTES),
+        mimetype=mimetype,
+        headers={'Cache-Control': 'no-store'}
+    )
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file() -> tuple[Response, int] | Response:
     """
     Handle Excel file upload.
     
     Accepts multipart form data with an Excel file, validates it,
-    and stores it for processing.
+    and stores it for processing. Files are stored by content hash, so
+    re-uploading an identical file reuses the existing copy. All sheets
+    are listed with their dimensions; only the first is parsed.
+    
+    Parsing runs as a background ingest job: the response carries the
+    job, whose progress follows in 'ingest_progress' events and from
+    /api/ingest/<job_id>.
     
     Returns:
-        JSON response with file info or error message.
+        JSON response (202) with the ingest job or error message.
     """
-    cleanup_uploads()  # Clean old files
+    upload_store.start_janitor()
     
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -945,40 +7157,86 @@ def upload_file() -> tuple[Response, int] | Response:
     
     try:
         filename = secure_filename(file.filename)
-        filepath = Path(app.config['UPLOAD_FOLDER']) / filename
-        file.save(str(filepath))
-        
-        df = pd.read_excel(filepath)
-        
-        # Get preview data
-        preview = df.head(PREVIEW_ROW_COUNT).to_dict('records')
-        
-        file_info = FileInfo(
-            name=filename,
-            rows=len(df),
-            columns=list(df.columns),
-            size=filepath.stat().st_size,
-            preview=preview
-        )
-        
-        with state_lock:
-            automation_state.data = df
-            automation_state.file_path = str(filepath)
-            automation_state.file_info = file_info
-        
-        return jsonify({
-            'success': True,
-            'file': file_info.to_dict()
-        })
-    
-    except pd.errors.EmptyDataError:
-        return jsonify({'error': 'The Excel file is empty'}), 400
-    except pd.errors.ParserError as e:
-        return jsonify({'error': f'Failed to parse Excel file: {e}'}), 400
+        filepath = upload_store.store(file.stream, filename)
+        job = ingest_manager.submit(filepath, filename)
     except OSError as e:
         return jsonify({'error': f'File system error: {e}'}), 500
+    
+    return jsonify({'success': True, 'job_id': job.job_id, 'job': job.to_dict()}), 202
+
+
+@app.route('/api/ingest', methods=['GET'])
+def list_ingest_jobs() -> Response:
+    """
+    List recent upload ingest jobs.
+    
+    Returns:
+        JSON response with the jobs, newest first.
+    """
+    return jsonify(ingest_manager.to_dict())
+
+
+@app.route('/api/ingest/<job_id>', methods=['GET'])
+def get_ingest_job(job_id: str) -> tuple[Response, int] | Response:
+    """
+    Get the state of an upload ingest job.
+    
+    Returns:
+        JSON response with the job (including the file info once ready)
+        or error message.
+    """
+    job = ingest_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown upload'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/ingest/<job_id>/activate', methods=['POST'])
+def activate_ingest_job(job_id: str) -> tuple[Response, int] | Response:
+    """
+    Load a finished upload that is not the current dataset.
+    
+    Returns:
+        JSON response with the file info or error message.
+    """
+    if automation_state.is_running:
+        return jsonify({'error': 'Cannot change file while automation is running'}), 400
+    try:
+        job = ingest_manager.activate(job_id)
+    except FileValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Failed to load file: {e}'}), 500
+    return jsonify({'success': True, 'file': job.file_info.to_dict()})
+
+
+@app.route('/api/sheet', methods=['POST'])
+def select_sheet() -> tuple[Response, int] | Response:
+    """
+    Select the workbook sheet used for preview, browsing and runs.
+    
+    The sheet is parsed on first selection and cached afterwards.
+    
+    Returns:
+        JSON response with the updated file info or error message.
+    """
+    if automation_state.is_running:
+        return jsonify({'error': 'Cannot change sheet while automation is running'}), 400
+    
+    workbook = automation_state.workbook
+    file_info = automation_state.file_info
+    if workbook is None or file_info is None:
+        return jsonify({'error': 'No data loaded. Please upload an Excel file first.'}), 400
+    
+    name = (request.json or {}).get('sheet')
+    try:
+        activate_sheet(workbook, name, file_info)
+    except FileValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Unexpected error: {e}'}), 500
+        return jsonify({'error': f'Failed to parse sheet: {e}'}), 500
+    
+    return jsonify({'success': True, 'file': file_info.to_dict()})
 
 
 @app.route('/api/clear-file', methods=['POST'])
@@ -986,25 +7244,103 @@ def clear_file() -> Response:
     """
     Clear the uploaded file.
     
-    Removes the uploaded file from disk and clears the state.
+    Removes the uploaded file from disk (unless a job still uses it)
+    and clears the state.
     
     Returns:
         JSON response confirming success.
     """
     with state_lock:
-        if automation_state.file_path:
-            file_path = Path(automation_state.file_path)
-            if file_path.exists():
-                try:
-                    file_path.unlink()
-                except OSError:
-                    pass  # Ignore errors during cleanup
+        file_path = automation_state.file_path
+        workbook = automation_state.workbook
         automation_state.data = None
+        automation_state.workbook = None
+        automation_state.sheet_name = None
+        automation_state.data_index = None
         automation_state.file_info = None
         automation_state.file_path = None
+    if workbook is not None and not automation_state.is_running:
+        workbook.close()
+    ingest_manager.forget(file_path)
+    upload_store.discard(file_path)
     return jsonify({'success': True})
 
 
+@app.route('/api/data', methods=['GET'])
+def browse_data() -> tuple[Response, int] | Response:
+    """
+    Page through the uploaded data with optional sort and filter.
+    
+    Query parameters:
+        offset, limit: Page window (limit capped at DATA_PAGE_MAX_LIMIT).
+        sort: Column to sort by; order: 'asc' (default) or 'desc'.
+        filter: Substring (or regex when regex=1) to match.
+        filter_column: Restrict the filter to one column.
+        case: '1' for a case-sensitive filter.
+    
+    Returns:
+        JSON response with the total match count and the requested rows.
+    """
+    _, data_index = current_dataset()
+    if data_index is None:
+        return jsonify({'error': 'No data loaded'}), 404
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', DATA_PAGE_DEFAULT_LIMIT)), 1), DATA_PAGE_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    try:
+        positions = data_index.query(
+            text=request.args.get('filter', ''),
+            column=request.args.get('filter_column') or None,
+            regex=request.args.get('regex') == '1',
+            case=request.args.get('case') == '1',
+            sort=request.args.get('sort') or None,
+            descending=request.args.get('order', 'asc').lower() == 'desc'
+        )
+    except KeyError as e:
+        return jsonify({'error': f'Column {e} not found in data'}), 400
+    except re.error as e:
+        return jsonify({'error': f'Invalid regex: {e}'}), 400
+    
+    return jsonify({
+        'total': int(len(positions)),
+        'offset': offset,
+        'limit': limit,
+        'columns': data_index.columns,
+        'rows': data_index.page(positions, offset, limit)
+    })
+
+
+@app.route('/api/data/stats', methods=['GET'])
+def data_stats() -> tuple[Response, int] | Response:
+    """
+    Get per-column statistics for the uploaded data.
+    
+    Returns:
+        JSON response mapping each column to its null count, distinct
+        count and minimum/maximum value length.
+    """
+    _, data_index = current_dataset()
+    if data_index is None:
+        return jsonify({'error': 'No data loaded'}), 404
+    return jsonify({'rows': len(data_index.data), 'columns': data_index.stats})
+
+
+@app.route('/api/memory', methods=['GET'])
+def memory_usage() -> Response:
+    """
+    Report the memory footprint of datasets and the current job.
+    
+    Returns:
+        JSON response with process RSS, per-sheet dataset memory (parsed,
+        spilled or not parsed) and job bookkeeping memory.
+    """
+    return jsonify(memory_report())
+
+
 @app.route('/api/config', methods=['GET', 'POST'])
 def handle_config() -> Response:
     """
@@ -1035,37 +7371,200 @@ def start_automation() -> tuple[Response, int] | Response:
     Start the automation process.
     
     Validates input and starts the automation in a background thread.
+    An optional 'sheets' list runs the same column over several workbook
+    sheets in sequence.
+    
+    An optional 'dry_run' object ({source, sample_rows, deadline_seconds})
+    forecasts the run instead: source 'sample' processes a random sample
+    of rows and publishes the forecast when done, source 'history'
+    replays timings of rows processed earlier and answers immediately.
+    
+    If the configuration has validation rules, rows failing them are
+    found before the run starts and never reach the browser; the
+    response then includes a 'validation' summary.
     
     Returns:
-        JSON response confirming start or error message.
+        JSON response confirming start (or the forecast) or error message.
     """
     if automation_state.is_running:
         return jsonify({'error': 'Automation already running'}), 400
     
-    if automation_state.data is None:
+    current_data, _ = current_dataset()
+    if current_data is None:
         return jsonify({'error': 'No data loaded. Please upload an Excel file first.'}), 400
     
     data = request.json or {}
     column = data.get('column')
+    sheets = data.get('sheets') or None
     
     if not column:
         return jsonify({'error': 'No column selected'}), 400
     
-    if column not in automation_state.data.columns:
+    if sheets:
+        workbook = automation_state.workbook
+        unknown = [name for name in sheets if workbook is None or name not in workbook.names]
+        if unknown:
+            return jsonify({'error': f'Sheets not found in workbook: {", ".join(map(str, unknown))}'}), 400
+    elif column not in current_data.columns:
         return jsonify({'error': f'Column "{column}" not found in data'}), 400
     
+    dry_run = None
+    if data.get('dry_run'):
+        try:
+            dry_run = DryRunPlan.from_dict(data['dry_run'])
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid dry-run options: {e}'}), 400
+        plan_errors = dry_run.validate()
+        if plan_errors:
+            return jsonify({'error': '; '.join(plan_errors)}), 400
+    
     # Validate configuration
     config_errors = automation_state.config.validate()
     if config_errors:
         return jsonify({'error': '; '.join(config_errors)}), 400
     
+    if dry_run and dry_run.source == 'history':
+        try:
+            rows = planned_row_count(automation_state, sheets)
+        except FileValidationError as e:
+            return jsonify({'error': str(e)}), 400
+        timings = list(row_timings)
+        if not timings:
+            # Nothing measured since the server started; use rows stored by earlier runs
+            run_history.flush()
+            timings = run_history.recent_phases(FORECAST_HISTORY_ROWS, automation_state.config.url)
+        try:
+            forecast = publish_forecast(automation_state, timings, rows, dry_run)
+        except ValueError:
+            return jsonify({'error': 'No row timings recorded yet; run a sample dry run first'}), 400
+        return jsonify({'success': True, 'forecast': forecast})
+    
+    try:
+        rejections, report = prevalidate_run(automation_state, column, sheets)
+    except FileValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    
     with state_lock:
         automation_state.reset_for_new_run()
     
-    thread = threading.Thread(target=run_automation, args=(column,), daemon=True)
+    thread = threading.Thread(target=run_automation, args=(column, sheets, dry_run, rejections), daemon=True)
     thread.start()
+    publish_event('run_started', {'column': column, 'sheets': sheets}, automation_state.run_id, broadcast=True)
     
-    return jsonify({'success': True})
+    response: dict[str, Any] = {'success': True, 'run_id': automation_state.run_id}
+    if report is not None:
+        response['validation'] = report.to_dict()
+    return jsonify(response)
+
+
+@app.route('/api/validate', methods=['POST'])
+def validate_run_rows() -> tuple[Response, int] | Response:
+    """
+    Check the rows a run would process against the validation rules.
+    
+    Takes the same 'column' and 'sheets' as /api/start and returns the
+    validation summary without starting a run.
+    
+    Returns:
+        JSON response with the summary or error message.
+    """
+    if current_dataset()[0] is None:
+        return jsonify({'error': 'No data loaded. Please upload an Excel file first.'}), 400
+    
+    data = request.json or {}
+    column = data.get('column')
+    if not column:
+        return jsonify({'error': 'No column selected'}), 400
+    
+    config_errors = automation_state.config.validate()
+    if config_errors:
+        return jsonify({'error': '; '.join(config_errors)}), 400
+    
+    try:
+        _, report = prevalidate_run(automation_state, column, data.get('sheets') or None)
+    except FileValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    if report is None:
+        return jsonify({'error': 'No validation rules configured'}), 400
+    return jsonify(report.to_dict())
+
+
+@app.route('/api/forecast')
+def get_forecast() -> tuple[Response, int] | Response:
+    """
+    Get the most recent dry-run forecast.
+    
+    Returns:
+        JSON response with the forecast or 404 if none was made.
+    """
+    if automation_state.forecast is None:
+        return jsonify({'error': 'No forecast available'}), 404
+    return jsonify(automation_state.forecast)
+
+
+@app.route('/api/profile/start', methods=['POST'])
+def profile_start() -> tuple[Response, int] | Response:
+    """
+    Start profiling the running automation.
+    
+    Returns:
+        JSON response with the profile metadata or error message.
+    """
+    try:
+        return jsonify(start_profiling(request.json or {}))
+    except ProfilingError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/profile/stop', methods=['POST'])
+def profile_stop() -> tuple[Response, int] | Response:
+    """
+    Stop profiling and save the profile.
+    
+    Returns:
+        JSON response with the saved profile's metadata, 202 if a
+        deterministic profile is still waiting for the run thread, or an
+        error message.
+    """
+    try:
+        meta = run_profiler.stop()
+    except ProfilingError as e:
+        return jsonify({'error': str(e)}), 400
+    if meta is None:
+        return jsonify({'pending': True}), 202
+    return jsonify(meta)
+
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles() -> Response:
+    """
+    List saved profiles and the one being recorded.
+    
+    Returns:
+        JSON response with 'active' and 'profiles'.
+    """
+    return jsonify({
+        'active': run_profiler.active,
+        'profiles': run_profiler.list_profiles()
+    })
+
+
+@app.route('/api/profiles/<profile_id>/<kind>', methods=['GET'])
+def download_profile(profile_id: str, kind: str) -> tuple[Response, int] | Response:
+    """
+    Download a saved profile file.
+    
+    Args:
+        profile_id: Profile ID from /api/profiles.
+        kind: 'pstats', 'collapsed' (flamegraph input) or 'json' (metadata).
+    
+    Returns:
+        The file as an attachment or 404.
+    """
+    path = run_profiler.profile_path(profile_id, kind)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path.resolve(), as_attachment=True, download_name=path.name)
 
 
 @app.route('/api/stop', methods=['POST'])
@@ -1078,24 +7577,35 @@ def stop_automation() -> Response:
     Returns:
         JSON response confirming the stop signal was sent.
     """
-    with state_lock:
-        automation_state.should_stop = True
+    automation_state.control.stop()
     return jsonify({'success': True})
 
 
 @app.route('/api/pause', methods=['POST'])
 def toggle_pause() -> Response:
     """
-    Toggle pause state.
+    Pause or resume the automation process.
     
-    Pauses or resumes the automation process.
+    Toggles the pause unless the JSON body sets 'paused' explicitly, then
+    waits briefly for the run thread to get there. A pause takes effect
+    between rows, so a row in progress is finished first.
     
     Returns:
-        JSON response with current pause state.
+        JSON response with the requested pause state and the state
+        reached: 'paused', 'pausing', 'running', 'resuming' or 'idle'.
     """
-    with state_lock:
-        automation_state.is_paused = not automation_state.is_paused
-    return jsonify({'paused': automation_state.is_paused})
+    control = automation_state.control
+    if not automation_state.is_running:
+        return jsonify({'paused': False, 'state': 'idle'})
+    
+    data = request.get_json(silent=True) or {}
+    paused = bool(data['paused']) if 'paused' in data else not control.paused
+    control.set_paused(paused)
+    if control.wait_parked(paused, PAUSE_ACK_SECONDS):
+        reached = 'paused' if paused else 'running'
+    else:
+        reached = 'pausing' if paused else 'resuming'
+    return jsonify({'paused': paused, 'state': reached})
 
 
 @app.route('/api/confirm-element', methods=['POST'])
@@ -1111,11 +7621,8 @@ def confirm_element() -> Response:
     data = request.json or {}
     elem_type = data.get('type')
     
-    with state_lock:
-        if elem_type == 'input':
-            automation_state.input_selected = True
-        elif elem_type == 'submit':
-            automation_state.submit_selected = True
+    if elem_type in ('input', 'submit'):
+        automation_state.control.select(elem_type)
     
     return jsonify({'success': True})
 
@@ -1134,6 +7641,8 @@ def get_status() -> Response:
     return jsonify({
         'is_running': automation_state.is_running,
         'is_paused': automation_state.is_paused,
+        'run_id': automation_state.run_id,
+        'seq': event_journal.seq,
         'stats': automation_state.stats.to_dict(),
         'file_info': automation_state.file_info.to_dict() if automation_state.file_info else None,
         'config': automation_state.config.to_dict()
@@ -1141,44 +7650,231 @@ def get_status() -> Response:
 
 
 @app.route('/api/logs', methods=['GET'])
-def get_logs() -> Response:
+def get_logs() -> tuple[Response, int] | Response:
+    """
+    Get logs, optionally only those after a sequence number.
+    
+    Query parameters:
+        after: Return only entries with a higher sequence number.
+        run: Return only entries of this run and global entries.
+    
+    Returns:
+        JSON response with the log entries and the current sequence number.
+    """
+    try:
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'after must be an integer'}), 400
+    run_id = request.args.get('run')
+    
+    with state_lock:
+        logs = automation_state.logs
+        # Entries are in sequence order; scan back only as far as needed
+        start = len(logs)
+        while start > 0 and logs[start - 1].seq > after:
+            start -= 1
+        delta = [log for log in logs[start:] if run_id is None or log.run_id in (None, run_id)]
+    return jsonify({'logs': [log.to_dict() for log in delta], 'seq': event_journal.seq})
+
+
+@app.route('/api/events', methods=['GET'])
+def get_events() -> tuple[Response, int] | Response:
     """
-    Get all logs.
+    Catch up on everything published after a sequence number.
+    
+    Returns log entries and events in sequence order, with superseded
+    progress events collapsed to the latest one, so a reconnecting client
+    needs a single small request.
+    
+    Query parameters:
+        after: Last sequence number the client has seen.
+        run: Run the client is viewing (global events are always included).
     
     Returns:
-        JSON response with list of log entries.
+        JSON response with 'events' ({event, data} in sequence order), the
+        current sequence number and 'truncated' if older events were
+        already dropped (the client should then reload its state).
     """
-    return jsonify({'logs': [log.to_dict() for log in automation_state.logs]})
+    try:
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'after must be an integer'}), 400
+    run_id = request.args.get('run')
+    
+    events, truncated = event_journal.since(after, run_id)
+    with state_lock:
+        logs = [
+            {'event': 'log', 'data': log.to_dict()}
+            for log in automation_state.logs
+            if log.seq > after and (run_id is None or log.run_id in (None, run_id))
+        ]
+        # A full buffer starting past the cursor may have dropped entries
+        buffer_full = len(automation_state.logs) >= MAX_LOG_ENTRIES
+        logs_truncated = buffer_full and automation_state.logs[0].seq > after + 1
+    events = sorted(events + logs, key=lambda entry: entry['data']['seq'])
+    return jsonify({
+        'events': events,
+        'seq': event_journal.seq,
+        'truncated': truncated or logs_truncated
+    })
 
 
 @app.route('/api/export-logs', methods=['GET'])
-def export_logs() -> Response:
+def export_logs() -> tuple[Response, int] | Response:
     """
     Export logs as a text file.
     
-    Generates a timestamped log file and returns it as a download.
+    Streams a timestamped log file as a download without writing it to disk.
+    Without a run, the recent in-memory entries are exported; with one,
+    the run's full log is read back from the log archive.
+    
+    Query parameters:
+        run: Export the complete log of this run from disk.
+        format: 'txt' (default) or 'jsonl' for the archived records.
     
     Returns:
-        File download response.
+        File download response or error message.
     """
-    logs = automation_state.logs
-    log_lines = [
-        f"[{log.timestamp}] [{log.level.upper()}] {log.message}"
-        for log in logs
-    ]
-    content = '\n'.join(log_lines)
+    run_id = request.args.get('run')
+    export_format = request.args.get('format', 'txt')
+    if export_format not in ('txt', 'jsonl'):
+        return jsonify({'error': "format must be 'txt' or 'jsonl'"}), 400
+    if export_format == 'jsonl' and not run_id:
+        return jsonify({'error': 'JSON-lines export needs a run'}), 400
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"automation_log_{timestamp}.txt"
-    filepath = Path(app.config['UPLOAD_FOLDER']) / filename
+    filename = f"automation_log_{run_id or timestamp}.{export_format}"
+    
+    if run_id:
+        records = log_archive.iter_records(run_id)
+        if export_format == 'jsonl':
+            lines = (json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+            return Response(
+                stream_with_context(lines),
+                mimetype='application/x-ndjson',
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        logs = (
+            (record.get('time', '').replace('T', ' '), record.get('level', ''), record.get('message', ''))
+            for record in records
+        )
+    else:
+        logs = ((log.timestamp, log.level, log.message) for log in list(automation_state.logs))
+    
+    def _generate() -> Iterator[str]:
+        yield "Web Automation Tool - Log Export\n"
+        yield f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        if run_id:
+            yield f"Run: {run_id}\n"
+        yield '=' * 50 + '\n\n'
+        for position, (logged_at, level, message) in enumerate(logs):
+            separator = '\n' if position else ''
+            yield f"{separator}[{logged_at}] [{level.upper()}] {message}"
+    
+    return Response(
+        stream_with_context(_generate()),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+@app.route('/api/log-archive', methods=['GET'])
+def get_log_archive() -> Response:
+    """
+    Get the state of the on-disk log archive.
+    
+    Returns:
+        JSON response with writer counters and archived files.
+    """
+    return jsonify(log_archive.to_dict())
+
+
+@app.route('/api/history/runs', methods=['GET'])
+def list_history_runs() -> tuple[Response, int] | Response:
+    """
+    List past runs from the run history, newest first.
+    
+    Query parameters:
+        limit: Maximum number of runs (default 50, capped at HISTORY_RUNS_MAX_LIMIT).
+        before: Only runs started before this Unix timestamp (for paging).
+        url: Only runs against this target URL.
+    
+    Returns:
+        JSON response with 'runs' and the history writer state.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), HISTORY_RUNS_MAX_LIMIT)
+        before = float(request.args['before']) if request.args.get('before') else None
+    except ValueError:
+        return jsonify({'error': 'limit and before must be numbers'}), 400
+    
+    try:
+        runs = run_history.list_runs(limit, before, request.args.get('url') or None)
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Run history unavailable: {e}'}), 500
+    return jsonify({'runs': runs, 'history': run_history.to_dict()})
+
+
+@app.route('/api/history/runs/<run_id>', methods=['GET'])
+def get_history_run(run_id: str) -> tuple[Response, int] | Response:
+    """
+    Get one past run with its config, row counts and phase breakdown.
+    
+    Returns:
+        JSON response with the run or 404.
+    """
+    try:
+        run = run_history.get_run(run_id)
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Run history unavailable: {e}'}), 500
+    if run is None:
+        return jsonify({'error': 'Run not found'}), 404
+    return jsonify(run)
+
+
+@app.route('/api/history/runs/<run_id>/slowest', methods=['GET'])
+def get_history_slowest_rows(run_id: str) -> tuple[Response, int] | Response:
+    """
+    Get the slowest rows of a past run with their phase timings.
+    
+    Query parameters:
+        limit: Number of rows (default 20, capped at HISTORY_SLOWEST_MAX_LIMIT).
+    
+    Returns:
+        JSON response with 'rows', slowest first.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), HISTORY_SLOWEST_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
     
-    with filepath.open('w', encoding='utf-8') as f:
-        f.write("Web Automation Tool - Log Export\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write('=' * 50 + '\n\n')
-        f.write(content)
+    try:
+        return jsonify({'run_id': run_id, 'rows': run_history.slowest_rows(run_id, limit)})
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Run history unavailable: {e}'}), 500
+
+
+@app.route('/api/history/trend', methods=['GET'])
+def get_history_trend() -> tuple[Response, int] | Response:
+    """
+    Get daily throughput and latency of past runs for charting.
+    
+    Query parameters:
+        days: How many days back (default 30, capped at HISTORY_TREND_MAX_DAYS).
+        url: Only runs against this target URL.
+    
+    Returns:
+        JSON response with one entry per day that had runs, oldest first.
+    """
+    try:
+        days = min(max(int(request.args.get('days', 30)), 1), HISTORY_TREND_MAX_DAYS)
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
     
-    return send_file(str(filepath), as_attachment=True, download_name=filename)
+    try:
+        return jsonify({'days': days, 'trend': run_history.trend(days, request.args.get('url') or None)})
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Run history unavailable: {e}'}), 500
 
 
 @app.route('/api/failed-rows', methods=['GET'])
@@ -1190,10 +7886,188 @@ def get_failed_rows() -> Response:
         JSON response with list of failed row details.
     """
     return jsonify({
-        'failed_rows': [fr.to_dict() for fr in automation_state.failed_rows]
+        'failed_rows': [fr.to_dict() for fr in automation_state.failed_rows],
+        'artifacts': artifact_writer.to_dict()
     })
 
 
+@app.route('/api/artifacts/<artifact_id>/<kind>', methods=['GET'])
+def download_artifact(artifact_id: str, kind: str) -> tuple[Response, int] | Response:
+    """
+    Get a failure artifact.
+    
+    Args:
+        artifact_id: Artifact ID from /api/failed-rows.
+        kind: 'screenshot' (PNG) or 'dom' (HTML snapshot).
+    
+    Returns:
+        The artifact for display in the browser, or 404.
+    """
+    path = artifact_writer.artifact_path(artifact_id, kind)
+    if path is None:
+        return jsonify({'error': 'Artifact not found'}), 404
+    response = send_file(path.resolve(), mimetype=ARTIFACT_KINDS[kind][1])
+    if kind == 'dom':
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def worker_authorized() -> bool:
+    """Check the worker token, if one is configured in the environment."""
+    token = os.environ.get(WORKER_TOKEN_ENV)
+    return not token or secrets.compare_digest(request.headers.get('X-Worker-Token', ''), token)
+
+
+@app.route('/api/workers', methods=['GET'])
+def get_workers() -> Response:
+    """
+    Get the distributed execution status.
+    
+    Returns:
+        JSON response with lease queue counters, outstanding leases and
+        the workers seen so far.
+    """
+    return jsonify(lease_coordinator.to_dict())
+
+
+@app.route('/api/workers/lease', methods=['POST'])
+def lease_worker_rows() -> tuple[Response, int] | Response:
+    """
+    Lease a batch of rows to a worker agent.
+    
+    Expects JSON with 'worker_id' and optionally 'max_rows'.
+    
+    Returns:
+        JSON response with the lease and the job settings, or a null
+        lease if no rows are available right now.
+    """
+    if not worker_authorized():
+        return jsonify({'error': 'Invalid worker token'}), 403
+    data = request.get_json(silent=True) or {}
+    worker_id = str(data.get('worker_id') or '').strip()[:64]
+    if not worker_id:
+        return jsonify({'error': 'worker_id is required'}), 400
+    try:
+        max_rows = int(data.get('max_rows') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_rows must be an integer'}), 400
+    
+    lease = lease_coordinator.lease(worker_id, max_rows)
+    if lease is None:
+        return jsonify({'lease': None, 'open': lease_coordinator.is_open, 'retry_after': WORKER_POLL_SECONDS})
+    return jsonify({'lease': lease.to_dict(), 'job': lease_coordinator.job})
+
+
+@app.route('/api/workers/report', methods=['POST'])
+def report_worker_rows() -> tuple[Response, int] | Response:
+    """
+    Accept row outcomes from a worker agent.
+    
+    Expects JSON with 'worker_id', 'lease_id', 'results' (list of
+    {index, success, error, attempts, latency, phases}) and 'finished'.
+    
+    Returns:
+        JSON response with the number of accepted outcomes and whether
+        the lease is still active, or 409 if the lease is not valid.
+    """
+    if not worker_authorized():
+        return jsonify({'error': 'Invalid worker token'}), 403
+    data = request.get_json(silent=True) or {}
+    worker_id = str(data.get('worker_id') or '').strip()[:64]
+    if not worker_id:
+        return jsonify({'error': 'worker_id is required'}), 400
+    results = data.get('results') or []
+    if not isinstance(results, list):
+        return jsonify({'error': 'results must be a list'}), 400
+    try:
+        accepted, active = lease_coordinator.report(
+            worker_id,
+            str(data.get('lease_id') or ''),
+            results,
+            bool(data.get('finished', False))
+        )
+    except LeaseError as e:
+        return jsonify({'error': str(e), 'lease_active': False}), 409
+    return jsonify({'accepted': accepted, 'lease_active': active})
+
+
+@app.route('/api/workers/token', methods=['POST'])
+def grant_worker_token() -> tuple[Response, int] | Response:
+    """
+    Give a worker agent a rate-limit token for its next row.
+    
+    Expects JSON with 'worker_id' and 'lease_id'. Waits briefly for the
+    run's shared token bucket; runs without a rate limit always grant.
+    
+    Returns:
+        JSON response with 'granted' and 'lease_active'; a worker that
+        was not granted a token on an active lease asks again.
+    """
+    if not worker_authorized():
+        return jsonify({'error': 'Invalid worker token'}), 403
+    data = request.get_json(silent=True) or {}
+    worker_id = str(data.get('worker_id') or '').strip()[:64]
+    if not worker_id:
+        return jsonify({'error': 'worker_id is required'}), 400
+    granted, active = lease_coordinator.grant_token(worker_id, str(data.get('lease_id') or ''))
+    return jsonify({'granted': granted, 'lease_active': active})
+
+
+@app.route('/api/workers/session', methods=['GET'])
+def get_worker_session() -> tuple[Response, int] | Response:
+    """
+    Hand the saved session of the active distributed run to a worker.
+    
+    Only available when a worker token is configured, since the
+    snapshot holds login cookies.
+    
+    Returns:
+        JSON snapshot, 403 without a token or 404 if there is none.
+    """
+    if not os.environ.get(WORKER_TOKEN_ENV) or not worker_authorized():
+        return jsonify({'error': f'Session sharing requires {WORKER_TOKEN_ENV}'}), 403
+    if not lease_coordinator.is_open or not lease_coordinator.job.get('reuse_session'):
+        return jsonify({'error': 'No distributed run shares a session'}), 404
+    try:
+        snapshot = session_store.load(origin_of(lease_coordinator.job['url']))
+    except SessionSnapshotError as e:
+        return jsonify({'error': str(e)}), 500
+    if snapshot is None:
+        return jsonify({'error': 'No saved session'}), 404
+    return jsonify(snapshot)
+
+
+@app.route('/api/session', methods=['GET', 'DELETE'])
+def session_snapshot() -> Response:
+    """
+    Get or discard the saved session of the configured target.
+    
+    Returns:
+        JSON response with the snapshot's origin, whether it exists and
+        when it was saved (never its contents).
+    """
+    origin = origin_of(automation_state.config.url)
+    if request.method == 'DELETE':
+        return jsonify({'discarded': session_store.discard(origin), **session_store.info(origin)})
+    return jsonify(session_store.info(origin))
+
+
+@app.route('/api/session/capture', methods=['POST'])
+def capture_session_snapshot() -> tuple[Response, int] | Response:
+    """
+    Save the session of the run's browser, e.g. right after logging in.
+    
+    Returns:
+        JSON response with the snapshot info, or 409 if no browser is open.
+    """
+    state = automation_state
+    if not state.driver:
+        return jsonify({'error': 'No browser is open'}), 409
+    if not save_session_snapshot(state.driver, state.config):
+        return jsonify({'error': 'Session could not be saved (see log)'}), 409
+    return jsonify(session_store.info(origin_of(state.config.url)))
+
+
 @app.route('/api/retry-failed', methods=['POST'])
 def retry_failed() -> tuple[Response, int] | Response:
     """
@@ -1224,23 +8098,97 @@ def export_failed_rows() -> Response:
     if not failed_rows:
         return jsonify({'error': 'No failed rows to export'}), 404
     
-    csv_content = "Row,Value,Error\n"
-    for row in failed_rows:
-        # Escape quotes in values
-        value = str(row.value).replace('"', '""')
-        error = str(row.error).replace('"', '""')
-        csv_content += f'{row.index + 1},"{value}","{error}"\n'
-    
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f"failed_rows_{timestamp}.csv"
+    rows = ([row.index + 1, row.value, row.error] for row in list(failed_rows))
     
     return Response(
-        csv_content,
+        stream_with_context(stream_csv(['Row', 'Value', 'Error'], rows)),
         mimetype='text/csv',
         headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 
+@app.route('/api/results-workbook', methods=['GET'])
+def download_results_workbook() -> tuple[Response, int] | Response:
+    """
+    Download the uploaded workbook annotated with run outcomes.
+    
+    Returns:
+        File download response or JSON error if no write-back exists.
+    """
+    results_path = automation_state.results_path
+    if not results_path or not Path(results_path).exists():
+        return jsonify({'error': 'No results workbook available. Enable write-back and run first.'}), 404
+    file_info = automation_state.file_info
+    download_name = (
+        f"{Path(file_info.name).stem}{WRITE_BACK_SUFFIX}.xlsx" if file_info else Path(results_path).name
+    )
+    return send_file(results_path, as_attachment=True, download_name=download_name)
+
+
+@app.route('/api/export-results', methods=['GET'])
+def export_results() -> tuple[Response, int] | Response:
+    """
+    Stream every row of the current run with its outcome.
+    
+    Query parameters:
+        format: 'csv' (default), 'xlsx' or 'parquet'.
+        sheet: Sheet of a multi-sheet run (defaults to the current sheet).
+    
+    Each input row of the run range is exported with its status, error,
+    attempt count and latency. Rows are generated lazily so exports of
+    very large runs start immediately and use constant memory.
+    
+    Returns:
+        Streaming file download response or JSON error.
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(sorted(EXPORT_FORMATS))}"}), 400
+    
+    sheet = request.args.get('sheet')
+    data, _ = current_dataset()
+    with state_lock:
+        outcomes = automation_state.row_outcomes
+        run_range = automation_state.run_range
+        workbook = automation_state.workbook
+        sheet_run = automation_state.sheet_runs.get(sheet) if sheet else None
+    
+    if sheet and sheet != automation_state.sheet_name:
+        if workbook is None or sheet_run is None:
+            return jsonify({'error': f'Sheet "{sheet}" was not part of the last run'}), 404
+        data = workbook.load(sheet)
+        outcomes, run_range = sheet_run.outcomes, sheet_run.run_range
+    
+    if data is None:
+        return jsonify({'error': 'No data loaded'}), 404
+    
+    start, end = run_range if run_range else (0, len(data))
+    header = result_columns(data)
+    rows = iter_result_rows(data, outcomes, start, end)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"results_{timestamp}.{export_format}"
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    
+    if export_format == 'csv':
+        return Response(stream_with_context(stream_csv(header, rows)), mimetype='text/csv', headers=headers)
+    
+    if export_format == 'xlsx':
+        body = stream_from_writer(lambda target: write_results_xlsx(header, rows, target))
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return jsonify({'error': 'Parquet export requires pyarrow (pip install pyarrow)'}), 400
+        body = stream_from_writer(lambda target: write_results_parquet(header, rows, target))
+        mimetype = 'application/vnd.apache.parquet'
+    
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+
 @socketio.on('connect')
 def handle_connect() -> None:
     """
@@ -1251,10 +8199,50 @@ def handle_connect() -> None:
     """
     emit('connected', {
         'status': 'Connected to server',
-        'config': automation_state.config.to_dict()
+        'config': automation_state.config.to_dict(),
+        'run_id': automation_state.run_id,
+        'running': automation_state.is_running,
+        'seq': event_journal.seq
     })
 
 
+@socketio.on('join_run')
+def handle_join_run(data: Optional[dict[str, Any]] = None) -> None:
+    """
+    Subscribe the client to one run's events.
+    
+    Leaves the room of any run viewed before, so each client receives
+    only the events of the run it is viewing plus global events.
+    """
+    run_id = (data or {}).get('run_id')
+    for room in rooms():
+        if room.startswith('run:'):
+            leave_room(room)
+    if run_id:
+        join_room(run_room(str(run_id)))
+    emit('joined_run', {'run_id': run_id, 'seq': event_journal.seq})
+
+
+@socketio.on('profile_start')
+def handle_profile_start(data: Optional[dict[str, Any]] = None) -> None:
+    """Start profiling the running automation on request of a client."""
+    try:
+        emit('profile_status', {'active': start_profiling(data or {})})
+    except ProfilingError as e:
+        emit('profile_status', {'error': str(e)})
+
+
+@socketio.on('profile_stop')
+def handle_profile_stop() -> None:
+    """Stop profiling on request of a client; 'profile_saved' follows."""
+    try:
+        meta = run_profiler.stop()
+    except ProfilingError as e:
+        emit('profile_status', {'error': str(e)})
+        return
+    emit('profile_status', {'active': None, 'saved': meta, 'pending': meta is None})
+
+
 # =============================================================================
 # Application Entry Point
 # =============================================================================
@@ -1285,14 +8273,40 @@ def open_browser_delayed(url: str, delay: float = 1.5) -> None:
     thread.start()
 
 
-if __name__ == '__main__':
+def serve(host: str = '0.0.0.0', port: int = 5000, open_browser: bool = True) -> None:
+    """
+    Run the web server with the configured backend until interrupted.
+    
+    The threading backend uses Werkzeug's development server; the
+    eventlet backend serves REST routes and Socket.IO from eventlet's
+    WSGI server on green threads.
+    
+    Raises:
+        RuntimeError: If the eventlet backend is selected but the standard
+            library was not patched before this module was imported.
+    """
+    if SERVER_BACKEND == 'eventlet':
+        import eventlet.patcher
+        if not eventlet.patcher.is_monkey_patched('thread'):
+            raise RuntimeError('The eventlet backend must be started through serve.py')
+    
     load_config()
+    upload_store.start_janitor()
     print_banner()
+    print(f'   Serving on {host}:{port} with the {SERVER_BACKEND} backend')
     
     # Auto-open browser
-    open_browser_delayed('http://localhost:5000')
+    if open_browser:
+        open_browser_delayed(f'http://localhost:{port}')
     
     try:
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
+        if SERVER_BACKEND == 'threading':
+            socketio.run(app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        else:
+            socketio.run(app, host=host, port=port, debug=False)
     except KeyboardInterrupt:
         print('\n\n👋 Server stopped. Goodbye!')
+
+
+if __name__ == '__main__':
+    serve()
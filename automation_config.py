@@ -0,0 +1,259 @@
+"""
+Automation configuration.
+
+Settings of an automation run and their validation. Kept free of heavy
+dependencies so the command-line runner can parse and validate a
+configuration without importing pandas, Flask or Selenium.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+# =============================================================================
+# Constants
+# =============================================================================
+
+# Accepted data file types
+ALLOWED_EXTENSIONS: frozenset[str] = frozenset({'.xlsx', '.xls'})
+
+DEFAULT_URL: str = 'https://www.google.com'
+DEFAULT_DELAY: float = 2.0
+DEFAULT_BROWSER: str = 'chrome'
+DEFAULT_MAX_RETRIES: int = 3
+DEFAULT_LEASE_ROWS: int = 25
+DEFAULT_LEASE_SECONDS: int = 120
+MIN_LEASE_SECONDS: int = 10
+MAX_TABS: int = 8
+
+# Supported browsers
+SUPPORTED_BROWSERS: frozenset[str] = frozenset({'chrome', 'firefox', 'edge'})
+
+# Server backends, chosen through SERVER_BACKEND_ENV; the first is used when
+# automation.py is imported without serve.py
+SERVER_BACKEND_ENV: str = 'AUTOMATION_SERVER_BACKEND'
+SERVER_BACKENDS: tuple[str, ...] = ('threading', 'eventlet')
+
+
+# =============================================================================
+# Validation Rules
+# =============================================================================
+
+@dataclass
+class ValidationRule:
+    """
+    Checks applied to one column before a run.
+    
+    Rows failing any check are rejected without being submitted. Empty
+    cells only fail 'required'; the other checks apply to filled cells.
+    """
+    
+    column: str
+    required: bool = False
+    pattern: Optional[str] = None
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    allowed: list[str] = field(default_factory=list)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert rule to dictionary."""
+        return {
+            'column': self.column,
+            'required': self.required,
+            'pattern': self.pattern,
+            'min_length': self.min_length,
+            'max_length': self.max_length,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'allowed': self.allowed
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ValidationRule:
+        """Create rule from dictionary."""
+        if not isinstance(data, dict):
+            raise TypeError('Validation rule must be an object')
+        
+        def optional(key: str, cast: type) -> Any:
+            value = data.get(key)
+            return None if value is None or value == '' else cast(value)
+        
+        return cls(
+            column=str(data.get('column', '')),
+            required=bool(data.get('required', False)),
+            pattern=data.get('pattern') or None,
+            min_length=optional('min_length', int),
+            max_length=optional('max_length', int),
+            min_value=optional('min_value', float),
+            max_value=optional('max_value', float),
+            allowed=[str(value) for value in data.get('allowed') or []]
+        )
+    
+    def validate(self) -> list[str]:
+        """Validate the rule and return list of errors."""
+        errors: list[str] = []
+        label = f"Rule for '{self.column}'"
+        
+        if not self.column:
+            errors.append("Validation rule needs a column")
+        
+        if self.pattern:
+            try:
+                re.compile(self.pattern)
+            except re.error as e:
+                errors.append(f"{label}: invalid pattern ({e})")
+        
+        if (self.min_length is not None and self.min_length < 0) or (self.max_length is not None and self.max_length < 0):
+            errors.append(f"{label}: lengths must be non-negative")
+        elif self.min_length is not None and self.max_length is not None and self.min_length > self.max_length:
+            errors.append(f"{label}: min length is greater than max length")
+        
+        if self.min_value is not None and self.max_value is not None and self.min_value > self.max_value:
+            errors.append(f"{label}: min value is greater than max value")
+        
+        return errors
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+@dataclass
+class AutomationConfig:
+    """Configuration settings for automation."""
+    
+    url: str = DEFAULT_URL
+    delay: float = DEFAULT_DELAY
+    browser: str = DEFAULT_BROWSER
+    start_row: int = 0
+    end_row: int = -1
+    headless: bool = False
+    retry_failed: bool = True
+    max_retries: int = DEFAULT_MAX_RETRIES
+    write_back: bool = False
+    write_back_checkpoint: int = 0
+    skip_submitted: bool = False
+    throughput_profile: bool = False
+    recycle_after_rows: int = 0
+    recycle_rss_mb: int = 0
+    rate_limit: float = 0.0
+    rate_burst: int = 1
+    adaptive_rate: bool = False
+    failure_artifacts: bool = False
+    distributed: bool = False
+    lease_rows: int = DEFAULT_LEASE_ROWS
+    lease_seconds: int = DEFAULT_LEASE_SECONDS
+    tabs: int = 1
+    reuse_session: bool = False
+    validation_rules: list[ValidationRule] = field(default_factory=list)
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert config to dictionary."""
+        return {
+            'url': self.url,
+            'delay': self.delay,
+            'browser': self.browser,
+            'start_row': self.start_row,
+            'end_row': self.end_row,
+            'headless': self.headless,
+            'retry_failed': self.retry_failed,
+            'max_retries': self.max_retries,
+            'write_back': self.write_back,
+            'write_back_checkpoint': self.write_back_checkpoint,
+            'skip_submitted': self.skip_submitted,
+            'throughput_profile': self.throughput_profile,
+            'recycle_after_rows': self.recycle_after_rows,
+            'recycle_rss_mb': self.recycle_rss_mb,
+            'rate_limit': self.rate_limit,
+            'rate_burst': self.rate_burst,
+            'adaptive_rate': self.adaptive_rate,
+            'failure_artifacts': self.failure_artifacts,
+            'distributed': self.distributed,
+            'lease_rows': self.lease_rows,
+            'lease_seconds': self.lease_seconds,
+            'tabs': self.tabs,
+            'reuse_session': self.reuse_session,
+            'validation_rules': [rule.to_dict() for rule in self.validation_rules]
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AutomationConfig:
+        """Create config from dictionary."""
+        return cls(
+            url=data.get('url', DEFAULT_URL),
+            delay=float(data.get('delay', DEFAULT_DELAY)),
+            browser=data.get('browser', DEFAULT_BROWSER),
+            start_row=int(data.get('start_row', 0)),
+            end_row=int(data.get('end_row', -1)),
+            headless=bool(data.get('headless', False)),
+            retry_failed=bool(data.get('retry_failed', True)),
+            max_retries=int(data.get('max_retries', DEFAULT_MAX_RETRIES)),
+            write_back=bool(data.get('write_back', False)),
+            write_back_checkpoint=int(data.get('write_back_checkpoint', 0)),
+            skip_submitted=bool(data.get('skip_submitted', False)),
+            throughput_profile=bool(data.get('throughput_profile', False)),
+            recycle_after_rows=int(data.get('recycle_after_rows', 0)),
+            recycle_rss_mb=int(data.get('recycle_rss_mb', 0)),
+            rate_limit=float(data.get('rate_limit', 0.0)),
+            rate_burst=int(data.get('rate_burst', 1)),
+            adaptive_rate=bool(data.get('adaptive_rate', False)),
+            failure_artifacts=bool(data.get('failure_artifacts', False)),
+            distributed=bool(data.get('distributed', False)),
+            lease_rows=int(data.get('lease_rows', DEFAULT_LEASE_ROWS)),
+            lease_seconds=int(data.get('lease_seconds', DEFAULT_LEASE_SECONDS)),
+            tabs=int(data.get('tabs', 1)),
+            reuse_session=bool(data.get('reuse_session', False)),
+            validation_rules=[ValidationRule.from_dict(rule) for rule in data.get('validation_rules') or []]
+        )
+    
+    def validate(self) -> list[str]:
+        """Validate configuration and return list of errors."""
+        errors: list[str] = []
+        
+        if not self.url:
+            errors.append("URL is required")
+        elif not (self.url.startswith('http://') or self.url.startswith('https://')):
+            errors.append("URL must start with http:// or https://")
+        
+        if self.delay < 0:
+            errors.append("Delay must be non-negative")
+        
+        if self.browser not in SUPPORTED_BROWSERS:
+            errors.append(f"Browser must be one of: {', '.join(SUPPORTED_BROWSERS)}")
+        
+        if self.start_row < 0:
+            errors.append("Start row must be non-negative")
+        
+        if self.max_retries < 0:
+            errors.append("Max retries must be non-negative")
+        
+        if self.write_back_checkpoint < 0:
+            errors.append("Write-back checkpoint must be non-negative")
+        
+        if self.recycle_after_rows < 0 or self.recycle_rss_mb < 0:
+            errors.append("Recycle thresholds must be non-negative")
+        
+        if self.rate_limit < 0:
+            errors.append("Rate limit must be non-negative")
+        
+        if self.rate_burst < 1:
+            errors.append("Rate burst must be at least 1")
+        
+        if self.lease_rows < 1:
+            errors.append("Lease size must be at least 1 row")
+        
+        if self.lease_seconds < MIN_LEASE_SECONDS:
+            errors.append(f"Lease duration must be at least {MIN_LEASE_SECONDS} seconds")
+        
+        if not 1 <= self.tabs <= MAX_TABS:
+            errors.append(f"Tabs must be between 1 and {MAX_TABS}")
+        
+        for rule in self.validation_rules:
+            errors.extend(rule.validate())
+        
+        return errors
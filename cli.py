@@ -0,0 +1,324 @@
+"""
+Web Automation Tool - Command-Line Runner.
+
+Runs an automation job headless without the web server, for cron jobs
+and batch pipelines. Selectors are given up front instead of being
+clicked in the browser, and the result is reported through the exit
+code and a JSON summary.
+
+Heavy modules (pandas, Flask, Selenium) are imported only when a job
+actually runs, so --help and 'validate' return almost instantly.
+
+Usage:
+    python cli.py run data.xlsx --column SKU --url https://example.com \\
+        --input-xpath "//input[@id='q']" --submit-xpath "//button"
+    python cli.py validate data.xlsx --column SKU --selectors run.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from automation_config import (
+    ALLOWED_EXTENSIONS,
+    SERVER_BACKEND_ENV,
+    SERVER_BACKENDS,
+    SUPPORTED_BROWSERS,
+    AutomationConfig
+)
+
+
+# =============================================================================
+# Constants
+# =============================================================================
+
+# Exit codes
+EXIT_OK: int = 0
+EXIT_ROWS_FAILED: int = 1
+EXIT_USAGE: int = 2
+EXIT_RUN_ERROR: int = 3
+EXIT_INTERRUPTED: int = 130
+
+# Command-line flags mapped onto AutomationConfig fields
+CONFIG_FLAGS: tuple[str, ...] = (
+    'url', 'browser', 'delay', 'start_row', 'end_row', 'max_retries',
+    'retry_failed', 'write_back', 'write_back_checkpoint', 'skip_submitted',
+    'throughput_profile', 'recycle_after_rows', 'recycle_rss_mb',
+    'rate_limit', 'rate_burst', 'adaptive_rate', 'failure_artifacts', 'tabs',
+    'reuse_session'
+)
+
+
+class UsageError(Exception):
+    """Raised when command-line input is invalid."""
+    pass
+
+
+# =============================================================================
+# Argument Parsing
+# =============================================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='Run web automation jobs headless, without the web UI.',
+        epilog=(
+            f'Exit codes: {EXIT_OK} all rows succeeded, {EXIT_ROWS_FAILED} some rows failed, '
+            f'{EXIT_USAGE} invalid input, {EXIT_RUN_ERROR} run aborted, {EXIT_INTERRUPTED} interrupted.'
+        )
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    job = argparse.ArgumentParser(add_help=False)
+    job.add_argument('file', help='Excel file with the data to submit')
+    job.add_argument('--column', required=True, help='Column whose values are submitted')
+    job.add_argument('--sheet', dest='sheets', action='append', metavar='NAME',
+                     help='Sheet to process (repeat for several; default: first sheet)')
+    job.add_argument('--config', metavar='PATH',
+                     help='JSON config file (as saved by the web UI); flags override it')
+    job.add_argument('--selectors', metavar='PATH',
+                     help='JSON file with input_xpath and submit_xpath (e.g. an earlier summary)')
+    job.add_argument('--input-xpath', help='XPath of the input field')
+    job.add_argument('--submit-xpath', help='XPath of the submit button')
+    
+    options = job.add_argument_group('run options (default: from --config or built-in defaults)')
+    options.add_argument('--url', help='Target page URL')
+    options.add_argument('--browser', choices=sorted(SUPPORTED_BROWSERS))
+    options.add_argument('--delay', type=float, help='Delay between rows in seconds')
+    options.add_argument('--start-row', type=int, help='First row to process (0-indexed)')
+    options.add_argument('--end-row', type=int, help='Row to stop before (-1 for all)')
+    options.add_argument('--max-retries', type=int)
+    options.add_argument('--no-retry', dest='retry_failed', action='store_const', const=False,
+                         help='Do not retry failed rows')
+    options.add_argument('--write-back', action='store_const', const=True,
+                         help="Annotate a '_results' copy of the workbook with row outcomes")
+    options.add_argument('--write-back-checkpoint', type=int, metavar='ROWS')
+    options.add_argument('--skip-submitted', action='store_const', const=True,
+                         help='Skip values submitted by earlier runs')
+    options.add_argument('--throughput-profile', action='store_const', const=True,
+                         help='Use the lean throughput browser profile')
+    options.add_argument('--recycle-after-rows', type=int, metavar='ROWS')
+    options.add_argument('--recycle-rss-mb', type=int, metavar='MB')
+    options.add_argument('--rate-limit', type=float, metavar='ROWS_PER_SECOND')
+    options.add_argument('--rate-burst', type=int)
+    options.add_argument('--adaptive-rate', action='store_const', const=True)
+    options.add_argument('--failure-artifacts', action='store_const', const=True,
+                         help='Save a screenshot and DOM snapshot of each failed row')
+    options.add_argument('--tabs', type=int, help='Rotate rows across this many tabs of one browser')
+    options.add_argument('--reuse-session', action='store_const', const=True,
+                         help='Start logged in with the session saved by an earlier run')
+    
+    run = commands.add_parser('run', parents=[job], help='Run a job headless')
+    run.add_argument('--summary', default='-', metavar='PATH',
+                     help="Where to write the JSON summary ('-' for stdout, the default)")
+    run.add_argument('--quiet', action='store_true', help='Do not print log messages to stderr')
+    
+    commands.add_parser('validate', parents=[job], help='Check a job without running it')
+    return parser
+
+
+def build_config(args: argparse.Namespace) -> AutomationConfig:
+    """
+    Build the run configuration from --config and command-line flags.
+    
+    Runs are always headless and local: a config saved with 'distributed'
+    on would wait forever for worker agents, since no server runs here.
+    
+    Raises:
+        UsageError: If the config file cannot be read.
+    """
+    data: dict[str, Any] = {}
+    if args.config:
+        try:
+            data = json.loads(Path(args.config).read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError) as e:
+            raise UsageError(f'Cannot read config file: {e}') from e
+    
+    for name in CONFIG_FLAGS:
+        value = getattr(args, name)
+        if value is not None:
+            data[name] = value
+    data['headless'] = True
+    data['distributed'] = False
+    
+    try:
+        return AutomationConfig.from_dict(data)
+    except (TypeError, ValueError) as e:
+        raise UsageError(f'Invalid config: {e}') from e
+
+
+def resolve_selectors(args: argparse.Namespace) -> tuple[str, str]:
+    """
+    Get the input and submit XPaths from flags or a selectors file.
+    
+    Raises:
+        UsageError: If a selector is missing or the file cannot be read.
+    """
+    saved: dict[str, Any] = {}
+    if args.selectors:
+        try:
+            saved = json.loads(Path(args.selectors).read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError) as e:
+            raise UsageError(f'Cannot read selectors file: {e}') from e
+    
+    input_xpath = args.input_xpath or saved.get('input_xpath')
+    submit_xpath = args.submit_xpath or saved.get('submit_xpath')
+    if not input_xpath or not submit_xpath:
+        raise UsageError('Both an input and a submit XPath are required (--input-xpath/--submit-xpath or --selectors)')
+    return input_xpath, submit_xpath
+
+
+def check_job(args: argparse.Namespace) -> tuple[AutomationConfig, tuple[str, str]]:
+    """
+    Validate a job without touching the data or the browser.
+    
+    Raises:
+        UsageError: If the job is invalid.
+    """
+    path = Path(args.file)
+    if path.suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise UsageError(f"Invalid file type '{path.suffix}'. Allowed types: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
+    if not path.is_file():
+        raise UsageError(f'File not found: {path}')
+    
+    config = build_config(args)
+    errors = config.validate()
+    if errors:
+        raise UsageError('; '.join(errors))
+    return config, resolve_selectors(args)
+
+
+# =============================================================================
+# Commands
+# =============================================================================
+
+def write_summary(summary: dict[str, Any], destination: str) -> None:
+    """Write the JSON summary to a file or stdout."""
+    text = json.dumps(summary, indent=2, default=str)
+    if destination == '-':
+        print(text)
+    else:
+        Path(destination).write_text(text + '\n', encoding='utf-8')
+
+
+def run_job(args: argparse.Namespace, config: AutomationConfig, selectors: tuple[str, str]) -> int:
+    """
+    Run a job headless and report its outcome.
+    
+    Returns:
+        Process exit code.
+    """
+    # Deferred: pulls in pandas, Flask and Selenium
+    import automation
+    
+    state = automation.automation_state
+    path = Path(args.file)
+    sheets: Optional[list[str]] = args.sheets
+    
+    try:
+        automation.open_workbook(path, path.name, sheets[0] if sheets else None)
+    except (automation.FileValidationError, OSError, ValueError) as e:
+        print(f'error: Cannot load {path}: {e}', file=sys.stderr)
+        return EXIT_USAGE
+    if not sheets and args.column not in state.data.columns:
+        print(f'error: Column "{args.column}" not found in {path.name}', file=sys.stderr)
+        return EXIT_USAGE
+    
+    if not args.quiet:
+        automation.log_sinks.append(
+            lambda entry: print(f'{entry.timestamp} [{entry.level}] {entry.message}', file=sys.stderr)
+        )
+    
+    with automation.state_lock:
+        state.config = config
+        state.reset_for_new_run()
+        state.element_xpath, state.submit_xpath = selectors
+        state.control.select('input')
+        state.control.select('submit')
+    
+    try:
+        rejections, report = automation.prevalidate_run(state, args.column, sheets)
+    except automation.FileValidationError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return EXIT_USAGE
+    
+    started = time.time()
+    interrupted = False
+    thread = threading.Thread(
+        target=automation.run_automation, args=(args.column, sheets, None, rejections), daemon=True
+    )
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        interrupted = True
+        state.control.stop()
+        thread.join()
+    
+    if interrupted:
+        status, exit_code = 'interrupted', EXIT_INTERRUPTED
+    elif state.error:
+        status, exit_code = 'error', EXIT_RUN_ERROR
+    elif state.stats.failed:
+        status, exit_code = 'rows_failed', EXIT_ROWS_FAILED
+    else:
+        status, exit_code = 'completed', EXIT_OK
+    
+    write_summary({
+        'status': status,
+        'exit_code': exit_code,
+        'run_id': state.run_id,
+        'error': state.error,
+        'file': str(path),
+        'column': args.column,
+        'sheets': sheets or [state.sheet_name],
+        'input_xpath': state.element_xpath,
+        'submit_xpath': state.submit_xpath,
+        'duration_seconds': round(time.time() - started, 1),
+        'stats': state.stats.to_dict(),
+        'validation': report.to_dict() if report else None,
+        'navigation': state.navigator.to_dict() if state.navigator else None,
+        'failed_rows': [row.to_dict() for row in state.failed_rows],
+        'results_path': state.results_path,
+        'config': config.to_dict()
+    }, args.summary)
+    return exit_code
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        config, selectors = check_job(args)
+    except UsageError as e:
+        if args.command == 'validate':
+            print(json.dumps({'valid': False, 'error': str(e)}))
+        else:
+            print(f'error: {e}', file=sys.stderr)
+        return EXIT_USAGE
+    
+    if args.command == 'validate':
+        print(json.dumps({'valid': True, 'config': config.to_dict()}))
+        return EXIT_OK
+    if os.environ.get(SERVER_BACKEND_ENV, SERVER_BACKENDS[0]) not in SERVER_BACKENDS:
+        print(f"error: {SERVER_BACKEND_ENV} must be one of: {', '.join(SERVER_BACKENDS)}", file=sys.stderr)
+        return EXIT_USAGE
+    return run_job(args, config, selectors)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
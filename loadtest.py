@@ -0,0 +1,447 @@
+"""
+Web Automation Tool - Dashboard Load Test.
+
+Measures how each server backend copes with many dashboards watching a
+run. For every backend a server is started in a subprocess (in a scratch
+directory, with a fake browser whose rows take --row-ms each), a generated
+workbook is uploaded and a run is started. While the run goes on,
+--clients Socket.IO clients follow its events and --pollers threads poll
+/api/status. Reported per backend:
+
+    /api/status latency     p50 / p99 / max over all polls
+    event fan-out delay     client receive time minus the event's server
+                            time ('ts'), p50 / p99 / max over all clients
+    server CPU              CPU time of the server process per wall second
+    throughput              rows per minute of the fake run
+
+The clients run in this process, so on a single machine they compete
+with the server for CPU; compare backends on the same machine and load.
+
+Requires the Socket.IO client: pip install "python-socketio[client]"
+
+Usage:
+    python loadtest.py --clients 50 --pollers 10 --rows 2000
+    python loadtest.py --backends eventlet --duration 30 --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))  # so a server started from a scratch directory finds the app
+
+
+# =============================================================================
+# Constants
+# =============================================================================
+
+# Exit codes
+EXIT_OK: int = 0
+EXIT_USAGE: int = 2
+EXIT_SERVER_ERROR: int = 3
+
+BACKENDS: tuple[str, ...] = ('threading', 'eventlet')
+DEFAULT_CLIENTS: int = 50
+DEFAULT_POLLERS: int = 10
+DEFAULT_POLL_SECONDS: float = 0.2
+DEFAULT_ROWS: int = 2000
+DEFAULT_ROW_MS: float = 20.0
+DEFAULT_DURATION_SECONDS: float = 60.0
+SERVER_START_TIMEOUT_SECONDS: float = 60.0
+INGEST_TIMEOUT_SECONDS: float = 60.0
+REQUEST_TIMEOUT_SECONDS: float = 30.0
+DATA_COLUMN: str = 'SKU'
+
+
+# =============================================================================
+# Fake Server
+# =============================================================================
+
+class FakeDriver:
+    """Stands in for a WebDriver; selection returns a fixed element at once."""
+    
+    window_handles = ['main']
+    
+    def get(self, url: str) -> None:
+        pass
+    
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if 'selectedElementInfo' in script:
+            return {'xpath': '//input', 'tag': 'input', 'id': 'fake'}
+        return None
+    
+    def quit(self) -> None:
+        pass
+
+
+def run_fake_server(backend: str, port: int, row_seconds: float) -> None:
+    """
+    Serve the app with a fake browser; runs in the server subprocess.
+    
+    Each row sleeps for row_seconds, which yields like a real browser
+    command waiting on its socket would.
+    """
+    import serve
+    serve.prepare_backend(backend)
+    
+    # Deferred: must come after the standard library is patched
+    import automation
+    
+    def fake_process_row(
+        driver: Any,
+        value: str,
+        input_xpath: str,
+        submit_xpath: str,
+        retry_count: int = 0,
+        max_retries: int = 0,
+        timings: Optional[dict[str, float]] = None,
+        control: Optional[Any] = None
+    ) -> tuple[bool, Optional[str], int]:
+        started = time.perf_counter()
+        time.sleep(row_seconds)
+        if timings is not None:
+            timings['submit'] = time.perf_counter() - started
+        return True, None, 1
+    
+    automation.get_driver = lambda *args, **kwargs: FakeDriver()
+    automation.process_row = fake_process_row
+    automation.PAGE_SETTLE_SECONDS = 0
+    automation.serve('127.0.0.1', port, open_browser=False)
+
+
+# =============================================================================
+# HTTP Helpers
+# =============================================================================
+
+def request_json(base_url: str, path: str, payload: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """
+    GET (or POST a JSON payload) and decode the JSON reply, also for HTTP errors.
+    
+    Raises:
+        OSError: If the server cannot be reached.
+    """
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(base_url + path, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+            return json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}')
+
+
+def upload_workbook(base_url: str, rows: int) -> dict[str, Any]:
+    """
+    Upload a generated one-column workbook and wait until it is loaded.
+    
+    Raises:
+        RuntimeError: If the upload is refused or not ready in time.
+    """
+    from openpyxl import Workbook
+    
+    book = Workbook()
+    sheet = book.active
+    sheet.append([DATA_COLUMN])
+    for number in range(rows):
+        sheet.append([f'SKU-{number:08d}'])
+    content = io.BytesIO()
+    book.save(content)
+    
+    boundary = secrets.token_hex(16)
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="loadtest.xlsx"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode('utf-8') + content.getvalue() + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    request = urllib.request.Request(
+        base_url + '/api/upload', data=body,
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+            reply = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f'Upload refused: {e.read().decode("utf-8", "replace")}') from e
+    
+    deadline = time.monotonic() + INGEST_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = request_json(base_url, f"/api/ingest/{reply['job_id']}")
+        if job.get('status') == 'ready':
+            return job
+        if job.get('status') == 'failed':
+            raise RuntimeError(f"Upload failed: {job.get('error')}")
+        time.sleep(0.2)
+    raise RuntimeError('Upload not loaded in time')
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def percentile(values: list[float], share: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))]
+
+
+def rounded(value: Optional[float]) -> Optional[float]:
+    """Round a value that may be missing to one decimal."""
+    return None if value is None else round(value, 1)
+
+
+class Poller(threading.Thread):
+    """Polls /api/status like a monitoring dashboard and records latencies."""
+    
+    def __init__(self, base_url: str, interval: float, stop: threading.Event) -> None:
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.interval = interval
+        self.stop = stop
+        self.latencies: list[float] = []
+        self.errors = 0
+    
+    def run(self) -> None:
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self.base_url + '/api/status', timeout=REQUEST_TIMEOUT_SECONDS) as response:
+                    response.read()
+                self.latencies.append(time.perf_counter() - started)
+            except OSError:
+                self.errors += 1
+            self.stop.wait(self.interval)
+
+
+class EventClient:
+    """Socket.IO client following a run and recording event delivery delays."""
+    
+    def __init__(self, base_url: str, finished: threading.Event) -> None:
+        import socketio
+        
+        self.delays: list[float] = []
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('*', self.on_event)
+        self.client.on('automation_stopped', lambda data=None: finished.set())
+        self.client.connect(base_url, transports=['websocket'], wait_timeout=REQUEST_TIMEOUT_SECONDS)
+    
+    def on_event(self, event: str, data: Any = None) -> None:
+        if isinstance(data, dict) and 'ts' in data:
+            self.delays.append(time.time() - data['ts'])
+    
+    def follow(self, run_id: str) -> None:
+        self.client.emit('join_run', {'run_id': run_id})
+    
+    def close(self) -> None:
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass  # Server may already be gone
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(backend: str, row_ms: float, workdir: Path) -> tuple[subprocess.Popen[bytes], str]:
+    """
+    Start a fake-browser server for a backend and wait until it answers.
+    
+    Raises:
+        RuntimeError: If the server exits or does not answer in time.
+    """
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / 'loadtest.py'), '--serve', backend,
+         '--port', str(port), '--row-ms', str(row_ms)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=(workdir / 'server.log').open('wb')
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'{backend} server exited; see {workdir / "server.log"}')
+        try:
+            request_json(base_url, '/api/status')
+            return server, base_url
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{backend} server did not start within {SERVER_START_TIMEOUT_SECONDS:.0f} seconds')
+
+
+def measure_backend(backend: str, args: argparse.Namespace) -> dict[str, Any]:
+    """
+    Run the load test against one backend.
+    
+    Returns:
+        Result summary of the backend.
+    
+    Raises:
+        RuntimeError: If the server cannot be started or the run set up.
+    """
+    import psutil
+    
+    workdir = Path(tempfile.mkdtemp(prefix=f'loadtest-{backend}-'))
+    server, base_url = start_server(backend, args.row_ms, workdir)
+    clients: list[EventClient] = []
+    pollers: list[Poller] = []
+    stop = threading.Event()
+    finished = threading.Event()
+    try:
+        upload_workbook(base_url, args.rows)
+        request_json(base_url, '/api/config', {'url': 'http://127.0.0.1/', 'delay': 0, 'headless': True})
+        
+        for _ in range(args.clients):
+            clients.append(EventClient(base_url, finished))
+        pollers = [Poller(base_url, args.poll, stop) for _ in range(args.pollers)]
+        
+        process = psutil.Process(server.pid)
+        cpu_before = sum(process.cpu_times()[:2])
+        started = time.monotonic()
+        reply = request_json(base_url, '/api/start', {'column': DATA_COLUMN})
+        if not reply.get('run_id'):
+            raise RuntimeError(f"Run not started: {reply.get('error')}")
+        for client in clients:
+            client.follow(reply['run_id'])
+        for poller in pollers:
+            poller.start()
+        
+        finished.wait(args.duration)
+        elapsed = time.monotonic() - started
+        cpu_seconds = sum(process.cpu_times()[:2]) - cpu_before
+        stop.set()
+        status = request_json(base_url, '/api/status')
+        if status.get('is_running'):
+            request_json(base_url, '/api/stop', {})
+    finally:
+        stop.set()
+        for poller in pollers:
+            poller.join(REQUEST_TIMEOUT_SECONDS)
+        for client in clients:
+            client.close()
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    
+    latencies = [latency for poller in pollers for latency in poller.latencies]
+    delays = [delay for client in clients for delay in client.delays]
+    processed = status.get('stats', {}).get('success', 0) + status.get('stats', {}).get('failed', 0)
+    return {
+        'backend': backend,
+        'clients': args.clients,
+        'pollers': args.pollers,
+        'seconds': round(elapsed, 1),
+        'rows_processed': processed,
+        'rows_per_minute': rounded(processed / elapsed * 60 if elapsed else None),
+        'status_requests': len(latencies),
+        'status_errors': sum(poller.errors for poller in pollers),
+        'status_p50_ms': rounded(percentile(latencies, 0.50) * 1000) if latencies else None,
+        'status_p99_ms': rounded(percentile(latencies, 0.99) * 1000) if latencies else None,
+        'status_max_ms': rounded(max(latencies) * 1000) if latencies else None,
+        'events_received': len(delays),
+        'fanout_p50_ms': rounded(percentile(delays, 0.50) * 1000) if delays else None,
+        'fanout_p99_ms': rounded(percentile(delays, 0.99) * 1000) if delays else None,
+        'fanout_max_ms': rounded(max(delays) * 1000) if delays else None,
+        'server_cpu_percent': rounded(cpu_seconds / elapsed * 100 if elapsed else None)
+    }
+
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    """Print results side by side, one column per backend."""
+    keys = [key for key in results[0] if key != 'backend']
+    width = max(len(key) for key in keys)
+    print(f"{'':{width}}  " + '  '.join(f"{result['backend']:>12}" for result in results))
+    for key in keys:
+        cells = ('--' if result[key] is None else str(result[key]) for result in results)
+        print(f'{key:{width}}  ' + '  '.join(f'{cell:>12}' for cell in cells))
+
+
+# =============================================================================
+# Entry Point
+# =============================================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog='loadtest.py',
+        description='Load-test the server backends with many dashboards following a fake-browser run.'
+    )
+    parser.add_argument('--backends', default=','.join(BACKENDS),
+                        help=f"Comma-separated backends to test (default: {','.join(BACKENDS)})")
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS, help='Socket.IO clients following the run')
+    parser.add_argument('--pollers', type=int, default=DEFAULT_POLLERS, help='Threads polling /api/status')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS, metavar='SECONDS',
+                        help='Wait between polls of each poller')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='Rows in the generated workbook')
+    parser.add_argument('--row-ms', type=float, default=DEFAULT_ROW_MS, help='Time the fake browser takes per row')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION_SECONDS, metavar='SECONDS',
+                        help='Stop measuring after this long if the run has not finished')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+    parser.add_argument('--serve', choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.serve:
+        run_fake_server(args.serve, args.port, args.row_ms / 1000)
+        return EXIT_OK
+    
+    backends = [name.strip() for name in args.backends.split(',') if name.strip()]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown or not backends:
+        print(f"error: Backends must be among: {', '.join(BACKENDS)}", file=sys.stderr)
+        return EXIT_USAGE
+    if args.clients < 0 or args.pollers < 0 or args.rows < 1 or args.row_ms < 0 or args.poll <= 0:
+        print('error: Counts and times must be non-negative (rows at least 1, poll interval positive)', file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        import socketio  # noqa: F401
+    except ImportError:
+        print('error: The Socket.IO client is needed: pip install "python-socketio[client]"', file=sys.stderr)
+        return EXIT_USAGE
+    
+    results: list[dict[str, Any]] = []
+    for backend in backends:
+        print(f'Testing {backend}: {args.clients} clients, {args.pollers} pollers, {args.rows} rows...', file=sys.stderr)
+        try:
+            results.append(measure_backend(backend, args))
+        except (RuntimeError, OSError) as e:
+            print(f'error: {backend}: {e}', file=sys.stderr)
+            return EXIT_SERVER_ERROR
+    
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
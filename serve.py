@@ -0,0 +1,102 @@
+"""
+Web Automation Tool - Production Server.
+
+Starts the web app with a selectable server backend:
+
+    eventlet   REST routes and Socket.IO on eventlet green threads, served
+               by eventlet's WSGI server (recommended for production, e.g.
+               when many dashboards and monitors are connected).
+    threading  Werkzeug's development server with one OS thread per
+               request, the same as running automation.py directly.
+
+The backend has to be chosen before the app is imported, because eventlet
+patches the standard library (sockets, threads, time) for the whole
+process first.
+
+Usage:
+    python serve.py --backend eventlet --port 8000
+    python serve.py --backend threading --no-browser
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import Optional
+
+# Only the standard library, so eventlet can still patch it afterwards
+from automation_config import SERVER_BACKEND_ENV, SERVER_BACKENDS
+
+
+# =============================================================================
+# Constants
+# =============================================================================
+
+DEFAULT_HOST: str = '0.0.0.0'
+DEFAULT_PORT: int = 5000
+
+# Exit codes
+EXIT_OK: int = 0
+EXIT_USAGE: int = 2
+
+
+# =============================================================================
+# Entry Point
+# =============================================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog='serve.py',
+        description='Serve the web automation app with a production-ready backend.'
+    )
+    parser.add_argument('--backend', choices=SERVER_BACKENDS,
+                        default=os.environ.get(SERVER_BACKEND_ENV, 'eventlet'),
+                        help=f'Server backend (default: ${SERVER_BACKEND_ENV} or eventlet)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Interface to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--no-browser', dest='open_browser', action='store_false',
+                        help='Do not open the web UI in a browser')
+    return parser
+
+
+def prepare_backend(backend: str) -> None:
+    """
+    Select the backend for automation.py, which must not be imported yet.
+    
+    Raises:
+        ImportError: If the backend's package is not installed.
+    """
+    os.environ[SERVER_BACKEND_ENV] = backend
+    if backend == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.backend not in SERVER_BACKENDS:
+        print(f"error: {SERVER_BACKEND_ENV} must be one of: {', '.join(SERVER_BACKENDS)}", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        prepare_backend(args.backend)
+    except ImportError as e:
+        print(f'error: The {args.backend} backend is not installed ({e})', file=sys.stderr)
+        return EXIT_USAGE
+    
+    # Deferred: must come after the standard library is patched
+    import automation
+    
+    automation.serve(args.host, args.port, args.open_browser)
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
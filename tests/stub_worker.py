@@ -0,0 +1,51 @@
+"""
+worker.py with a stub browser, for tests that run real worker processes.
+
+Rows are "submitted" by sleeping STUB_ROW_SECONDS (STUB_FIRST_ROW_SECONDS
+for the agent's first row) and appending the value to the STUB_LOG file.
+Values starting with 'bad' fail.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import automation  # noqa: E402
+import worker  # noqa: E402
+
+rows_seen = 0
+
+
+class StubDriver:
+    """Driver stand-in; the page never changes after a submit."""
+    
+    def execute_script(self, script: str, *args: Any) -> None:
+        return None
+    
+    def quit(self) -> None:
+        pass
+
+
+def stub_process_row(driver: Any, value: str, input_xpath: str, submit_xpath: str,
+                     retry_count: int = 0, *args: Any, **kwargs: Any) -> tuple[bool, str | None, int]:
+    global rows_seen
+    rows_seen += 1
+    seconds = os.environ.get('STUB_FIRST_ROW_SECONDS' if rows_seen == 1 else 'STUB_ROW_SECONDS', '0.01')
+    time.sleep(float(seconds))
+    with open(os.environ['STUB_LOG'], 'a', encoding='utf-8') as log:
+        log.write(value + '\n')
+    if value.startswith('bad'):
+        return False, 'Rejected by stub', retry_count + 1
+    return True, None, retry_count + 1
+
+
+automation.launch_driver = lambda config, slot=0: StubDriver()
+automation.process_row = stub_process_row
+automation.POST_SUBMIT_DETECT_SECONDS = 0.0
+
+if __name__ == '__main__':
+    sys.exit(worker.main())
@@ -0,0 +1,85 @@
+"""A distributed run coordinated in-process with two worker.py processes."""
+
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from werkzeug.serving import make_server
+
+import automation
+from automation_config import AutomationConfig
+
+STUB_WORKER = Path(__file__).with_name('stub_worker.py')
+ROWS = 30
+BAD_ROWS = {5, 12}
+
+
+@pytest.fixture
+def coordinator(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Serve the app on a free port from a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    server = make_server('127.0.0.1', 0, automation.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    automation.lease_coordinator.close()
+
+
+def start_worker(url: str, worker_id: str, log: Path, **env: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, str(STUB_WORKER), url, '--id', worker_id, '--poll', '0.1',
+         '--report-every', '1', '--max-rows', '3', '--slot', worker_id[-1]],
+        env={**os.environ, **env, 'STUB_LOG': str(log)},
+        stderr=subprocess.PIPE, text=True
+    )
+
+
+def test_leases_expire_first_report_wins_and_stats_merge(coordinator: str, tmp_path: Path) -> None:
+    state = automation.automation_state
+    state.reset_for_new_run()
+    state.element_xpath, state.submit_xpath = '//input', '//button'
+    state.stats.total = ROWS
+    state.row_outcomes = {}
+    config = AutomationConfig(
+        url='https://target.example', delay=0, distributed=True, lease_rows=3, lease_seconds=1
+    )
+    values = pd.Series([f'bad-{i}' if i in BAD_ROWS else f'value-{i}' for i in range(ROWS)])
+    
+    run = threading.Thread(
+        target=automation.run_distributed_rows, args=(state, config, None, values, 0, lambda index: None)
+    )
+    run.start()
+    slow_log, fast_log = tmp_path / 'slow.log', tmp_path / 'fast.log'
+    # The slow agent sits on its first row past the lease, so its rows are reassigned
+    slow = start_worker(coordinator, 'slow-1', slow_log, STUB_FIRST_ROW_SECONDS='5', STUB_ROW_SECONDS='0.05')
+    while not automation.lease_coordinator.workers:
+        threading.Event().wait(0.05)
+    fast = start_worker(coordinator, 'fast-2', fast_log, STUB_ROW_SECONDS='0.25')
+    run.join(timeout=60)
+    workers = automation.lease_coordinator.to_dict()['workers']
+    for process in (slow, fast):
+        process.terminate()
+    slow_output = slow.communicate(timeout=10)[1]
+    fast.communicate(timeout=10)
+    
+    assert not run.is_alive()
+    assert automation.lease_coordinator.reassigned >= 1
+    
+    # Every row has exactly one outcome, merged from both agents
+    assert sorted(state.row_outcomes) == list(range(ROWS))
+    assert state.stats.success == ROWS - len(BAD_ROWS)
+    assert state.stats.failed == len(BAD_ROWS)
+    assert sorted(row.index for row in state.failed_rows) == sorted(BAD_ROWS)
+    assert workers['slow-1']['rows_done'] + workers['fast-2']['rows_done'] == ROWS
+    
+    # The slow agent's late report of its first row lost to the reassigned copy
+    slow_rows = slow_log.read_text().split()
+    fast_rows = fast_log.read_text().split()
+    assert slow_rows[0] in fast_rows
+    assert len(slow_rows) + len(fast_rows) > ROWS
+    assert 'Lease given up' in slow_output
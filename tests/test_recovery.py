@@ -0,0 +1,29 @@
+"""Rows that outlive a browser crash."""
+
+from typing import Any, Optional
+
+import pytest
+
+import automation
+
+
+def test_attempts_before_a_crash_are_counted(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = 0
+    
+    def process_row(driver: Any, value: str, input_xpath: str, submit_xpath: str, retry_count: int = 0,
+                    max_retries: int = 3, timings: Optional[dict[str, float]] = None,
+                    control: Any = None) -> tuple[bool, Optional[str], int]:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            # Two failed tries, then the session is found dead on the third
+            raise automation.DriverCrashedError('session lost', 3)
+        return True, None, 1
+    
+    monkeypatch.setattr(automation, 'process_row', process_row)
+    monkeypatch.setattr(automation, 'launch_driver', lambda config, slot=0: object())
+    state = automation.AutomationState()
+    health = automation.DriverHealthMonitor(0, 0)
+    
+    assert automation.process_row_with_recovery(state, state.config, health, 'v', 3) == (True, None, 4)
+    assert health.recoveries == 1
@@ -0,0 +1,27 @@
+"""Skipping values already submitted or repeated across a run's sheets."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import automation
+
+
+def test_duplicates_are_skipped_across_sheets(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    index = automation.SubmissionIndex(tmp_path / 'submissions.db')
+    monkeypatch.setattr(automation, 'submission_index', index)
+    index.record('scope', automation.SubmissionIndex.hash_values(pd.Series(['old'])).tolist())
+    seen: set[int] = set()
+    
+    first = pd.DataFrame({'value': ['a', 'b', 'a', 'old']})
+    rows, hashes, skipped = automation.select_rows_to_submit(first, 'value', 'scope', seen)
+    assert rows['value'].tolist() == ['a', 'b']
+    assert skipped == {2: 'Duplicate value in this file', 3: 'Already submitted in a previous run'}
+    
+    # Nothing from the first sheet has reached the index yet
+    second = pd.DataFrame({'value': ['b', 'c', 'old']})
+    rows, hashes, skipped = automation.select_rows_to_submit(second, 'value', 'scope', seen)
+    assert rows['value'].tolist() == ['c']
+    assert skipped == {0: 'Duplicate value in this file', 2: 'Already submitted in a previous run'}
+    assert len(seen) == 3
@@ -0,0 +1,119 @@
+"""Tab multiplexing against targets that do and do not navigate on submit."""
+
+from typing import Any, Optional
+
+import pandas as pd
+import pytest
+
+import automation
+
+
+class FakePage:
+    """One document: the form page or the page a submit loaded."""
+    
+    def __init__(self, form: bool) -> None:
+        self.form = form
+        self.globals: dict[str, Any] = {}
+
+
+class FakeSwitchTo:
+    def __init__(self, driver: 'FakeTabDriver') -> None:
+        self.driver = driver
+    
+    def new_window(self, kind: str) -> None:
+        self.driver.tabs.append([FakePage(form=False)])
+        self.driver.current = len(self.driver.tabs) - 1
+    
+    def window(self, handle: str) -> None:
+        self.driver.current = int(handle)
+
+
+class FakeTabDriver:
+    """
+    Tabs with a back history, answering the tab and navigator scripts.
+    
+    A submit on a navigating target loads a page without the form; on a
+    same-page target the form stays.
+    """
+    
+    def __init__(self, navigates: bool) -> None:
+        self.navigates = navigates
+        self.tabs: list[list[FakePage]] = [[FakePage(form=True)]]
+        self.current = 0
+        self.switch_to = FakeSwitchTo(self)
+        self.backs = 0
+    
+    @property
+    def page(self) -> FakePage:
+        return self.tabs[self.current][-1]
+    
+    @property
+    def current_window_handle(self) -> str:
+        return str(self.current)
+    
+    def get(self, url: str) -> None:
+        self.tabs[self.current].append(FakePage(form=True))
+    
+    def back(self) -> None:
+        self.backs += 1
+        self.tabs[self.current].pop()
+    
+    def submit(self) -> None:
+        if self.navigates:
+            self.tabs[self.current].append(FakePage(form=False))
+    
+    def execute_script(self, script: str, *args: Any) -> Any:
+        page = self.page
+        if script == automation.TAB_FORM_SCRIPT:
+            page.globals['form'] = True
+        elif script == automation.TAB_SUBMITTED_SCRIPT:
+            page.globals['submitted'] = True
+        elif script == automation.TAB_READY_SCRIPT:
+            if page.form:
+                return 'ready'
+            return False if page.globals.get('form') else 'navigated'
+        elif script == automation.NAV_FORM_SCRIPT:
+            return 'ready' if page.form else 'missing'
+        return None
+
+
+def run_tabs(monkeypatch: pytest.MonkeyPatch, navigates: bool, rows: int) -> tuple[FakeTabDriver, automation.AutomationState]:
+    driver = FakeTabDriver(navigates)
+    
+    def process_row_with_recovery(state: automation.AutomationState, config: automation.AutomationConfig,
+                                  health: Any, value: str, max_retries: int,
+                                  timings: Optional[dict[str, float]] = None) -> tuple[bool, Optional[str], int]:
+        if not driver.page.form:
+            return False, 'Input not found', 1
+        driver.submit()
+        return True, None, 1
+    
+    monkeypatch.setattr(automation, 'process_row_with_recovery', process_row_with_recovery)
+    monkeypatch.setattr(automation, 'ELEMENT_WAIT_TIMEOUT', 1.0)
+    monkeypatch.setattr(automation, 'POST_SUBMIT_RENDER_GRACE_SECONDS', 0.05)
+    
+    state = automation.AutomationState()
+    state.driver = driver
+    state.element_xpath = '//input'
+    state.config = automation.AutomationConfig(url='http://target.test/form', tabs=2, delay=0)
+    state.stats.total = rows
+    values = pd.Series([f'v{i}' for i in range(rows)])
+    automation.run_tabbed_rows(
+        state, state.config, automation.DriverHealthMonitor(0, 0), automation.TabPool(2),
+        None, values, 0, lambda index: None, None
+    )
+    return driver, state
+
+
+def test_navigating_submit_counts_as_success_and_restores_the_form(monkeypatch: pytest.MonkeyPatch) -> None:
+    driver, state = run_tabs(monkeypatch, navigates=True, rows=6)
+    assert (state.stats.success, state.stats.failed) == (6, 0)
+    assert driver.backs == 6
+    assert all(tab[-1].form for tab in driver.tabs)
+
+
+def test_same_page_submit_needs_no_restore(monkeypatch: pytest.MonkeyPatch) -> None:
+    driver, state = run_tabs(monkeypatch, navigates=False, rows=6)
+    assert (state.stats.success, state.stats.failed) == (6, 0)
+    assert driver.backs == 0
+    assert all(tab[-1].form for tab in driver.tabs)
@@ -0,0 +1,48 @@
+"""Write-back of row outcomes into a copy of the uploaded workbook."""
+
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+import automation
+
+
+def make_workbook(path: Path) -> None:
+    """Header at A3 after two blank rows, with a blank row inside the data."""
+    book = openpyxl.Workbook()
+    sheet = book.active
+    sheet.title = 'Data'
+    sheet['A3'], sheet['B3'] = 'SKU', 'Name'
+    sheet['A4'] = 'x1'
+    sheet['A6'], sheet['B6'] = 'x3', 'n3'
+    book.save(path)
+
+
+def test_outcomes_land_on_the_rows_pandas_read(tmp_path: Path) -> None:
+    source, target = tmp_path / 'data.xlsx', tmp_path / 'data_results.xlsx'
+    make_workbook(source)
+    frame = automation.parse_sheet(source, 'Data')
+    assert frame.equals(pd.read_excel(source, sheet_name='Data'))
+    
+    outcomes = {
+        index: automation.RowOutcome(index=index, status=f'status-{index}')
+        for index in frame.index
+    }
+    assert automation.write_back_outcomes(source, target, outcomes, 'Data') == len(frame)
+    
+    sheet = openpyxl.load_workbook(target)['Data']
+    status_column = sheet.max_column - len(automation.WRITE_BACK_HEADERS) + 1
+    assert sheet.cell(1, status_column).value == automation.WRITE_BACK_HEADERS[0]
+    for index in frame.index:
+        assert sheet.cell(index + 2, status_column).value == f'status-{index}'
+    assert (sheet.cell(6, 1).value, sheet.cell(6, status_column).value) == ('x3', 'status-4')
+    assert sheet.max_row == len(frame) + 1
+
+
+
+def test_sheet_metadata_counts_rows_like_pandas(tmp_path: Path) -> None:
+    source = tmp_path / 'data.xlsx'
+    make_workbook(source)
+    info = automation.read_sheet_metadata(source)[0]
+    assert info.rows == len(pd.read_excel(source, sheet_name='Data'))
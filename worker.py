@@ -0,0 +1,356 @@
+"""
+Web Automation Tool - Worker Agent.
+
+Processes rows for a coordinator, i.e. the web app running a job with the
+'distributed' option. The agent leases batches of rows over HTTP, submits
+them with its own browser and reports each outcome back. Every report
+renews the lease; if the agent disappears, its lease expires on the
+coordinator and the unreported rows go to another worker.
+
+Several agents can run on one machine (e.g. to try a distributed run
+locally) as long as each has its own --id and, with the throughput
+profile, its own --slot: browsers lock their profile directory.
+
+Usage:
+    python worker.py http://coordinator:5000 --id node-a
+    python worker.py http://127.0.0.1:5000 --id local-1 --idle-exit 60
+    python worker.py http://127.0.0.1:5000 --id local-2 --slot 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+
+from automation_config import SERVER_BACKEND_ENV, SERVER_BACKENDS, AutomationConfig
+
+
+# =============================================================================
+# Constants
+# =============================================================================
+
+# Exit codes
+EXIT_OK: int = 0
+EXIT_USAGE: int = 2
+EXIT_BROWSER_ERROR: int = 3
+EXIT_INTERRUPTED: int = 130
+
+WORKER_TOKEN_ENV: str = 'AUTOMATION_WORKER_TOKEN'
+DEFAULT_POLL_SECONDS: float = 2.0
+DEFAULT_REPORT_EVERY: int = 5
+REQUEST_TIMEOUT_SECONDS: float = 30.0
+
+
+# =============================================================================
+# Coordinator Client
+# =============================================================================
+
+class CoordinatorClient:
+    """Minimal JSON client for the coordinator's worker API."""
+    
+    def __init__(self, base_url: str, worker_id: str, token: Optional[str] = None) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.worker_id = worker_id
+        self.token = token
+    
+    def post(self, path: str, payload: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        """
+        POST a JSON payload.
+        
+        Returns:
+            Tuple of (HTTP status, decoded JSON body).
+        
+        Raises:
+            OSError: If the coordinator cannot be reached.
+        """
+        return self._send(path, 'POST', json.dumps({'worker_id': self.worker_id, **payload}).encode('utf-8'))
+    
+    def get(self, path: str) -> tuple[int, dict[str, Any]]:
+        """
+        GET a JSON resource.
+        
+        Returns:
+            Tuple of (HTTP status, decoded JSON body).
+        
+        Raises:
+            OSError: If the coordinator cannot be reached.
+        """
+        return self._send(path, 'GET')
+    
+    def _send(self, path: str, method: str, data: Optional[bytes] = None) -> tuple[int, dict[str, Any]]:
+        """Send a request and decode the JSON reply, also for HTTP errors."""
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['X-Worker-Token'] = self.token
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+                return response.status, json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read() or b'{}')
+            except json.JSONDecodeError:
+                body = {}
+            return e.code, body
+    
+    def lease(self, max_rows: int) -> tuple[int, dict[str, Any]]:
+        """Ask for the next batch of rows."""
+        return self.post('/api/workers/lease', {'max_rows': max_rows})
+    
+    def report(self, lease_id: str, results: list[dict[str, Any]], finished: bool) -> tuple[int, dict[str, Any]]:
+        """Report row outcomes for a lease."""
+        return self.post('/api/workers/report', {'lease_id': lease_id, 'results': results, 'finished': finished})
+    
+    def token(self, lease_id: str) -> tuple[int, dict[str, Any]]:
+        """Ask for a rate-limit token for the next row of a lease."""
+        return self.post('/api/workers/token', {'lease_id': lease_id})
+
+
+# =============================================================================
+# Worker
+# =============================================================================
+
+class Worker:
+    """
+    Runs leased rows through the same row processing as a local run.
+    
+    The browser is kept between leases and only relaunched when the job
+    (run, URL or browser settings) changes or the session has to be
+    recycled.
+    """
+    
+    def __init__(self, client: CoordinatorClient, args: argparse.Namespace) -> None:
+        # Deferred: pulls in pandas, Flask and Selenium
+        import automation
+        
+        self.automation = automation
+        self.client = client
+        self.args = args
+        self.state = automation.AutomationState(driver_slot=args.slot)
+        self.health: Optional[Any] = None
+        self.job_key: Optional[tuple[Any, ...]] = None
+        self.rows_done = 0
+        automation.log_sinks.append(lambda entry: self.log(entry.message))
+    
+    def log(self, message: str) -> None:
+        """Print a progress message unless --quiet."""
+        if not self.args.quiet:
+            print(f"{time.strftime('%H:%M:%S')} [{self.client.worker_id}] {message}", file=sys.stderr)
+    
+    def prepare(self, job: dict[str, Any]) -> AutomationConfig:
+        """
+        Make sure the browser is set up for a job.
+        
+        Raises:
+            BrowserInitError: If the browser cannot be started.
+        """
+        config = AutomationConfig.from_dict({**job, 'headless': not self.args.headed})
+        key = (job.get('run_id'), config.url, config.browser, config.throughput_profile)
+        self.state.element_xpath = job.get('input_xpath')
+        self.state.submit_xpath = job.get('submit_xpath')
+        if key != self.job_key or self.state.driver is None:
+            self.close()
+            if config.reuse_session:
+                self.fetch_session()
+            self.log(f'Opening {config.browser} on {config.url}')
+            self.state.driver = self.automation.launch_driver(config, self.state.driver_slot)
+            self.health = self.automation.DriverHealthMonitor(config.recycle_after_rows, config.recycle_rss_mb)
+            self.health.launched()
+            self.state.navigator = self.automation.PostSubmitNavigator(config.url)
+            self.job_key = key
+        return config
+    
+    def fetch_session(self) -> None:
+        """Store the coordinator's saved session locally so new browsers start logged in."""
+        status, snapshot = self.client.get('/api/workers/session')
+        if status != 200:
+            self.log(f"No shared session ({status}): {snapshot.get('error', '')}")
+            return
+        try:
+            self.automation.session_store.save(snapshot)
+        except self.automation.SessionSnapshotError as e:
+            self.log(str(e))
+    
+    def process_lease(self, lease: dict[str, Any], job: dict[str, Any]) -> None:
+        """
+        Process the rows of one lease, reporting every few rows.
+        
+        Stops early if the coordinator says the lease is no longer active
+        (it expired and was reassigned, or the run ended). For rate-limited
+        jobs every row first waits for a token from the coordinator.
+        """
+        config = self.prepare(job)
+        lease_id = lease['lease_id']
+        rows = lease['rows']
+        max_retries = int(job.get('max_retries', 0))
+        pending: list[dict[str, Any]] = []
+        self.log(f'Leased {len(rows)} rows')
+        
+        for position, row in enumerate(rows, start=1):
+            if job.get('rate_limited') and not self.wait_for_token(lease_id):
+                if pending:
+                    self.client.report(lease_id, pending, finished=True)
+                self.log('Lease given up: no longer active')
+                return
+            phases: dict[str, float] = {}
+            started = time.perf_counter()
+            success, error, attempts = self.automation.process_row_with_recovery(
+                self.state, config, self.health, str(row['value']), max_retries, phases
+            )
+            self.health.row_done()
+            pending.append({
+                'index': row['index'],
+                'success': success,
+                'error': error,
+                'attempts': attempts,
+                'latency': time.perf_counter() - started,
+                'phases': phases
+            })
+            self.rows_done += 1
+            
+            last = position == len(rows)
+            if last or len(pending) >= self.args.report_every:
+                status, reply = self.client.report(lease_id, pending, finished=last)
+                pending = []
+                if status != 200 or (not last and not reply.get('lease_active')):
+                    self.log(f"Lease given up: {reply.get('error', 'no longer active')}")
+                    return
+            
+            recycle_reason = self.health.recycle_reason()
+            if recycle_reason:
+                self.health.recycles += 1
+                self.automation.relaunch_driver(self.state, config, recycle_reason)
+                self.health.launched()
+            
+            if not last:
+                self.state.control.sleep(config.delay)
+    
+    def wait_for_token(self, lease_id: str) -> bool:
+        """
+        Wait until the coordinator grants a rate-limit token.
+        
+        Returns:
+            True once granted, False if the lease is no longer active.
+        """
+        while True:
+            status, reply = self.client.token(lease_id)
+            if status != 200 or not reply.get('lease_active'):
+                return False
+            if reply.get('granted'):
+                return True
+    
+    def close(self) -> None:
+        """Quit the browser, if one is open."""
+        if self.state.driver:
+            try:
+                self.state.driver.quit()
+            except Exception:
+                pass  # Session may already be gone
+            self.state.driver = None
+        self.job_key = None
+    
+    def run(self) -> int:
+        """
+        Lease and process rows until idle for --idle-exit seconds.
+        
+        Returns:
+            Process exit code.
+        """
+        idle_since = time.time()
+        try:
+            while True:
+                try:
+                    status, reply = self.client.lease(self.args.max_rows)
+                except OSError as e:
+                    self.log(f'Coordinator unreachable: {e}')
+                    status, reply = 0, {}
+                
+                lease = reply.get('lease') if status == 200 else None
+                if status not in (0, 200):
+                    self.log(f"Lease refused ({status}): {reply.get('error', '')}")
+                if lease is None:
+                    if self.args.idle_exit and time.time() - idle_since >= self.args.idle_exit:
+                        self.log(f'Idle, exiting after {self.rows_done} rows')
+                        return EXIT_OK
+                    time.sleep(float(reply.get('retry_after', self.args.poll)))
+                    continue
+                
+                try:
+                    self.process_lease(lease, reply['job'])
+                except OSError as e:
+                    self.log(f'Lost the coordinator mid-lease: {e}')
+                idle_since = time.time()
+        except self.automation.BrowserInitError as e:
+            print(f'error: {e}', file=sys.stderr)
+            return EXIT_BROWSER_ERROR
+        except KeyboardInterrupt:
+            return EXIT_INTERRUPTED
+        finally:
+            self.close()
+
+
+# =============================================================================
+# Entry Point
+# =============================================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog='worker.py',
+        description='Process rows leased from a coordinator running a distributed job.',
+        epilog=(
+            f'Exit codes: {EXIT_OK} idle exit, {EXIT_USAGE} invalid input, '
+            f'{EXIT_BROWSER_ERROR} browser could not start, {EXIT_INTERRUPTED} interrupted.'
+        )
+    )
+    parser.add_argument('coordinator', help='Base URL of the coordinator, e.g. http://host:5000')
+    parser.add_argument('--id', dest='worker_id', default=f'{socket.gethostname()}-{os.getpid()}',
+                        help='Worker ID shown on the coordinator (default: host-pid)')
+    parser.add_argument('--token', default=os.environ.get(WORKER_TOKEN_ENV),
+                        help=f'Shared worker token (default: ${WORKER_TOKEN_ENV})')
+    parser.add_argument('--max-rows', type=int, default=0,
+                        help="Maximum rows per lease (default: the coordinator's lease size)")
+    parser.add_argument('--report-every', type=int, default=DEFAULT_REPORT_EVERY, metavar='ROWS',
+                        help='Report outcomes (and renew the lease) every this many rows')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS, metavar='SECONDS',
+                        help='Wait between lease requests while no rows are available')
+    parser.add_argument('--idle-exit', type=float, default=0, metavar='SECONDS',
+                        help='Exit after this long without a lease (default: never)')
+    parser.add_argument('--slot', type=int, default=0,
+                        help='Throughput-profile directory slot; give each agent on a machine its own')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--quiet', action='store_true', help='Do not print progress to stderr')
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if not args.coordinator.startswith(('http://', 'https://')):
+        print('error: Coordinator URL must start with http:// or https://', file=sys.stderr)
+        return EXIT_USAGE
+    if args.report_every < 1 or args.max_rows < 0 or args.slot < 0:
+        print('error: --report-every must be at least 1, --max-rows and --slot non-negative', file=sys.stderr)
+        return EXIT_USAGE
+    if os.environ.get(SERVER_BACKEND_ENV, SERVER_BACKENDS[0]) not in SERVER_BACKENDS:
+        print(f"error: {SERVER_BACKEND_ENV} must be one of: {', '.join(SERVER_BACKENDS)}", file=sys.stderr)
+        return EXIT_USAGE
+    
+    client = CoordinatorClient(args.coordinator, args.worker_id.strip()[:64], args.token)
+    return Worker(client, args).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())